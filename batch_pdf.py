@@ -0,0 +1,388 @@
+# batch_pdf.py
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import metrics
+from report_backends import get_backend
+
+
+# A render task's outcome: (output_path, error message or None,
+# seconds spent rendering, bytes written)
+RenderOutcome = Tuple[str, Optional[str], float, int]
+
+
+def _render_report(task: Tuple[Dict, str]) -> RenderOutcome:
+    """Render one report in a worker process."""
+    report_data, output_path = task
+    start = time.perf_counter()
+    try:
+        generate_student_pdf = get_backend("pdf")
+        generate_student_pdf(report_data, output_path, verbose=False)
+    except Exception as e:  # keep the batch going if one report fails
+        return output_path, f"{type(e).__name__}: {e}", time.perf_counter() - start, 0
+    return output_path, None, time.perf_counter() - start, os.path.getsize(output_path)
+
+
+def default_worker_count() -> int:
+    """Return the number of worker processes to use when none is given."""
+    return os.cpu_count() or 1
+
+
+def _make_process_pool(workers: int):
+    """A ProcessPoolExecutor with the given number of worker processes."""
+    # multiprocessing is slow to import; only load it for a real pool
+    from concurrent.futures import ProcessPoolExecutor
+
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _render_class_report(task: Tuple[List[Dict], str]) -> RenderOutcome:
+    """Render one multi-page class PDF in a worker process."""
+    reports, output_path = task
+    start = time.perf_counter()
+    try:
+        generate_class_pdf = get_backend("class_pdf")
+        generate_class_pdf(reports, output_path, verbose=False)
+    except Exception as e:  # keep the batch going if one class fails
+        return output_path, f"{type(e).__name__}: {e}", time.perf_counter() - start, 0
+    return output_path, None, time.perf_counter() - start, os.path.getsize(output_path)
+
+
+def _record_pool_renders(outcomes: List[RenderOutcome], rows: List[int], workers: int) -> int:
+    """
+    Add renders done in worker processes to the parent's 'pdf_render'
+    stage (metrics recorded inside a worker never reach the parent).
+    With one worker the renders ran here and recorded themselves.
+    rows[i] is the number of students in task i. Returns the bytes written.
+    """
+    bytes_written = sum(outcome[3] for outcome in outcomes)
+    if workers > 1:
+        metrics.record(
+            "pdf_render",
+            rows=sum(n for n, outcome in zip(rows, outcomes) if outcome[1] is None),
+            bytes_written=bytes_written,
+            calls=len(outcomes),
+            seconds=sum(outcome[2] for outcome in outcomes),
+        )
+    return bytes_written
+
+
+def _run_in_pool(render, tasks: List, workers: Optional[int], chunksize: Optional[int]):
+    """
+    Run render(task) for every task, in a process pool when workers > 1.
+    Returns (results in task order, number of workers used, elapsed seconds).
+    """
+    if workers is None:
+        workers = default_worker_count()
+    workers = max(1, min(workers, len(tasks)))
+
+    if chunksize is None:
+        # A few chunks per worker keeps all workers busy without
+        # paying pickling overhead for every single task
+        chunksize = max(1, len(tasks) // (workers * 4))
+
+    start = time.perf_counter()
+
+    if workers == 1:
+        results = [render(task) for task in tasks]
+    else:
+        with _make_process_pool(workers) as executor:
+            results = list(executor.map(render, tasks, chunksize=chunksize))
+
+    return results, workers, time.perf_counter() - start
+
+
+def _print_throughput(num_students: int, elapsed: float) -> None:
+    rate = num_students / elapsed if elapsed > 0 else 0.0
+    print(f"Time: {elapsed:.2f}s ({rate:.1f} students/second)")
+
+
+@metrics.timed("pdf_batch")
+def generate_pdfs_in_parallel(
+    tasks: List[Tuple[Dict, str]],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> List[Tuple[str, Optional[str]]]:
+    """
+    Render many student PDFs using a pool of worker processes.
+
+    tasks is a list of (report_data, output_path) pairs. Tasks are sent to
+    the pool in chunks and results come back in the same order as tasks.
+    Returns a list of (output_path, error) pairs, where error is None on success.
+    Prints a per-student status line and a throughput summary at the end.
+    """
+    if not tasks:
+        print("No reports to generate.")
+        return []
+
+    outcomes, workers, elapsed = _run_in_pool(_render_report, tasks, workers, chunksize)
+    bytes_written = _record_pool_renders(outcomes, [1] * len(tasks), workers)
+    results = [(output_path, error) for output_path, error, _, _ in outcomes]
+
+    count_ok = 0
+    count_failed = 0
+    for (report_data, _), (output_path, error) in zip(tasks, results):
+        name = report_data.get("name", "Unknown")
+        if error is None:
+            count_ok += 1
+            print(f"OK     {name} -> {output_path}")
+        else:
+            count_failed += 1
+            print(f"FAILED {name}: {error}")
+
+    metrics.record("pdf_batch", rows=count_ok, bytes_written=bytes_written)
+    print(f"\nGenerated {count_ok} PDF report(s), {count_failed} failed, "
+          f"using {workers} worker(s).")
+    _print_throughput(len(tasks), elapsed)
+
+    return results
+
+
+@metrics.timed("pdf_batch")
+def generate_class_pdfs_in_parallel(
+    tasks: List[Tuple[List[Dict], str]],
+    workers: Optional[int] = None,
+) -> List[Tuple[str, Optional[str]]]:
+    """
+    Render one multi-page PDF per class using a pool of worker processes.
+
+    tasks is a list of (reports for one class, output_path) pairs; each
+    class is one task, so there is no chunking. Returns (output_path, error)
+    pairs in task order and prints a per-class status line and throughput.
+    """
+    if not tasks:
+        print("No reports to generate.")
+        return []
+
+    outcomes, workers, elapsed = _run_in_pool(_render_class_report, tasks, workers, 1)
+    bytes_written = _record_pool_renders(outcomes, [len(reports) for reports, _ in tasks], workers)
+    results = [(output_path, error) for output_path, error, _, _ in outcomes]
+
+    count_ok = 0
+    count_failed = 0
+    num_students = 0
+    for (reports, _), (output_path, error) in zip(tasks, results):
+        num_students += len(reports)
+        if error is None:
+            count_ok += 1
+            print(f"OK     {len(reports)} report(s) -> {output_path}")
+        else:
+            count_failed += 1
+            print(f"FAILED {output_path}: {error}")
+
+    metrics.record("pdf_batch", rows=num_students, bytes_written=bytes_written)
+    print(f"\nGenerated {count_ok} class PDF(s), {count_failed} failed, "
+          f"using {workers} worker(s).")
+    _print_throughput(num_students, elapsed)
+
+    return results
+
+
+# ---------- PIPELINED MODE ----------
+#
+# parse -> build report data -> render -> write, all running at once:
+#
+#   parse thread --queue--> build thread --queue--> render (this thread,
+#   or a process pool) --bounded--> writer threads
+#
+# Every hand-off is bounded, so a slow stage (e.g. writes to a network
+# share) pauses the stages before it instead of piling up rows or PDFs
+# in memory, while rendering keeps going as long as there is room.
+
+# Items allowed between two stages, and PDFs rendered but not yet written
+DEFAULT_QUEUE_SIZE = 64
+
+# Threads writing finished PDFs to disk
+DEFAULT_WRITER_THREADS = 4
+
+_END = object()
+
+
+class _StageError:
+    """Passed down a queue when a stage fails, so the consumer re-raises it."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    """Put item on a bounded queue, giving up if the pipeline is stopping."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain(q: queue.Queue):
+    """Yield items from a stage's output queue until it ends."""
+    while True:
+        item = q.get()
+        if item is _END:
+            return
+        if isinstance(item, _StageError):
+            raise item.error
+        yield item
+
+
+def _start_stage(name: str, items: Iterable, out: queue.Queue, stop: threading.Event) -> threading.Thread:
+    """Run a stage on a daemon thread, feeding whatever it yields into out."""
+    def run():
+        try:
+            for item in items:
+                if not _put(out, item, stop):
+                    return
+        except BaseException as e:
+            _put(out, _StageError(e), stop)
+        finally:
+            _put(out, _END, stop)
+
+    thread = threading.Thread(target=run, name=f"pdf-pipeline-{name}", daemon=True)
+    thread.start()
+    return thread
+
+
+def _render_bytes(report_data: Dict) -> Tuple[bytes, float]:
+    """Render one report in memory; returns (PDF bytes, seconds spent)."""
+    start = time.perf_counter()
+    data = get_backend("pdf_bytes")(report_data)
+    return data, time.perf_counter() - start
+
+
+def _write_file(output_path: str, data: bytes) -> int:
+    with open(output_path, "wb") as f:
+        f.write(data)
+    return len(data)
+
+
+@metrics.timed("pdf_batch")
+def generate_pdfs_pipelined(
+    rows: Iterable[Dict],
+    build: Callable[[Dict], Optional[Tuple[Dict, str]]],
+    workers: Optional[int] = 1,
+    writer_threads: int = DEFAULT_WRITER_THREADS,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+) -> List[Tuple[str, Optional[str]]]:
+    """
+    Render student PDFs with parsing, building, rendering and writing overlapped.
+
+    rows is iterated on its own thread (e.g. a CSV reader), and build(row)
+    turns each row into a (report_data, output_path) task, or None to skip
+    it, on another. PDFs are rendered in memory, in this thread when
+    workers is 1 or in a pool of worker processes otherwise, and written
+    by writer_threads threads.
+
+    Returns (output_path, error) pairs in roster order, like
+    generate_pdfs_in_parallel(), and prints the same status lines.
+    """
+    if workers is None:
+        workers = default_worker_count()
+    workers = max(1, workers)
+
+    stop = threading.Event()
+    row_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    task_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    write_slots = threading.BoundedSemaphore(queue_size)
+    # seq -> (name, output_path, error, bytes written)
+    outcomes: Dict[int, Tuple[str, str, Optional[str], int]] = {}
+
+    def build_tasks():
+        for row in _drain(row_queue):
+            task = build(row)
+            if task is not None:
+                yield task
+
+    start = time.perf_counter()
+    _start_stage("parse", rows, row_queue, stop)
+    _start_stage("build", build_tasks(), task_queue, stop)
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    writers = ThreadPoolExecutor(max_workers=max(1, writer_threads), thread_name_prefix="pdf-pipeline-write")
+    pool = None
+    try:
+        def write(seq: int, name: str, output_path: str, data: bytes) -> None:
+            # Blocks while queue_size PDFs are waiting to be written
+            write_slots.acquire()
+            future = writers.submit(_write_file, output_path, data)
+
+            def done(future):
+                error = future.exception()
+                outcomes[seq] = (
+                    name,
+                    output_path,
+                    None if error is None else f"{type(error).__name__}: {error}",
+                    0 if error is not None else future.result(),
+                )
+                write_slots.release()
+
+            future.add_done_callback(done)
+
+        def rendered(seq: int, name: str, output_path: str, render) -> None:
+            try:
+                data, seconds = render()
+            except Exception as e:  # keep the batch going if one report fails
+                outcomes[seq] = (name, output_path, f"{type(e).__name__}: {e}", 0)
+                return
+            # Timed where it ran (here or in a worker) and recorded here
+            metrics.record("pdf_render", rows=1, bytes_written=len(data), calls=1, seconds=seconds)
+            write(seq, name, output_path, data)
+
+        if workers == 1:
+            for seq, (report_data, output_path) in enumerate(_drain(task_queue)):
+                rendered(seq, report_data.get("name", "Unknown"), output_path,
+                         lambda: _render_bytes(report_data))
+        else:
+            pool = _make_process_pool(workers)
+            # A couple of renders queued per worker keeps them busy;
+            # beyond that, wait for the oldest one
+            in_flight = deque()
+            for seq, (report_data, output_path) in enumerate(_drain(task_queue)):
+                in_flight.append((seq, report_data.get("name", "Unknown"), output_path,
+                                  pool.submit(_render_bytes, report_data)))
+                if len(in_flight) >= workers * 2:
+                    seq_done, name, path, future = in_flight.popleft()
+                    rendered(seq_done, name, path, future.result)
+            while in_flight:
+                seq_done, name, path, future = in_flight.popleft()
+                rendered(seq_done, name, path, future.result)
+    finally:
+        stop.set()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        writers.shutdown(wait=True)
+
+    elapsed = time.perf_counter() - start
+
+    if not outcomes:
+        print("No reports to generate.")
+        return []
+
+    results = []
+    count_ok = 0
+    count_failed = 0
+    bytes_written = 0
+    for seq in sorted(outcomes):
+        name, output_path, error, size = outcomes[seq]
+        results.append((output_path, error))
+        bytes_written += size
+        if error is None:
+            count_ok += 1
+            print(f"OK     {name} -> {output_path}")
+        else:
+            count_failed += 1
+            print(f"FAILED {name}: {error}")
+
+    metrics.record("pdf_batch", rows=count_ok, bytes_written=bytes_written)
+    print(f"\nGenerated {count_ok} PDF report(s), {count_failed} failed, "
+          f"using {workers} render worker(s) and {writer_threads} writer thread(s).")
+    _print_throughput(len(results), elapsed)
+
+    return results
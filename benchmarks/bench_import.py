@@ -0,0 +1,89 @@
+# benchmarks/bench_import.py
+#
+# Measure start-up time of the summary-only paths, which should never import
+# fpdf, multiprocessing or (for CSV rosters) sqlite3.
+#
+# Usage (from the project root):
+#   python benchmarks/bench_import.py [--runs 20]
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, python arguments) run from the project root
+COMMANDS = [
+    ("import main", ["-c", "import main"]),
+    ("import cli", ["-c", "import cli"]),
+    ("cli class-summary", ["cli.py", "class-summary"]),
+    ("cli subject-averages", ["cli.py", "subject-averages"]),
+]
+
+# Modules that must not be imported by the commands above
+HEAVY_MODULES = ["fpdf", "pdf_reports", "multiprocessing", "sqlite3"]
+
+
+def time_command(args, runs: int):
+    """Run 'python <args>' several times and return the wall times in seconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args],
+            cwd=PROJECT_ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def heavy_imports(args):
+    """Return which HEAVY_MODULES are imported by 'python <args>' (via -X importtime)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=PROJECT_ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    imported = set()
+    for line in result.stderr.splitlines():
+        name = line.rsplit("|", 1)[-1].strip()
+        if name in HEAVY_MODULES:
+            imported.add(name)
+    return sorted(imported)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark start-up time of summary-only paths.")
+    parser.add_argument("--runs", type=int, default=20, help="runs per command (default: 20)")
+    args = parser.parse_args()
+
+    baseline = statistics.median(time_command(["-c", "pass"], args.runs))
+    print(f"Interpreter start-up (python -c pass): {baseline * 1000:.1f} ms\n")
+
+    print(f"{'command':<24} {'median ms':>10} {'min ms':>8} {'over python':>12}  heavy imports")
+    failed = False
+    for label, command in COMMANDS:
+        timings = time_command(command, args.runs)
+        median = statistics.median(timings)
+        heavy = heavy_imports(command)
+        failed = failed or bool(heavy)
+        print(f"{label:<24} {median * 1000:>10.1f} {min(timings) * 1000:>8.1f} "
+              f"{(median - baseline) * 1000:>12.1f}  {', '.join(heavy) or '-'}")
+
+    if failed:
+        print("\nA summary-only path imported a report backend.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
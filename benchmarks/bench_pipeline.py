@@ -0,0 +1,211 @@
+# benchmarks/bench_pipeline.py
+#
+# Time each stage of the report pipeline on synthetic rosters:
+#   csv_ingest     data_io.read_students_scores_from_csv
+#   summarize      main.get_summaries_from_csv (no roster cache)
+#   summarize_warm main.get_summaries_from_csv (roster cache present)
+#   report_csv     report_io.write_student_summaries_to_csv
+#   pdf            pdf_reports.generate_student_pdf (first --pdf-limit students)
+#
+# Usage (from the project root):
+#   python benchmarks/bench_pipeline.py --sizes 1000 10000 --output bench.json
+#   python benchmarks/bench_pipeline.py --sizes 1000 10000 --baseline bench.json
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from synthetic_roster import write_synthetic_roster  # noqa: E402
+
+import main as tracker  # noqa: E402
+from data_io import read_students_scores_from_csv  # noqa: E402
+from report_io import write_student_summaries_to_csv  # noqa: E402
+from roster_cache import cache_path_for  # noqa: E402
+
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def _remove_cache(roster_path: str) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(cache_path_for(roster_path))
+
+
+def build_stages(roster_path: str, work_dir: str, pdf_limit: int):
+    """
+    Return (stage name, setup, run) triples. setup() runs untimed before
+    each measurement; run() returns the number of rows it processed.
+    """
+    state = {}
+
+    def setup_summaries():
+        if "summaries" not in state:
+            _remove_cache(roster_path)
+            state["summaries"] = tracker.get_summaries_from_csv(roster_path)
+
+    def run_ingest():
+        return len(read_students_scores_from_csv(roster_path))
+
+    def run_summarize():
+        return len(tracker.get_summaries_from_csv(roster_path))
+
+    def run_report_csv():
+        write_student_summaries_to_csv(os.path.join(work_dir, "report.csv"), state["summaries"])
+        return len(state["summaries"])
+
+    def setup_pdf():
+        if "pdf_rows" not in state:
+            state["pdf_rows"] = read_students_scores_from_csv(roster_path)[:pdf_limit]
+            state["class_stats"] = tracker.load_class_statistics(roster_path)
+
+    def run_pdf():
+        from pdf_reports import generate_student_pdf
+
+        count = 0
+        for row in state["pdf_rows"]:
+            report_data = tracker.build_report_data_from_row(row, roster_path, class_stats=state["class_stats"])
+            if report_data is None:
+                continue
+            generate_student_pdf(report_data, os.path.join(work_dir, "report.pdf"), verbose=False)
+            count += 1
+        return count
+
+    return [
+        ("csv_ingest", None, run_ingest),
+        ("summarize", lambda: _remove_cache(roster_path), run_summarize),
+        ("summarize_warm", lambda: tracker.get_summaries_from_csv(roster_path), run_summarize),
+        ("report_csv", setup_summaries, run_report_csv),
+        ("pdf", setup_pdf, run_pdf),
+    ]
+
+
+def measure(setup, run, repeat: int, track_memory: bool):
+    """
+    Return (best seconds, rows, peak traced bytes or None).
+    Memory is measured in a separate run because tracemalloc slows code down.
+    """
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        if setup:
+            setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            rows = run()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    peak = None
+    if track_memory:
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return best, rows, peak
+
+
+def load_baseline(filepath: str):
+    with open(filepath, encoding="utf-8") as f:
+        data = json.load(f)
+    return {(r["size"], r["stage"]): r for r in data["results"]}
+
+
+def format_change(current: float, previous: float) -> str:
+    if not previous:
+        return "-"
+    change = (current - previous) / previous * 100
+    return f"{change:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the report pipeline on synthetic rosters.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="roster sizes in students (default: 1k 10k 100k 1M)")
+    parser.add_argument("--subjects", type=int, default=8, help="subject columns (default: 8)")
+    parser.add_argument("--dirty", type=float, default=0.01,
+                        help="fraction of dirty score cells (default: 0.01)")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per stage, best is kept (default: 1)")
+    parser.add_argument("--pdf-limit", type=int, default=200,
+                        help="number of PDFs rendered per size (default: 200)")
+    parser.add_argument("--stages", nargs="+", help="only run these stages")
+    parser.add_argument("--no-memory", action="store_true", help="skip peak-memory measurement")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against results JSON from an earlier run")
+    args = parser.parse_args()
+
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+    results = []
+
+    header = f"{'size':>9} {'stage':<15} {'seconds':>9} {'rows/s':>12} {'peak MB':>9}"
+    if baseline:
+        header += f" {'vs baseline':>12}"
+    print(header)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for size in args.sizes:
+            roster_path = os.path.join(work_dir, f"roster_{size}.csv")
+            write_synthetic_roster(roster_path, size, args.subjects, args.dirty)
+
+            for stage, setup, run in build_stages(roster_path, work_dir, args.pdf_limit):
+                if args.stages and stage not in args.stages:
+                    continue
+
+                seconds, rows, peak = measure(setup, run, args.repeat, not args.no_memory)
+                rate = rows / seconds if seconds > 0 else 0.0
+                result = {
+                    "size": size,
+                    "stage": stage,
+                    "seconds": seconds,
+                    "rows": rows,
+                    "rows_per_second": rate,
+                    "peak_memory_bytes": peak,
+                }
+                results.append(result)
+
+                peak_str = f"{peak / 1e6:.1f}" if peak is not None else "-"
+                line = f"{size:>9} {stage:<15} {seconds:>9.3f} {rate:>12.0f} {peak_str:>9}"
+                previous = baseline.get((size, stage))
+                if previous:
+                    line += f" {format_change(seconds, previous['seconds']):>12}"
+                print(line, flush=True)
+
+            os.remove(roster_path)
+            _remove_cache(roster_path)
+
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "subjects": args.subjects,
+                "dirty": args.dirty,
+                "repeat": args.repeat,
+                "pdf_limit": args.pdf_limit,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
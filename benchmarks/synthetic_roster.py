@@ -0,0 +1,87 @@
+# benchmarks/synthetic_roster.py
+#
+# Generate synthetic roster CSVs with the same schema as students_scores.csv:
+#   name,class,days_present,days_absent,<subject columns...>
+#
+# Usage (from the project root):
+#   python benchmarks/synthetic_roster.py roster_10k.csv --students 10000 --subjects 8 --dirty 0.01
+
+import argparse
+import csv
+import random
+
+
+SUBJECT_NAMES = [
+    "math", "english", "science", "biology", "chemistry", "physics",
+    "geography", "history", "civic_education", "agriculture",
+    "computer_studies", "french", "fine_art", "music", "economics",
+]
+
+CLASS_NAMES = [f"{level}{arm}" for level in ("JS1", "JS2", "JS3", "SS1", "SS2", "SS3") for arm in "ABC"]
+
+FIRST_NAMES = ["Ada", "Chinedu", "Ngozi", "Emeka", "Amaka", "Tunde", "Bola", "Ifeoma", "Kelechi", "Zainab"]
+LAST_NAMES = ["Okeke", "Obi", "Adeyemi", "Lovelace", "Eze", "Bello", "Nwosu", "Okafor", "Ibrahim", "Uche"]
+
+# Values used for dirty cells: blanks and typical non-numeric entries
+DIRTY_VALUES = ["", "abs", "N/A", "-", "sick"]
+
+TERM_DAYS = 70
+
+
+def subject_columns(num_subjects: int):
+    """Return num_subjects subject column names (numbered once the list runs out)."""
+    columns = SUBJECT_NAMES[:num_subjects]
+    for i in range(len(columns), num_subjects):
+        columns.append(f"subject_{i + 1}")
+    return columns
+
+
+def iter_synthetic_rows(num_students: int, num_subjects: int, dirty_fraction: float = 0.0, seed: int = 0):
+    """
+    Yield CSV rows (lists of strings) for a synthetic roster, header first.
+    Each score cell is replaced by a dirty value with probability dirty_fraction.
+    """
+    rng = random.Random(seed)
+    subjects = subject_columns(num_subjects)
+    yield ["name", "class", "days_present", "days_absent", *subjects]
+
+    for i in range(num_students):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+        days_absent = rng.randint(0, 15)
+        row = [name, rng.choice(CLASS_NAMES), str(TERM_DAYS - days_absent), str(days_absent)]
+        for _ in subjects:
+            if dirty_fraction and rng.random() < dirty_fraction:
+                row.append(rng.choice(DIRTY_VALUES))
+            else:
+                row.append(str(rng.randint(20, 100)))
+        yield row
+
+
+def write_synthetic_roster(
+    filepath: str,
+    num_students: int,
+    num_subjects: int = 8,
+    dirty_fraction: float = 0.0,
+    seed: int = 0,
+) -> None:
+    """Write a synthetic roster CSV to filepath."""
+    with open(filepath, "w", newline="", encoding="utf-8") as f:
+        csv.writer(f).writerows(iter_synthetic_rows(num_students, num_subjects, dirty_fraction, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic roster CSV.")
+    parser.add_argument("output", help="CSV file to write")
+    parser.add_argument("--students", type=int, default=1000, help="number of students (default: 1000)")
+    parser.add_argument("--subjects", type=int, default=8, help="number of subject columns (default: 8)")
+    parser.add_argument("--dirty", type=float, default=0.0,
+                        help="fraction of score cells that are blank or non-numeric (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    args = parser.parse_args()
+
+    write_synthetic_roster(args.output, args.students, args.subjects, args.dirty, args.seed)
+    print(f"Wrote {args.students} students x {args.subjects} subjects to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
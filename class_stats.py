@@ -0,0 +1,291 @@
+# class_stats.py
+
+import math
+import operator
+from array import array
+from itertools import compress, repeat
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import metrics
+from data_io import StudentRecord, parse_row
+from grades_utils import GradingScale, grade_scores, make_student_summary
+from ranking import Rankings, bottom_k, top_k
+from records import StudentSummary
+
+
+class RunningStats:
+    """
+    Count, total, min, max and variance of a stream of numbers, updated
+    one value at a time (variance with Welford's method, which stays
+    accurate without a second pass).
+    """
+
+    __slots__ = ("count", "total", "minimum", "maximum", "_running_mean", "_m2")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self._running_mean = 0.0
+        self._m2 = 0.0
+
+    @classmethod
+    def from_moments(
+        cls, count: int, mean: float, minimum: float, maximum: float, variance: float
+    ) -> "RunningStats":
+        """Statistics computed elsewhere, as if their values had been added one by one."""
+        stats = cls()
+        if count:
+            stats.count = count
+            stats.total = mean * count
+            stats.minimum, stats.maximum = minimum, maximum
+            stats._running_mean = mean
+            stats._m2 = variance * count
+        return stats
+
+    @classmethod
+    def from_values(cls, values: Sequence[float]) -> "RunningStats":
+        """Statistics of a whole column at once (two passes, summed with math.fsum)."""
+        count = len(values)
+        if not count:
+            return cls()
+        mean = math.fsum(values) / count
+        deviations = list(map(operator.sub, values, repeat(mean)))
+        variance = math.fsum(map(operator.mul, deviations, deviations)) / count
+        return cls.from_moments(count, mean, min(values), max(values), variance)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+        delta = value - self._running_mean
+        self._running_mean += delta / self.count
+        self._m2 += delta * (value - self._running_mean)
+
+    def merge(self, other: "RunningStats") -> None:
+        """
+        Fold another RunningStats into this one, as if all of its values had
+        been added here (Chan et al.'s pairwise update for the variance).
+        """
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.total = other.count, other.total
+            self.minimum, self.maximum = other.minimum, other.maximum
+            self._running_mean, self._m2 = other._running_mean, other._m2
+            return
+        count = self.count + other.count
+        delta = other._running_mean - self._running_mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self._running_mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        if other.minimum < self.minimum:
+            self.minimum = other.minimum
+        if other.maximum > self.maximum:
+            self.maximum = other.maximum
+
+    @property
+    def mean(self) -> Optional[float]:
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Population variance (None if empty)."""
+        if self.count == 0:
+            return None
+        return self._m2 / self.count
+
+    @property
+    def stdev(self) -> Optional[float]:
+        variance = self.variance
+        return None if variance is None else math.sqrt(variance)
+
+
+class ClassStatistics:
+    """
+    Statistics for a whole roster, built in a single pass over the rows.
+
+    Holds:
+    - summaries: one StudentSummary per student (see grades_utils.make_student_summary)
+    - cohort: RunningStats over every student's average
+    - classes: RunningStats over student averages, per class
+    - subjects: RunningStats over scores, per subject column
+    - subject_scores: every valid score, per subject column (for percentiles)
+    - best / worst: the summaries with the highest and lowest average
+      (the first one on ties), tracked as students are added
+
+    Grades in the summaries use scale (the default boundaries if None).
+    """
+
+    def __init__(self, scale: Optional[GradingScale] = None):
+        self.scale = scale
+        self.summaries: List[StudentSummary] = []
+        self.cohort = RunningStats()
+        self.classes: Dict[str, RunningStats] = {}
+        self.subjects: Dict[str, RunningStats] = {}
+        self.subject_scores: Dict[str, array] = {}
+        self.best: Optional[StudentSummary] = None
+        self.worst: Optional[StudentSummary] = None
+        self._rankings: Optional[Rankings] = None
+
+    def add_row(self, row: Dict[str, str] | StudentRecord) -> Optional[StudentSummary]:
+        """
+        Add one CSV row (a dict or an already parsed StudentRecord) to the statistics.
+        Returns the student's summary, or None if the row has no scores.
+        """
+        record = parse_row(row)
+        return self.add_student(record.name, record.student_class, record.subject_scores())
+
+    def add_student(self, name: str, student_class: str, subject_scores) -> Optional[StudentSummary]:
+        """
+        Add one student given (subject, score) pairs for their valid scores.
+        Returns the student's summary, or None if there are no scores.
+        """
+        score_values = array("d")
+        subjects = self.subjects
+        for subject, score in subject_scores:
+            score_values.append(score)
+            stats = subjects.get(subject)
+            if stats is None:
+                stats = subjects[subject] = RunningStats()
+                self.subject_scores[subject] = array("d")
+            stats.add(score)
+            self.subject_scores[subject].append(score)
+
+        if not score_values:
+            return None
+
+        summary = make_student_summary(name, score_values, student_class, self.scale)
+        self.summaries.append(summary)
+        self._rankings = None
+
+        average = summary.average
+        if self.best is None or average > self.best.average:
+            self.best = summary
+        if self.worst is None or average < self.worst.average:
+            self.worst = summary
+
+        self.cohort.add(average)
+        self.classes.setdefault(student_class, RunningStats()).add(average)
+        return summary
+
+    @property
+    def num_students(self) -> int:
+        return self.cohort.count
+
+    @property
+    def cohort_average(self) -> Optional[float]:
+        return self.cohort.mean
+
+    def class_average(self, student_class: str) -> Optional[float]:
+        stats = self.classes.get(student_class.strip())
+        return stats.mean if stats else None
+
+    def subject_averages(self) -> Dict[str, float]:
+        return {subject: stats.mean for subject, stats in self.subjects.items()}
+
+    def best_student(self) -> Optional[StudentSummary]:
+        return self.best
+
+    def worst_student(self) -> Optional[StudentSummary]:
+        return self.worst
+
+    def rankings(self) -> Rankings:
+        """Ranks and percentiles per class and subject (built on first use, then cached)."""
+        if self._rankings is None:
+            self._rankings = build_rankings(self)
+        return self._rankings
+
+    def top_students(self, n: int, student_class: Optional[str] = None) -> List[StudentSummary]:
+        """The n students with the highest averages, in the whole roster or one class."""
+        summaries = self.summaries
+        if student_class is not None:
+            summaries = (s for s in summaries if s.student_class == student_class)
+        return top_k(summaries, n, key=lambda s: s.average)
+
+    def bottom_students(self, n: int, student_class: Optional[str] = None) -> List[StudentSummary]:
+        """The n students with the lowest averages, in the whole roster or one class."""
+        summaries = self.summaries
+        if student_class is not None:
+            summaries = (s for s in summaries if s.student_class == student_class)
+        return bottom_k(summaries, n, key=lambda s: s.average)
+
+
+@metrics.timed("class_statistics")
+def build_class_statistics(
+    rows: Iterable[Dict[str, str]],
+    scale: Optional[GradingScale] = None,
+) -> ClassStatistics:
+    """
+    Build ClassStatistics from an iterable of CSV row dicts in one pass.
+    """
+    stats = ClassStatistics(scale)
+    for row in rows:
+        stats.add_row(row)
+    metrics.record("class_statistics", rows=stats.num_students)
+    return stats
+
+
+@metrics.timed("class_statistics")
+def build_class_statistics_from_table(table, scale: Optional[GradingScale] = None) -> ClassStatistics:
+    """
+    Build ClassStatistics from a ScoreTable (e.g. one loaded from the roster
+    cache). Averages, grades and the cohort, class and subject statistics
+    are computed a column at a time; only the summaries are made per student.
+    """
+    stats = ClassStatistics(scale)
+
+    for j, subject in enumerate(table.subjects):
+        values, mask = table.column(j)
+        scores = array("d", compress(values, mask))
+        if scores:
+            stats.subjects[subject] = RunningStats.from_values(scores)
+            stats.subject_scores[subject] = scores
+
+    averages = table.student_averages()
+    cohort = table.cohort_summary(averages)
+    if cohort is None:
+        metrics.record("class_statistics", rows=0)
+        return stats
+
+    grades, _ = grade_scores(averages, scale)
+    names, classes = table.names, table.classes
+    stats.summaries = [
+        StudentSummary(names[i], classes[i], scores, averages[i], grades[i])
+        for i, scores in enumerate(table.student_scores())
+        if scores
+    ]
+
+    # NaN (no valid scores) is the only value not equal to itself
+    stats.cohort = RunningStats.from_values(array("d", compress(averages, map(operator.eq, averages, averages))))
+    stats.classes = {
+        student_class: RunningStats.from_moments(
+            group["count"], group["average"], group["min"], group["max"], group["variance"]
+        )
+        for student_class, group in table.class_rollup(averages).items()
+    }
+    # cohort_summary() picks the first student in roster order on ties, as add_student() does
+    best, worst = cohort["best"], cohort["worst"]
+    stats.best = next(s for s in stats.summaries if s.average == best["average"] and s.name == best["name"])
+    stats.worst = next(s for s in stats.summaries if s.average == worst["average"] and s.name == worst["name"])
+
+    metrics.record("class_statistics", rows=stats.num_students)
+    return stats
+
+
+@metrics.timed("rankings")
+def build_rankings(stats: ClassStatistics) -> Rankings:
+    """Sort the averages and subject scores of a ClassStatistics into a Rankings."""
+    rankings = Rankings(
+        ((summary.student_class, summary.average) for summary in stats.summaries),
+        stats.subject_scores,
+    )
+    metrics.record("rankings", rows=stats.num_students)
+    return rankings
@@ -0,0 +1,447 @@
+# cli.py
+#
+# Non-interactive command-line interface for batch jobs.
+# Each subcommand mirrors one of the menu options 4-10 in main.py.
+#
+# Examples:
+#   python cli.py class-summary --input students_scores.csv
+#   python cli.py report-csv --input students_scores.csv --output report.csv
+#   python cli.py report-csv --grade-boundaries "A:75, B:65, C:55, D:45, E:40"
+#   python cli.py all-pdfs --input students_scores.csv --output-dir reports --workers 8
+#   python cli.py import-db --input students_scores.csv --db roster.db
+#   python cli.py class-summary --input roster.db
+#   python cli.py class-summary --input "rosters/**/*.csv" --workers 8
+#   python cli.py serve --input students_scores.csv --port 8000
+#   python cli.py log-add --log scores.log --name "Ada Obi" --class JS1A --subject math --score 71
+#   python cli.py log-summary --log scores.log --compact --export students_scores.csv
+#   python cli.py history-add --store history --input term1.csv --term 2025-T1 --start 2025-01-06 --end 2025-04-04
+#   python cli.py history-trend --store history --name "Ada Obi"
+
+import argparse
+import sys
+
+import main as tracker
+import metrics
+from grades_utils import GradingScale, parse_grade_boundaries
+from report_io import COMPRESSION_SUFFIXES
+
+
+# Exit codes (argparse itself exits with 2 on bad arguments)
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+
+def _read_comment(args) -> str | None:
+    """Return the comment from --comment or --comment-file (None if neither)."""
+    if getattr(args, "comment_file", None):
+        with open(args.comment_file, encoding="utf-8") as f:
+            return f.read().strip() or None
+    return getattr(args, "comment", None)
+
+
+def _parse_subject(value: str):
+    """Parse a 'Subject=Score' argument into a subject dict."""
+    name, sep, score = value.partition("=")
+    if not sep or not name.strip():
+        raise argparse.ArgumentTypeError(f"expected SUBJECT=SCORE, got '{value}'")
+    try:
+        return {"name": name.strip(), "score": float(score)}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid score in '{value}'")
+
+
+def _parse_grading_scale(value: str) -> GradingScale:
+    """Parse a 'GRADE:MINIMUM, ...' argument into a GradingScale."""
+    try:
+        boundaries = parse_grade_boundaries(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    if not boundaries:
+        raise argparse.ArgumentTypeError("expected at least one GRADE:MINIMUM boundary")
+    return GradingScale(boundaries)
+
+
+def cmd_process(args) -> bool:
+    return tracker.process_students_from_csv(args.input, scale=args.grade_boundaries)
+
+
+def cmd_report_csv(args) -> bool:
+    if args.stream or args.compress or args.shard_by_class:
+        return tracker.generate_report_csv_streaming(
+            args.input,
+            args.output,
+            compression=args.compress,
+            shard_by_class=args.shard_by_class,
+            scale=args.grade_boundaries,
+        )
+    return tracker.generate_report_csv(args.input, args.output, scale=args.grade_boundaries)
+
+
+def cmd_subject_averages(args) -> bool:
+    if args.stream:
+        return tracker.show_subject_averages_streaming(args.input, workers=args.workers)
+    return tracker.show_subject_averages(args.input, workers=args.workers, scale=args.grade_boundaries)
+
+
+def cmd_class_summary(args) -> bool:
+    return tracker.show_class_summary(filepath=args.input, workers=args.workers, scale=args.grade_boundaries)
+
+
+def cmd_rankings(args) -> bool:
+    return tracker.show_rankings(args.input, top_n=args.top)
+
+
+def cmd_manual_pdf(args) -> bool:
+    report_data = tracker.build_report_data_from_scores(
+        args.name,
+        args.student_class,
+        args.subject,
+        args.days_present,
+        args.days_absent,
+        _read_comment(args),
+        scale=args.grade_boundaries,
+    )
+    tracker.write_student_pdf(report_data, args.output_dir)
+    return True
+
+
+def cmd_student_pdf(args) -> bool:
+    return tracker.generate_student_pdf_from_csv(
+        args.input,
+        student_name=args.name,
+        comment=_read_comment(args),
+        output_dir=args.output_dir,
+        interactive=False,
+        scale=args.grade_boundaries,
+    )
+
+
+def cmd_all_pdfs(args) -> bool:
+    return tracker.generate_pdfs_for_all_students_from_csv(
+        workers=args.workers,
+        filepath=args.input,
+        common_comment=_read_comment(args),
+        output_dir=args.output_dir,
+        chunksize=args.chunksize,
+        interactive=False,
+        per_class=args.per_class,
+        pipelined=args.pipeline,
+        writer_threads=args.writer_threads,
+        scale=args.grade_boundaries,
+    )
+
+
+def cmd_incremental(args) -> bool:
+    # Imported here: only this command needs the incremental state machinery
+    from incremental import run_incremental
+
+    return run_incremental(
+        args.input,
+        args.output,
+        output_dir=args.output_dir,
+        comment=_read_comment(args),
+        workers=args.workers,
+        generate_pdfs=not args.no_pdfs,
+        force=args.force,
+        scale=args.grade_boundaries,
+    )
+
+
+def cmd_import_db(args) -> bool:
+    from sqlite_store import open_store
+
+    with open_store(args.db, create=True) as store:
+        count = store.import_csv(args.input, term=args.term)
+    print(f"Imported {count} student(s) from {args.input} into {args.db}")
+    return True
+
+
+def cmd_serve(args) -> bool:
+    # Imported here: the HTTP server modules are only needed by this command
+    from report_server import serve
+
+    return serve(
+        args.input,
+        host=args.host,
+        port=args.port,
+        cache_bytes=args.cache_mb * 1024 * 1024,
+        verbose=args.verbose,
+        scale=args.grade_boundaries,
+    )
+
+
+def cmd_log_add(args) -> bool:
+    # Imported here: only the score log commands need it
+    from score_log import ScoreLog, make_event, read_events_csv
+
+    try:
+        if args.events:
+            events = read_events_csv(args.events)
+        else:
+            events = [make_event(args.name, args.subject, args.score, args.student_class, args.timestamp)]
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return False
+
+    try:
+        log = ScoreLog(args.log)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return False
+
+    with log:
+        applied = log.append_many(events)
+        print(f"Logged {len(events)} event(s) to {args.log}, {applied} applied "
+              f"({len(events) - applied} older than the current score).")
+        aggregates = log.aggregates
+        if len(events) == 1 and applied:
+            event = events[0]
+            student = aggregates.student(event.student)
+            print(f"{student.name} ({student.student_class}) average: {student.average:.2f}")
+            print(f"{student.student_class} class average: {aggregates.class_average(student.student_class):.2f}")
+            print(f"{event.subject} average: {aggregates.subject_average(event.subject):.2f}")
+    return True
+
+
+def cmd_log_summary(args) -> bool:
+    from score_log import ScoreLog, show_score_log_summary
+
+    # A summary only reads the log, so never create one
+    try:
+        log = ScoreLog(args.log, create=False)
+    except FileNotFoundError:
+        print(f"Could not find score log: {args.log}", file=sys.stderr)
+        return False
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return False
+
+    with log:
+        if args.compact:
+            before, after = log.compact()
+            print(f"Compacted {args.log}: {before} -> {after} bytes")
+        if args.export:
+            count = log.export_roster(args.export)
+            print(f"Roster with {count} student(s) written to {args.export}")
+        return show_score_log_summary(log.aggregates)
+
+
+def cmd_history_add(args) -> bool:
+    # Imported here: only the history commands need it
+    from history_store import HistoryStore
+
+    try:
+        store = HistoryStore(args.store, create=True)
+        count = store.add_term(args.input, args.term, args.start, args.end)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return False
+    print(f"Stored {count} student(s) for term {args.term} ({args.start} to {args.end}) in {args.store}")
+    return True
+
+
+def cmd_history_trend(args) -> bool:
+    from date_utils import parse_date
+    from history_store import HistoryStore, show_class_trend, show_student_trend
+
+    for option, value in (("--from", args.start), ("--to", args.end)):
+        if value is None:
+            continue
+        try:
+            parse_date(value)
+        except ValueError as e:
+            print(f"Error: invalid {option} date '{value}' (expected YYYY-MM-DD): {e}", file=sys.stderr)
+            return False
+
+    try:
+        store = HistoryStore(args.store)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return False
+    if args.name:
+        return show_student_trend(store, args.name, args.start, args.end)
+    return show_class_trend(store, args.student_class, args.start, args.end)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Student performance tracker: batch commands (no prompts).",
+    )
+    parser.add_argument("--metrics", action="store_true",
+                        help="print per-stage timings and counters at the end of the run")
+    parser.add_argument("--metrics-file", help="write per-stage metrics as JSON to this file")
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    subparsers.required = True
+
+    def add_command(name: str, func, help_text: str, needs_input: bool = True):
+        sub = subparsers.add_parser(name, help=help_text, description=help_text)
+        if needs_input:
+            sub.add_argument("-i", "--input", default=tracker.DEFAULT_INPUT_CSV,
+                             help=f"roster CSV or SQLite database (.db) (default: {tracker.DEFAULT_INPUT_CSV})")
+        sub.set_defaults(func=func)
+        return sub
+
+    def add_comment_args(sub):
+        group = sub.add_mutually_exclusive_group()
+        group.add_argument("--comment", help="teacher's comment")
+        group.add_argument("--comment-file", help="read the teacher's comment from this file")
+
+    def add_roster_workers_arg(sub):
+        sub.add_argument("-w", "--workers", type=int,
+                         help="processes reading roster files when --input is a directory or glob "
+                              "(default: CPU count)")
+
+    def add_output_dir_arg(sub):
+        sub.add_argument("-o", "--output-dir", help="directory for PDF files (default: current directory)")
+
+    def add_grading_arg(sub):
+        sub.add_argument("--grade-boundaries", type=_parse_grading_scale, metavar="GRADE:MIN,...",
+                         help="minimum average for each grade, e.g. 'A:75, B:65, C:55, D:45, E:40'; "
+                              "anything lower is F (default: A:70, B:60, C:50, D:45, E:40)")
+
+    sub = add_command("process", cmd_process, "Process all students from CSV (menu 4)")
+    add_grading_arg(sub)
+
+    sub = add_command("report-csv", cmd_report_csv, "Generate report CSV (menu 5)")
+    sub.add_argument("-o", "--output", default=tracker.DEFAULT_REPORT_CSV,
+                     help=f"report CSV to write (default: {tracker.DEFAULT_REPORT_CSV})")
+    sub.add_argument("--stream", action="store_true", help="process one row at a time in constant memory")
+    sub.add_argument("--compress", choices=sorted(COMPRESSION_SUFFIXES),
+                     help="compress the report (implies --stream)")
+    sub.add_argument("--shard-by-class", action="store_true",
+                     help="write one report file per class (implies --stream)")
+    add_grading_arg(sub)
+
+    sub = add_command("subject-averages", cmd_subject_averages, "Show subject averages from CSV (menu 6)")
+    sub.add_argument("--stream", action="store_true", help="process one row at a time in constant memory")
+    add_roster_workers_arg(sub)
+    add_grading_arg(sub)
+
+    sub = add_command("class-summary", cmd_class_summary, "Show class summary from CSV (menu 7)")
+    add_roster_workers_arg(sub)
+    add_grading_arg(sub)
+
+    sub = add_command("rankings", cmd_rankings,
+                      "Show per-class and per-subject quartiles and each class's top students")
+    sub.add_argument("--top", type=int, default=3, help="students listed per class (default: 3)")
+
+    sub = add_command("manual-pdf", cmd_manual_pdf,
+                      "Generate a PDF report from scores given on the command line (menu 8)",
+                      needs_input=False)
+    sub.add_argument("--name", required=True, help="student's full name")
+    sub.add_argument("--class", dest="student_class", default="N/A", help="student's class")
+    sub.add_argument("--subject", action="append", type=_parse_subject, required=True,
+                     metavar="SUBJECT=SCORE", help="a subject and its score (repeat for each subject)")
+    sub.add_argument("--days-present", type=int, help="number of days present")
+    sub.add_argument("--days-absent", type=int, help="number of days absent")
+    add_comment_args(sub)
+    add_output_dir_arg(sub)
+    add_grading_arg(sub)
+
+    sub = add_command("student-pdf", cmd_student_pdf, "Generate a PDF report for one student from CSV (menu 9)")
+    sub.add_argument("--name", required=True, help="student's full name as in the CSV")
+    add_comment_args(sub)
+    add_output_dir_arg(sub)
+    add_grading_arg(sub)
+
+    sub = add_command("all-pdfs", cmd_all_pdfs, "Generate PDF reports for all students from CSV (menu 10)")
+    sub.add_argument("-w", "--workers", type=int, help="worker processes (default: CPU count)")
+    sub.add_argument("--chunksize", type=int, help="tasks sent to a worker at a time")
+    sub.add_argument("--per-class", action="store_true",
+                     help="write one multi-page PDF per class instead of one PDF per student")
+    sub.add_argument("--pipeline", action="store_true",
+                     help="stream the roster and overlap parsing, rendering and file writes")
+    sub.add_argument("--writer-threads", type=int, default=tracker.DEFAULT_WRITER_THREADS,
+                     help=f"threads writing PDFs in --pipeline mode (default: {tracker.DEFAULT_WRITER_THREADS})")
+    add_comment_args(sub)
+    add_output_dir_arg(sub)
+    add_grading_arg(sub)
+
+    sub = add_command("incremental", cmd_incremental,
+                      "Update the report CSV and PDFs, redoing only students whose rows changed")
+    sub.add_argument("--output", default=tracker.DEFAULT_REPORT_CSV,
+                     help=f"report CSV to write (default: {tracker.DEFAULT_REPORT_CSV})")
+    sub.add_argument("-w", "--workers", type=int, help="worker processes (default: CPU count)")
+    sub.add_argument("--no-pdfs", action="store_true", help="only update the report CSV")
+    sub.add_argument("--force", action="store_true", help="ignore the saved state and rebuild everything")
+    add_comment_args(sub)
+    add_output_dir_arg(sub)
+    add_grading_arg(sub)
+
+    sub = add_command("import-db", cmd_import_db,
+                      "Import a roster CSV into a SQLite database usable as --input")
+    sub.add_argument("--db", required=True, help="SQLite database to create or update")
+    sub.add_argument("--term", default="", help="term the scores belong to (default: none)")
+
+    sub = add_command("serve", cmd_serve,
+                      "Serve summaries, the report CSV and student PDFs over HTTP from a warm roster")
+    sub.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    sub.add_argument("--port", type=int, default=8000, help="port to listen on (default: 8000)")
+    sub.add_argument("--cache-mb", type=int, default=64,
+                     help="memory for cached PDFs and report CSVs, in MB (default: 64)")
+    sub.add_argument("--verbose", action="store_true", help="log every request")
+    add_grading_arg(sub)
+
+    sub = add_command("log-add", cmd_log_add,
+                      "Append score events to a score log and update its running averages",
+                      needs_input=False)
+    sub.add_argument("--log", required=True, help="score log file (created if missing)")
+    group = sub.add_mutually_exclusive_group(required=True)
+    group.add_argument("--name", help="student's full name (one event)")
+    group.add_argument("--events", help="CSV of events: name, subject, score[, class, timestamp]")
+    sub.add_argument("--class", dest="student_class", help="student's class")
+    sub.add_argument("--subject", help="subject of the score")
+    sub.add_argument("--score", help="the score")
+    sub.add_argument("--timestamp", help="when the score was given (ISO 8601 or epoch seconds; default: now)")
+
+    sub = add_command("log-summary", cmd_log_summary,
+                      "Show class and subject averages from a score log", needs_input=False)
+    sub.add_argument("--log", required=True, help="score log file")
+    sub.add_argument("--compact", action="store_true", help="drop replaced scores from the log first")
+    sub.add_argument("--export", metavar="CSV", help="also write the current scores as a roster CSV")
+
+    sub = add_command("history-add", cmd_history_add,
+                      "Add (or replace) one term's roster CSV in a multi-term history store")
+    sub.add_argument("--store", required=True, help="history store directory (created if missing)")
+    sub.add_argument("--term", required=True, help="term label, e.g. 2025-T1")
+    sub.add_argument("--start", required=True, help="first day of the term (YYYY-MM-DD)")
+    sub.add_argument("--end", required=True, help="last day of the term (YYYY-MM-DD)")
+
+    sub = add_command("history-trend", cmd_history_trend,
+                      "Show a student's trajectory or a class's subject trends across terms",
+                      needs_input=False)
+    sub.add_argument("--store", required=True, help="history store directory")
+    group = sub.add_mutually_exclusive_group(required=True)
+    group.add_argument("--name", help="student's full name")
+    group.add_argument("--class", dest="student_class", help="class whose subject means to follow")
+    sub.add_argument("--from", dest="start", help="only terms starting on or after this date (YYYY-MM-DD)")
+    sub.add_argument("--to", dest="end", help="only terms starting on or before this date (YYYY-MM-DD)")
+
+    return parser
+
+
+def run(argv=None) -> int:
+    """Parse arguments, run the subcommand and return an exit code."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.metrics or args.metrics_file:
+        metrics.enable()
+
+    try:
+        ok = args.func(args)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        ok = False
+
+    if args.metrics:
+        metrics.print_summary()
+    if args.metrics_file:
+        metrics.write_metrics(args.metrics_file, {"command": args.command, "ok": bool(ok)})
+
+    return EXIT_OK if ok else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(run())
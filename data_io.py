@@ -1,9 +1,18 @@
 # data_io.py
 
 import csv
-from typing import List, Dict
+import os
+import sys
+from array import array
+from functools import lru_cache
+from operator import itemgetter
+from typing import List, Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple
 
+import metrics
+from mmap_csv import MappedCSV, open_mapped_csv
 
+
+@metrics.timed("csv_read")
 def read_students_scores_from_csv(filepath: str) -> List[Dict[str, str]]:
     """
     Read student scores from a CSV file.
@@ -14,16 +23,352 @@ def read_students_scores_from_csv(filepath: str) -> List[Dict[str, str]]:
         reader = csv.DictReader(f)
         for row in reader:
             students.append(row)
+    metrics.record("csv_read", rows=len(students))
     return students
 
 
-def find_student_row_by_name(filepath: str, name: str):
+def iter_students_scores_from_csv(filepath: str) -> Iterator[Dict[str, str]]:
+    """
+    Yield student rows from a CSV file one at a time.
+    Same row dicts as read_students_scores_from_csv, without holding the whole file.
+    """
+    with open(filepath, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield row
+
+
+# Columns in the roster CSV that are not subject scores
+METADATA_COLUMNS = ("name", "class", "days_present", "days_absent")
+
+
+class StudentRecord(NamedTuple):
+    """
+    A typed roster row.
+    'subjects' is the same tuple object for every row of a file, so the
+    column names are stored once rather than once per row.
+    Scores are an array('d') in the same order; blank or non-numeric
+    scores are NaN (MISSING_SCORE).
+    """
+    name: str
+    student_class: str
+    days_present: Optional[int]
+    days_absent: Optional[int]
+    subjects: Tuple[str, ...]
+    scores: array
+
+    @property
+    def invalid_cells(self) -> int:
+        """Number of blank or non-numeric score cells."""
+        return sum(1 for score in self.scores if score != score)
+
+    def valid_scores(self) -> array:
+        """The valid scores, in column order."""
+        return array("d", [score for score in self.scores if score == score])
+
+    def subject_scores(self) -> List[Tuple[str, float]]:
+        """(subject, score) pairs for the valid scores, in column order."""
+        return [(subject, score) for subject, score in zip(self.subjects, self.scores) if score == score]
+
+    def as_row(self) -> Dict[str, str]:
+        """
+        The record as a csv.DictReader-style row: column -> string, with ""
+        for unknown attendance and missing scores. Whole-number scores are
+        written without a decimal point ("98"), others with repr().
+        """
+        row = {
+            "name": self.name,
+            "class": self.student_class,
+            "days_present": "" if self.days_present is None else str(self.days_present),
+            "days_absent": "" if self.days_absent is None else str(self.days_absent),
+        }
+        for subject, score in zip(self.subjects, self.scores):
+            if score != score:
+                row[subject] = ""
+            elif score.is_integer():
+                row[subject] = str(int(score))
+            else:
+                row[subject] = repr(score)
+        return row
+
+
+# Stored in StudentRecord.scores for blank or non-numeric cells
+MISSING_SCORE = float("nan")
+
+
+def _to_score(value: str) -> float:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return MISSING_SCORE
+
+
+def _to_int(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class RowSchema:
+    """
+    The column roles of a roster (metadata or subject), resolved once from
+    its header, so each row is converted to a StudentRecord in one pass.
+    Metadata columns are matched case-insensitively; every other column
+    is a subject.
+    """
+
+    def __init__(self, header: Sequence[Optional[str]]):
+        self.header = tuple(header)
+        # None shows up as a key in DictReader rows with extra cells; never a subject
+        lowered = [column.strip().lower() if column is not None else None for column in self.header]
+        self.positions = {column: lowered.index(column) for column in METADATA_COLUMNS if column in lowered}
+        self.subject_positions = tuple(
+            i for i, column in enumerate(lowered) if column is not None and column not in METADATA_COLUMNS
+        )
+        self.subjects = tuple(self.header[i] for i in self.subject_positions)
+        # Original spelling of each metadata column, for dict rows
+        self.keys = {column: self.header[i] for column, i in self.positions.items()}
+
+    def parse(self, row: Sequence[str]) -> StudentRecord:
+        """Convert a list row (in header order), as from csv.reader."""
+        positions = self.positions
+        width = len(row)
+
+        def cell(column: str) -> Optional[str]:
+            i = positions.get(column)
+            return row[i] if i is not None and i < width else None
+
+        return StudentRecord(
+            name=(cell("name") or "Unknown").strip(),
+            student_class=sys.intern((cell("class") or "N/A").strip()),
+            days_present=_to_int(cell("days_present")),
+            days_absent=_to_int(cell("days_absent")),
+            subjects=self.subjects,
+            scores=array("d", [_to_score(row[i]) if i < width else MISSING_SCORE for i in self.subject_positions]),
+        )
+
+    def parse_dict(self, row: Dict[str, str]) -> StudentRecord:
+        """Convert a dict row, as from csv.DictReader."""
+        keys = self.keys
+        get = row.get
+
+        def cell(column: str) -> Optional[str]:
+            key = keys.get(column)
+            return get(key) if key is not None else None
+
+        return StudentRecord(
+            name=(cell("name") or "Unknown").strip(),
+            student_class=sys.intern((cell("class") or "N/A").strip()),
+            days_present=_to_int(cell("days_present")),
+            days_absent=_to_int(cell("days_absent")),
+            subjects=self.subjects,
+            scores=array("d", [_to_score(get(subject)) for subject in self.subjects]),
+        )
+
+
+@lru_cache(maxsize=32)
+def schema_for_header(header: Tuple[Optional[str], ...]) -> RowSchema:
+    """Return the (shared) RowSchema for a header."""
+    return RowSchema(header)
+
+
+def parse_row(row) -> StudentRecord:
+    """
+    Convert a roster row dict to a StudentRecord. Rows with the same keys
+    (e.g. every row of one CSV file) share one cached RowSchema.
+    A StudentRecord is returned unchanged.
+    """
+    if isinstance(row, StudentRecord):
+        return row
+    return schema_for_header(tuple(row)).parse_dict(row)
+
+
+def iter_student_records(
+    filepath: str,
+    columns: Iterable[str] = METADATA_COLUMNS,
+) -> Iterator[StudentRecord]:
+    """
+    Yield a StudentRecord for each row of a roster CSV, one row at a time.
+    Every column other than name, class, days_present and days_absent is a subject.
+
+    The file is scanned through a memory map (see mmap_csv.py), falling
+    back to csv.reader for files the scanner doesn't handle. columns
+    lists the metadata columns the caller needs; on the mapped path the
+    others are not decoded and are None in the records (scores are
+    always read).
+    """
+    mapped = open_mapped_csv(filepath)
+    if mapped is None:
+        records = _iter_records_csv(filepath)
+    else:
+        records = _iter_records_mapped(mapped, frozenset(columns))
+
+    track = metrics.is_enabled()
+    num_rows = 0
+    invalid_cells = 0
+    for record in records:
+        if track:
+            num_rows += 1
+            invalid_cells += record.invalid_cells
+        yield record
+
+    metrics.record("csv_parse", rows=num_rows, invalid_cells=invalid_cells, calls=1)
+
+
+def _iter_records_csv(filepath: str) -> Iterator[StudentRecord]:
+    with open(filepath, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+
+        parse = RowSchema(header).parse
+        for row in reader:
+            if row:
+                yield parse(row)
+
+
+def _iter_records_mapped(mapped: MappedCSV, columns: frozenset) -> Iterator[StudentRecord]:
+    """RowSchema.parse() for rows of bytes fields, decoding only the wanted columns."""
+    with mapped:
+        schema = RowSchema(mapped.header)
+        subjects = schema.subjects
+        subject_positions = schema.subject_positions
+        positions = {column: i for column, i in schema.positions.items() if column in columns}
+        name_i = positions.get("name")
+        class_i = positions.get("class")
+        present_i = positions.get("days_present")
+        absent_i = positions.get("days_absent")
+        # Decoded, interned class name per distinct raw cell
+        class_names: Dict[bytes, str] = {}
+
+        if len(subject_positions) > 1:
+            get_scores = itemgetter(*subject_positions)
+        elif subject_positions:
+            only = subject_positions[0]
+            get_scores = lambda fields: (fields[only],)  # noqa: E731
+        else:
+            get_scores = lambda fields: ()  # noqa: E731
+
+        for fields in mapped.rows():
+            width = len(fields)
+            try:
+                scores = array("d", map(float, get_scores(fields)))
+            except (ValueError, IndexError):
+                # Blank, non-numeric or missing cells: convert one by one
+                scores = array("d", [
+                    _to_score(fields[i]) if i < width else MISSING_SCORE for i in subject_positions
+                ])
+
+            name = student_class = days_present = days_absent = None
+            if name_i is not None:
+                name = ((fields[name_i].decode("utf-8") if name_i < width else "") or "Unknown").strip()
+            if class_i is not None:
+                raw = fields[class_i] if class_i < width else b""
+                student_class = class_names.get(raw)
+                if student_class is None:
+                    student_class = class_names[raw] = sys.intern((raw.decode("utf-8") or "N/A").strip())
+            if present_i is not None:
+                days_present = _to_int(fields[present_i]) if present_i < width else None
+            if absent_i is not None:
+                days_absent = _to_int(fields[absent_i]) if absent_i < width else None
+
+            yield StudentRecord(name, student_class, days_present, days_absent, subjects, scores)
+
+
+# A roster path with one of these suffixes is a database (see sqlite_store.py)
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def is_sqlite_path(filepath: str) -> bool:
+    """True if the path names a SQLite database rather than a CSV file."""
+    return filepath.lower().endswith(SQLITE_SUFFIXES)
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a student name for lookups (trimmed, case-insensitive)."""
+    return (name or "").strip().lower()
+
+
+class RosterIndex:
+    """
+    In-memory index over the students of a roster CSV, held as StudentRecords.
+
+    Records are indexed by normalized name. Names that appear more than once
+    keep all their records, in file order, so duplicates are never lost.
+    A secondary index on class is built the first time it is used.
+    """
+
+    def __init__(self, rows: List[StudentRecord], signature: Optional[Tuple[int, int]] = None):
+        self.rows = rows
+        self.signature = signature
+        self.by_name: Dict[str, List[StudentRecord]] = {}
+        for row in rows:
+            self.by_name.setdefault(normalize_name(row.name), []).append(row)
+        self._by_class: Optional[Dict[str, List[StudentRecord]]] = None
+
+    def find_all(self, name: str) -> List[StudentRecord]:
+        """Return every record whose name matches (case-insensitive)."""
+        return self.by_name.get(normalize_name(name), [])
+
+    def find(self, name: str) -> Optional[StudentRecord]:
+        """
+        Return the first record whose name matches, or None.
+        Prints a warning if the name is not unique in the roster.
+        """
+        matches = self.find_all(name)
+        if not matches:
+            return None
+        if len(matches) > 1:
+            print(f"Warning: {len(matches)} students named '{name.strip()}'. Using the first one.")
+        return matches[0]
+
+    def duplicate_names(self) -> Dict[str, List[StudentRecord]]:
+        """Return the normalized names that appear more than once, with their records."""
+        return {key: rows for key, rows in self.by_name.items() if len(rows) > 1}
+
+    def rows_in_class(self, student_class: str) -> List[StudentRecord]:
+        """Return every record in the given class (case-insensitive)."""
+        if self._by_class is None:
+            self._by_class = {}
+            for row in self.rows:
+                self._by_class.setdefault(normalize_name(row.student_class), []).append(row)
+        return self._by_class.get(normalize_name(student_class), [])
+
+
+# Cached indexes keyed by absolute file path
+_roster_indexes: Dict[str, RosterIndex] = {}
+
+
+def _file_signature(filepath: str) -> Tuple[int, int]:
+    stat = os.stat(filepath)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@metrics.timed("roster_index")
+def get_roster_index(filepath: str) -> RosterIndex:
+    """
+    Return a RosterIndex for the CSV, reusing the cached one if the file's
+    mtime and size have not changed since it was built.
+    Raises FileNotFoundError if the file does not exist.
+    """
+    key = os.path.abspath(filepath)
+    signature = _file_signature(filepath)
+
+    index = _roster_indexes.get(key)
+    if index is None or index.signature != signature:
+        index = RosterIndex(list(iter_student_records(filepath)), signature)
+        _roster_indexes[key] = index
+    return index
+
+
+def find_student_row_by_name(filepath: str, name: str) -> Optional[Dict[str, str]]:
     """
     Find a student row in the CSV by exact name match (case-insensitive).
-    Returns the row dict or None if not found.
+    Returns the row dict or None if not found. Use get_roster_index(filepath)
+    .find(name) to get the StudentRecord itself.
     """
-    rows = read_students_scores_from_csv(filepath)
-    for row in rows:
-        if row.get("name", "").strip().lower() == name.strip().lower():
-            return row
-    return None
+    record = get_roster_index(filepath).find(name)
+    return None if record is None else record.as_row()
+
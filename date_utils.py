@@ -1,6 +1,15 @@
 # date_utils.py
 
+from array import array
 from datetime import datetime as dt, date, timedelta
+from functools import lru_cache
+from typing import Iterable, Optional
+
+DATE_FORMAT = "%Y-%m-%d"
+
+# Stored in the batch arrays for blank or unparseable dates; far outside
+# any real ordinal (1..3652059) or day difference, so it can't collide
+MISSING_DATE = -(2 ** 31)
 
 def get_today_date():
     """Return today's date as a date object."""
@@ -16,23 +25,99 @@ def subtract_days_from_today(days: int) -> date:
     today = get_today_date()
     return today - timedelta(days=days)
 
+@lru_cache(maxsize=4096)
+def parse_date(date_str: str) -> date:
+    """
+    Parse a YYYY-MM-DD date string (surrounding and inner spaces are ignored).
+    Canonical ISO dates take a fast path; results are cached, since rosters
+    repeat the same dates (term boundaries, common birthdates) many times.
+    Raises ValueError for an invalid date.
+    """
+    cleaned = date_str.strip().replace(" ", "")
+    if len(cleaned) == 10 and cleaned[4] == "-" and cleaned[7] == "-":
+        return date.fromisoformat(cleaned)
+    # e.g. '2024-1-5', which strptime accepts but fromisoformat doesn't
+    return dt.strptime(cleaned, DATE_FORMAT).date()
+
 def days_between_dates(date1_str: str, date2_str: str) -> int:
     """
     Return the number of days between two dates given as strings (YYYY-MM-DD).
     Result can be negative if date1 < date2.
     """
-    date_format = "%Y-%m-%d"
-    date1 = dt.strptime(date1_str.strip().replace(" ", ""), date_format).date()
-    date2 = dt.strptime(date2_str.strip().replace(" ", ""), date_format).date()
-    difference = date1 - date2
+    difference = parse_date(date1_str) - parse_date(date2_str)
     return difference.days
 
-def calculate_age_in_days(birthdate_str: str) -> int:
+def calculate_age_in_days(birthdate_str: str, as_of: Optional[date] = None) -> int:
     """
     Return how many days old someone is, given their birthdate (YYYY-MM-DD).
+    The age is taken on as_of (default: today).
     """
-    date_format = "%Y-%m-%d"
-    birthdate = dt.strptime(birthdate_str.strip().replace(" ", ""), date_format).date()
-    today = get_today_date()
+    birthdate = parse_date(birthdate_str)
+    today = as_of if as_of is not None else get_today_date()
     age_delta = today - birthdate
     return age_delta.days
+
+# ---------- BATCH API (whole columns of dates at once) ----------
+
+def to_ordinals(date_strs: Iterable[Optional[str]]) -> array:
+    """
+    Parse many date strings into an array of day ordinals (date.toordinal()).
+    Blank, None or invalid dates become MISSING_DATE.
+    """
+    ordinals = array("l")
+    append = ordinals.append
+    for value in date_strs:
+        if not value:
+            append(MISSING_DATE)
+            continue
+        try:
+            append(parse_date(value).toordinal())
+        except ValueError:
+            append(MISSING_DATE)
+    return ordinals
+
+def days_between_many(ordinals1: array, ordinals2: array) -> array:
+    """
+    Element-wise ordinals1 - ordinals2 in days, as an array
+    (MISSING_DATE where either date is missing).
+    """
+    if len(ordinals1) != len(ordinals2):
+        raise ValueError("ordinal arrays must have the same length")
+    return array("l", [
+        a - b if a != MISSING_DATE and b != MISSING_DATE else MISSING_DATE
+        for a, b in zip(ordinals1, ordinals2)
+    ])
+
+def days_since(date_strs: Iterable[Optional[str]], as_of: Optional[date] = None) -> array:
+    """
+    Days from each date to as_of (default: today, looked up once for the
+    whole batch so every row uses the same day). Missing dates give
+    MISSING_DATE.
+    """
+    reference = (as_of if as_of is not None else get_today_date()).toordinal()
+    return array("l", [
+        reference - ordinal if ordinal != MISSING_DATE else MISSING_DATE
+        for ordinal in to_ordinals(date_strs)
+    ])
+
+def ages_in_days(birthdate_strs: Iterable[Optional[str]], as_of: Optional[date] = None) -> array:
+    """Batch calculate_age_in_days(): one age per birthdate, all taken on the same as_of day."""
+    return days_since(birthdate_strs, as_of)
+
+def days_in_window(
+    start_strs: Iterable[Optional[str]],
+    window_start: str,
+    window_end: str,
+) -> array:
+    """
+    For each start date (e.g. an enrollment date), the number of days from
+    max(start, window_start) to window_end inclusive, i.e. how many days of
+    a term window the student could attend. 0 if they start after the
+    window; MISSING_DATE for missing dates.
+    """
+    first = parse_date(window_start).toordinal()
+    last = parse_date(window_end).toordinal()
+    return array("l", [
+        max(0, last - max(ordinal, first) + 1) if ordinal != MISSING_DATE else MISSING_DATE
+        for ordinal in to_ordinals(start_strs)
+    ])
@@ -1,6 +1,17 @@
 # grades_utils.py
 
-from typing import List
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import metrics
+from records import StudentSummary
+
+
+# Default boundaries as (minimum score, grade), highest first.
+# Anything below the last boundary gets DEFAULT_FAIL_GRADE.
+DEFAULT_GRADE_BOUNDARIES = [(70, "A"), (60, "B"), (50, "C"), (45, "D"), (40, "E")]
+DEFAULT_FAIL_GRADE = "F"
 
 def calculate_average(scores: List[float]) -> float:
     """
@@ -11,11 +22,14 @@ def calculate_average(scores: List[float]) -> float:
         return 0.0
     return sum(scores) / len(scores)
 
-def get_grade(score: float) -> str:
+def get_grade(score: float, scale: Optional["GradingScale"] = None) -> str:
     """
     Return a letter grade based on the numeric score.
-    Adjust the boundaries to match your school’s grading system.
+    Pass a GradingScale to use your school's boundaries instead of the
+    default 70/60/50/45/40.
     """
+    if scale is not None:
+        return scale.grade(score)
     if score >= 70:
         return "A"
     elif score >= 60:
@@ -29,17 +43,108 @@ def get_grade(score: float) -> str:
     else:
         return "F"
 
-def calculate_student_summary(name: str, scores: List[float]) -> dict:
+class GradingScale:
+    """
+    A school's grade boundaries, for grading one score or many.
+
+    Each score is graded with one binary search (bisect) over the sorted
+    thresholds. grade_many still visits the scores one at a time: the
+    stdlib has no array-wide searchsorted, and mapping bisect over the
+    whole column measured no faster than the loop.
+    """
+
+    def __init__(
+        self,
+        boundaries: Sequence[Tuple[float, str]] = DEFAULT_GRADE_BOUNDARIES,
+        fail_grade: str = DEFAULT_FAIL_GRADE,
+    ):
+        ordered = sorted(boundaries, key=lambda b: b[0])
+        self.thresholds = [float(minimum) for minimum, _ in ordered]
+        # letters[i] is the grade for a score with i thresholds at or below it
+        self.letters = [fail_grade] + [grade for _, grade in ordered]
+
+    def grade(self, score: float) -> str:
+        return self.letters[bisect_right(self.thresholds, score)]
+
+    def index(self, score: float) -> int:
+        """Position of score's grade in letters (0 is the fail grade)."""
+        return bisect_right(self.thresholds, score)
+
+    def grade_many(self, scores: Iterable[float]) -> Tuple[List[Optional[str]], Dict[str, int]]:
+        """
+        Grade every score, counting the grades as it goes.
+        Returns (grades, histogram) where histogram counts students per grade.
+        NaN scores (students with no valid scores) get None and are not counted.
+        """
+        thresholds = self.thresholds
+        letters = self.letters
+        counts = [0] * len(letters)
+        grades: List[Optional[str]] = []
+
+        for score in scores:
+            if score != score:  # NaN
+                grades.append(None)
+                continue
+            i = bisect_right(thresholds, score)
+            counts[i] += 1
+            grades.append(letters[i])
+
+        histogram = {letter: 0 for letter in reversed(letters)}
+        for letter, count in zip(letters, counts):
+            histogram[letter] += count
+        return grades, histogram
+
+
+def parse_grade_boundaries(boundaries_str: str) -> List[Tuple[float, str]]:
+    """
+    Parse grade boundaries from a string such as 'A:75, B:65, C:55, D:45, E:40'.
+    Raises ValueError if an entry is not in GRADE:MINIMUM form.
+    """
+    boundaries: List[Tuple[float, str]] = []
+    for part in boundaries_str.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        grade, _, minimum = part.partition(":")
+        try:
+            if not grade.strip():
+                raise ValueError
+            boundaries.append((float(minimum), grade.strip()))
+        except ValueError:
+            raise ValueError(f"Invalid grade boundary '{part}', expected GRADE:MINIMUM") from None
+    return boundaries
+
+
+DEFAULT_GRADING_SCALE = GradingScale()
+
+
+@metrics.timed("grading")
+def grade_scores(
+    scores: Iterable[float],
+    scale: Optional[GradingScale] = None,
+) -> Tuple[List[Optional[str]], Dict[str, int]]:
+    """
+    Grade many averages at once with the given scale (default boundaries if None).
+    Returns (grades, histogram).
+    """
+    if scale is None:
+        scale = DEFAULT_GRADING_SCALE
+    grades, histogram = scale.grade_many(scores)
+    metrics.record("grading", rows=len(grades))
+    return grades, histogram
+
+
+def calculate_student_summary(name: str, scores: List[float], scale: Optional[GradingScale] = None) -> dict:
     """
     Given a student's name and a list of scores,
     return a summary dictionary with:
     - name
     - scores
     - average
-    - grade
+    - grade (from scale, or the default boundaries if None)
     """
     avg = calculate_average(scores)
-    grade = get_grade(avg)
+    grade = get_grade(avg, scale)
     return {
         "name": name,
         "scores": scores,
@@ -47,6 +152,21 @@ def calculate_student_summary(name: str, scores: List[float]) -> dict:
         "grade": grade,
     }
 
+def make_student_summary(
+    name: str,
+    scores: Iterable[float],
+    student_class: str = "N/A",
+    scale: Optional[GradingScale] = None,
+) -> StudentSummary:
+    """
+    Compact form of calculate_student_summary() for rosters held in memory:
+    a StudentSummary with the scores in an array('d').
+    """
+    if not isinstance(scores, array):
+        scores = array("d", scores)
+    avg = calculate_average(scores)
+    return StudentSummary(name, student_class, scores, avg, get_grade(avg, scale))
+
 def parse_scores_input(scores_str: str) -> List[float]:
     """
     Parse a comma-separated string of scores into a list of floats.
@@ -0,0 +1,492 @@
+# history_store.py
+#
+# Scores across many terms, for per-student trajectories and per-class
+# subject trends without re-reading every historical roster CSV.
+#
+# A history store is a directory:
+#   index.json       terms (label, start and end date, row count), sorted
+#                    by start date, and the student names by id
+#   term-NNNN.bin    one roster per term, in the roster cache layout:
+#                    MAGIC, 4-byte header length, JSON header, then raw
+#                    arrays of student ids, class numbers, attendance and
+#                    the rows x subjects score matrix (NaN = missing).
+#                    Rows are sorted by class, so a class is one slice.
+#   students.idx     per-student offsets: for student i, the (term, row)
+#                    pairs in postings[offsets[i]:offsets[i + 1]]
+#
+# A student's trend reads one score row from each term they appear in;
+# a class trend reads that class's slice from each term in the date
+# range. Other terms, classes and students are never read.
+
+import json
+import math
+import os
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import metrics
+from data_io import iter_student_records, normalize_name
+from date_utils import parse_date
+from score_table import MISSING_DAYS
+
+TERM_MAGIC = b"SPTTERM1\n"
+POSTINGS_MAGIC = b"SPTPOST1\n"
+INDEX_FILE = "index.json"
+POSTINGS_FILE = "students.idx"
+INDEX_VERSION = 2
+
+# Array typecodes: 4-byte student ids, row numbers and attendance, 2-byte
+# class numbers and term ids, and 8-byte scores so the stored values
+# equal the CSV's exactly. A term file is about as large as its CSV (with
+# short score strings the CSV can be smaller); the gain is that a query
+# reads single rows or class slices instead of parsing whole files.
+_ID, _CLASS, _DAYS, _TERM, _SCORE, _OFFSET = "i", "H", "i", "H", "d", "q"
+_ITEMSIZES = {code: array(code).itemsize for code in (_ID, _CLASS, _DAYS, _SCORE, _OFFSET)}
+_DAYS_MAX = 2 ** (8 * _ITEMSIZES[_DAYS] - 1) - 1
+
+# Slopes are reported in points per year
+_DAYS_PER_YEAR = 365.25
+
+
+class TermInfo(NamedTuple):
+    term_id: int
+    term: str
+    start: str  # YYYY-MM-DD
+    end: str
+    num_rows: int
+
+    @property
+    def start_ordinal(self) -> int:
+        return parse_date(self.start).toordinal()
+
+    @property
+    def end_ordinal(self) -> int:
+        return parse_date(self.end).toordinal()
+
+
+class TermScores(NamedTuple):
+    """One student's scores in one term."""
+    term: TermInfo
+    student_class: str
+    subjects: Tuple[str, ...]
+    scores: array  # NaN where the student has no valid score
+
+    @property
+    def average(self) -> Optional[float]:
+        valid = [score for score in self.scores if score == score]
+        return sum(valid) / len(valid) if valid else None
+
+    def score_map(self) -> Dict[str, float]:
+        return {subject: score for subject, score in zip(self.subjects, self.scores) if score == score}
+
+
+def _write_atomic(path: str, chunks) -> int:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for chunk in chunks:
+            if isinstance(chunk, array):
+                chunk.tofile(f)
+            else:
+                f.write(chunk)
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return size
+
+
+def _header_chunks(magic: bytes, header: Dict) -> List[bytes]:
+    header_bytes = json.dumps(header).encode("utf-8")
+    return [magic, struct.pack("<I", len(header_bytes)), header_bytes]
+
+
+def _read_header(f, magic: bytes) -> Tuple[Dict, int]:
+    """Read a MAGIC + length + JSON header; returns (header, offset of the data after it)."""
+    if f.read(len(magic)) != magic:
+        raise ValueError(f"{f.name} is not a history store file")
+    (header_len,) = struct.unpack("<I", f.read(4))
+    header = json.loads(f.read(header_len).decode("utf-8"))
+    return header, len(magic) + 4 + header_len
+
+
+def _check_itemsizes(path: str, header: Dict) -> None:
+    if header.get("itemsizes") != _ITEMSIZES:
+        raise ValueError(f"{path} was written with different array item sizes")
+
+
+def _read_array(f, typecode: str, offset: int, count: int) -> array:
+    values = array(typecode)
+    if count:
+        f.seek(offset)
+        values.frombytes(f.read(count * values.itemsize))
+    return values
+
+
+class _TermFile:
+    """Section offsets of one term file, from its header."""
+
+    __slots__ = ("path", "header", "subjects", "class_names", "ids_at", "classes_at",
+                 "present_at", "absent_at", "scores_at", "num_rows")
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            header, data_start = _read_header(f, TERM_MAGIC)
+        self.header = header
+        self.subjects = tuple(header["subjects"])
+        self.class_names = header["class_names"]
+        _check_itemsizes(path, header)
+        self.num_rows = n = header["num_rows"]
+        self.ids_at = data_start
+        self.classes_at = self.ids_at + n * _ITEMSIZES[_ID]
+        self.present_at = self.classes_at + n * _ITEMSIZES[_CLASS]
+        self.absent_at = self.present_at + n * _ITEMSIZES[_DAYS]
+        self.scores_at = self.absent_at + n * _ITEMSIZES[_DAYS]
+
+    def class_slice(self, student_class: str) -> Optional[Tuple[int, int]]:
+        rows = self.header["class_rows"].get(student_class)
+        return tuple(rows) if rows else None
+
+
+class HistoryStore:
+    """
+    A directory of term rosters plus per-student offsets into them
+    (see the module comment). Raises FileNotFoundError when opening a
+    store that does not exist, unless create=True.
+    """
+
+    def __init__(self, directory: str, create: bool = False):
+        self.directory = directory
+        index_path = os.path.join(directory, INDEX_FILE)
+        if not os.path.exists(index_path):
+            if not create:
+                raise FileNotFoundError(index_path)
+            os.makedirs(directory, exist_ok=True)
+            self._index = {"version": INDEX_VERSION, "next_term_id": 1, "students": [], "terms": []}
+            self._save_index()
+        with open(index_path, encoding="utf-8") as f:
+            self._index = json.load(f)
+        if self._index.get("version") != INDEX_VERSION:
+            raise ValueError(f"{directory} was written by another version of the history store; "
+                             "add its terms to a new store")
+
+        self.terms: List[TermInfo] = [TermInfo(**term) for term in self._index["terms"]]
+        self._starts = [term.start_ordinal for term in self.terms]
+        self.students: List[str] = self._index["students"]
+        self._student_ids = {normalize_name(name): i for i, name in enumerate(self.students)}
+        self._term_files: Dict[int, _TermFile] = {}
+        self._postings: Optional[Tuple[array, array, array]] = None
+
+    # ---------- paths and index ----------
+
+    def _term_path(self, term_id: int) -> str:
+        return os.path.join(self.directory, f"term-{term_id:04d}.bin")
+
+    def _term_file(self, term_id: int) -> _TermFile:
+        term_file = self._term_files.get(term_id)
+        if term_file is None:
+            term_file = self._term_files[term_id] = _TermFile(self._term_path(term_id))
+        return term_file
+
+    def _save_index(self) -> None:
+        data = json.dumps(self._index, indent=1).encode("utf-8")
+        _write_atomic(os.path.join(self.directory, INDEX_FILE), [data])
+
+    # ---------- terms by date ----------
+
+    def term_at(self, date_str: str) -> Optional[TermInfo]:
+        """The term whose start..end range contains the date, or None."""
+        ordinal = parse_date(date_str).toordinal()
+        i = bisect_right(self._starts, ordinal) - 1
+        if i >= 0 and ordinal <= self.terms[i].end_ordinal:
+            return self.terms[i]
+        return None
+
+    def terms_between(self, start: Optional[str] = None, end: Optional[str] = None) -> List[TermInfo]:
+        """Terms starting between start and end (inclusive; None = unbounded), in date order."""
+        lo = bisect_left(self._starts, parse_date(start).toordinal()) if start else 0
+        hi = bisect_right(self._starts, parse_date(end).toordinal()) if end else len(self.terms)
+        return self.terms[lo:hi]
+
+    # ---------- ingest ----------
+
+    @metrics.timed("history_ingest")
+    def add_term(self, csv_path: str, term: str, start: str, end: str) -> int:
+        """
+        Store a term's roster CSV under the label term, for the dates
+        start..end (YYYY-MM-DD). A term with the same label is replaced;
+        a date range overlapping another term raises ValueError.
+        Returns the number of students stored.
+        """
+        start_date, end_date = parse_date(start), parse_date(end)
+        if end_date < start_date:
+            raise ValueError(f"term {term} ends ({end}) before it starts ({start})")
+        start, end = start_date.isoformat(), end_date.isoformat()
+        for other in self.terms:
+            if other.term != term and other.start_ordinal <= end_date.toordinal() \
+                    and start_date.toordinal() <= other.end_ordinal:
+                raise ValueError(f"term {term} ({start}..{end}) overlaps {other.term} ({other.start}..{other.end})")
+
+        records = list(iter_student_records(csv_path, columns=("name", "class", "days_present", "days_absent")))
+        subjects = records[0].subjects if records else ()
+        for row_number, record in enumerate(records, start=1):
+            for days in (record.days_present, record.days_absent):
+                if days is not None and not -_DAYS_MAX <= days <= _DAYS_MAX:
+                    raise ValueError(f"{csv_path}, row {row_number}: attendance {days} is out of range")
+
+        # Sort rows by class (then student id) so each class is one slice
+        rows = sorted(
+            ((record.student_class, self._student_id(record.name), record) for record in records),
+            key=lambda row: (row[0], row[1]),
+        )
+        class_names: List[str] = []
+        class_rows: Dict[str, List[int]] = {}
+        ids, class_numbers = array(_ID), array(_CLASS)
+        present, absent, scores = array(_DAYS), array(_DAYS), array(_SCORE)
+        for i, (student_class, student_id, record) in enumerate(rows):
+            if student_class not in class_rows:
+                class_rows[student_class] = [i, i]
+                class_names.append(student_class)
+            class_rows[student_class][1] = i + 1
+            ids.append(student_id)
+            class_numbers.append(len(class_names) - 1)
+            present.append(MISSING_DAYS if record.days_present is None else record.days_present)
+            absent.append(MISSING_DAYS if record.days_absent is None else record.days_absent)
+            scores.extend(record.scores)
+
+        replaced = [info for info in self.terms if info.term == term]
+        term_id = self._index["next_term_id"]
+        self._index["next_term_id"] = term_id + 1
+
+        header = {
+            "term": term,
+            "start": start,
+            "end": end,
+            "subjects": list(subjects),
+            "class_names": class_names,
+            "class_rows": class_rows,
+            "num_rows": len(rows),
+            "itemsizes": _ITEMSIZES,
+        }
+        size = _write_atomic(
+            self._term_path(term_id),
+            _header_chunks(TERM_MAGIC, header) + [ids, class_numbers, present, absent, scores],
+        )
+
+        terms = [info for info in self.terms if info.term != term]
+        terms.append(TermInfo(term_id, term, start, end, len(rows)))
+        terms.sort(key=lambda info: info.start_ordinal)
+        self._index["terms"] = [info._asdict() for info in terms]
+        self._index["students"] = self.students
+        self.terms = terms
+        self._starts = [info.start_ordinal for info in terms]
+
+        self._rebuild_postings()
+        self._save_index()
+        for info in replaced:
+            self._term_files.pop(info.term_id, None)
+            os.remove(self._term_path(info.term_id))
+
+        metrics.record("history_ingest", rows=len(rows), bytes_written=size)
+        return len(rows)
+
+    def _student_id(self, name: str) -> int:
+        key = normalize_name(name)
+        student_id = self._student_ids.get(key)
+        if student_id is None:
+            student_id = self._student_ids[key] = len(self.students)
+            self.students.append(name)
+        return student_id
+
+    def _rebuild_postings(self) -> None:
+        """Rewrite students.idx from the student ids of every term (in date order)."""
+        per_student: List[List[Tuple[int, int]]] = [[] for _ in self.students]
+        for info in self.terms:
+            term_file = self._term_file(info.term_id)
+            with open(term_file.path, "rb") as f:
+                ids = _read_array(f, _ID, term_file.ids_at, term_file.num_rows)
+            for row, student_id in enumerate(ids):
+                per_student[student_id].append((info.term_id, row))
+
+        offsets, term_ids, rows = array(_OFFSET, [0]), array(_TERM), array(_ID)
+        for postings in per_student:
+            for term_id, row in postings:
+                term_ids.append(term_id)
+                rows.append(row)
+            offsets.append(len(term_ids))
+
+        header = {"num_students": len(self.students), "num_postings": len(term_ids),
+                  "itemsizes": _ITEMSIZES}
+        _write_atomic(
+            os.path.join(self.directory, POSTINGS_FILE),
+            _header_chunks(POSTINGS_MAGIC, header) + [offsets, term_ids, rows],
+        )
+        self._postings = (offsets, term_ids, rows)
+
+    def _load_postings(self) -> Tuple[array, array, array]:
+        if self._postings is None:
+            with open(os.path.join(self.directory, POSTINGS_FILE), "rb") as f:
+                header, data_start = _read_header(f, POSTINGS_MAGIC)
+                _check_itemsizes(f.name, header)
+                n, p = header["num_students"], header["num_postings"]
+                term_ids_at = data_start + (n + 1) * _ITEMSIZES[_OFFSET]
+                rows_at = term_ids_at + p * _ITEMSIZES[_TERM]
+                offsets = _read_array(f, _OFFSET, data_start, n + 1)
+                term_ids = _read_array(f, _TERM, term_ids_at, p)
+                rows = _read_array(f, _ID, rows_at, p)
+            self._postings = (offsets, term_ids, rows)
+        return self._postings
+
+    # ---------- queries ----------
+
+    def display_name(self, name: str) -> Optional[str]:
+        """The name as first stored for a student (lookups are case-insensitive), or None."""
+        student_id = self._student_ids.get(normalize_name(name))
+        return None if student_id is None else self.students[student_id]
+
+    @metrics.timed("history_query")
+    def student_history(self, name: str, start: Optional[str] = None, end: Optional[str] = None) -> List[TermScores]:
+        """
+        A student's scores in every term they appear in (starting between
+        start and end, if given), in date order. Reads one row per term.
+        If a name appears twice in one term, only one of the rows is used.
+        """
+        student_id = self._student_ids.get(normalize_name(name))
+        if student_id is None:
+            return []
+        offsets, term_ids, rows = self._load_postings()
+        wanted = {info.term_id: info for info in self.terms_between(start, end)}
+
+        history: List[TermScores] = []
+        seen = set()
+        for k in range(offsets[student_id], offsets[student_id + 1]):
+            info = wanted.get(term_ids[k])
+            if info is None or info.term_id in seen:
+                continue
+            seen.add(info.term_id)
+            term_file = self._term_file(info.term_id)
+            width = len(term_file.subjects)
+            row = rows[k]
+            with open(term_file.path, "rb") as f:
+                class_number = _read_array(f, _CLASS, term_file.classes_at + row * _ITEMSIZES[_CLASS], 1)[0]
+                scores = _read_array(f, _SCORE, term_file.scores_at + row * width * _ITEMSIZES[_SCORE], width)
+            history.append(TermScores(info, term_file.class_names[class_number], term_file.subjects, scores))
+
+        history.sort(key=lambda point: point.term.start_ordinal)
+        metrics.record("history_query", rows=len(history))
+        return history
+
+    @metrics.timed("history_query")
+    def class_history(
+        self,
+        student_class: str,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[Tuple[TermInfo, int, Dict[str, float]]]:
+        """
+        (term, students, {subject: mean score}) for one class in every term
+        (starting between start and end) where it exists, in date order.
+        Reads only the class's rows from each term.
+        """
+        history = []
+        for info in self.terms_between(start, end):
+            term_file = self._term_file(info.term_id)
+            rows = term_file.class_slice(student_class)
+            if rows is None:
+                continue
+            first, stop = rows
+            width = len(term_file.subjects)
+            with open(term_file.path, "rb") as f:
+                scores = _read_array(
+                    f, _SCORE, term_file.scores_at + first * width * _ITEMSIZES[_SCORE], (stop - first) * width
+                )
+            means = {}
+            for j, subject in enumerate(term_file.subjects):
+                column = [score for score in scores[j::width] if score == score]
+                if column:
+                    means[subject] = math.fsum(column) / len(column)
+            history.append((info, stop - first, means))
+        metrics.record("history_query", rows=len(history))
+        return history
+
+
+# ---------- trends ----------
+
+def slope_per_year(points: List[Tuple[int, float]]) -> Optional[float]:
+    """
+    Least-squares slope of (date ordinal, value) points, in value units
+    per year. None with fewer than two distinct dates.
+    """
+    if len(points) < 2:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    if sxx == 0:
+        return None
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    return sxy / sxx * _DAYS_PER_YEAR
+
+
+def subject_slopes(series: List[Tuple[TermInfo, Dict[str, float]]]) -> Dict[str, Optional[float]]:
+    """Per-subject slope (points per year) over a date-ordered series of {subject: value}."""
+    points: Dict[str, List[Tuple[int, float]]] = {}
+    for info, values in series:
+        for subject, value in values.items():
+            points.setdefault(subject, []).append((info.start_ordinal, value))
+    return {subject: slope_per_year(subject_points) for subject, subject_points in points.items()}
+
+
+def _format_slope(slope: Optional[float]) -> str:
+    return "n/a" if slope is None else f"{slope:+.2f}/yr"
+
+
+def show_student_trend(store: HistoryStore, name: str, start: Optional[str] = None, end: Optional[str] = None) -> bool:
+    """Print a student's average per term, term-over-term changes and per-subject slopes."""
+    print("\n=== STUDENT TREND ===")
+    history = store.student_history(name, start, end)
+    if not history:
+        print(f"No terms found for student '{name}'.")
+        return False
+
+    print(f"\n--- {store.display_name(name)} ---")
+    print(f"{'term':<12} {'start':<10}  {'class':<8} {'average':>8} {'change':>8}")
+    previous = None
+    for point in history:
+        average = point.average
+        change = "" if previous is None or average is None else f"{average - previous:+.2f}"
+        shown = "-" if average is None else f"{average:.2f}"
+        print(f"{point.term.term:<12} {point.term.start:<10}  {point.student_class:<8} {shown:>8} {change:>8}")
+        if average is not None:
+            previous = average
+
+    print("\n--- Subject trends ---")
+    slopes = subject_slopes([(point.term, point.score_map()) for point in history])
+    for subject, slope in slopes.items():
+        print(f"{subject}: {_format_slope(slope)}")
+    print()
+    return True
+
+
+def show_class_trend(store: HistoryStore, student_class: str, start: Optional[str] = None, end: Optional[str] = None) -> bool:
+    """Print a class's subject means per term and the subjects sorted by slope (steepest decline first)."""
+    print("\n=== CLASS SUBJECT TRENDS ===")
+    history = store.class_history(student_class, start, end)
+    if not history:
+        print(f"No terms found for class '{student_class}'.")
+        return False
+
+    subjects = list(dict.fromkeys(subject for _, _, means in history for subject in means))
+    print(f"\n--- {student_class} ---")
+    print(f"{'term':<12} {'n':>5} " + " ".join(f"{subject[:9]:>9}" for subject in subjects))
+    for info, count, means in history:
+        cells = " ".join(f"{means[s]:>9.2f}" if s in means else f"{'-':>9}" for s in subjects)
+        print(f"{info.term:<12} {count:>5} {cells}")
+
+    print("\n--- Subject trends (steepest decline first) ---")
+    slopes = subject_slopes([(info, means) for info, _, means in history])
+    for subject, slope in sorted(slopes.items(), key=lambda item: math.inf if item[1] is None else item[1]):
+        print(f"{subject}: {_format_slope(slope)}")
+    print()
+    return True
@@ -0,0 +1,316 @@
+# incremental.py
+#
+# Incremental report runs: only students whose rows changed since the last
+# run are re-summarised, class/subject aggregates are updated by delta,
+# and only PDFs whose inputs changed are re-rendered.
+#
+# State from the previous run is kept in '<roster>.state.json'.
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import main as tracker
+from batch_pdf import generate_pdfs_in_parallel
+from data_io import iter_students_scores_from_csv, normalize_name, parse_row
+from grades_utils import DEFAULT_GRADING_SCALE, GradingScale, calculate_student_summary
+from ranking import Rankings
+from report_io import write_student_summaries_bulk
+
+
+STATE_VERSION = 1
+STATE_SUFFIX = ".state.json"
+
+
+def state_path_for(filepath: str) -> str:
+    return filepath + STATE_SUFFIX
+
+
+def row_fingerprint(row: Dict[str, str]) -> str:
+    """Return a stable fingerprint of a CSV row's contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    for key, value in row.items():
+        digest.update(f"{key}\x1f{value}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class Aggregates:
+    """
+    Sums and counts that can be updated by delta: student averages for
+    the whole cohort and per class, and scores per subject.
+    (Min/max can't be maintained this way when students are removed,
+    so they are not kept here.)
+    """
+
+    def __init__(self, data: Optional[Dict] = None):
+        data = data or {}
+        self.cohort: List[float] = data.get("cohort", [0.0, 0])
+        self.classes: Dict[str, List[float]] = data.get("classes", {})
+        self.subjects: Dict[str, List[float]] = data.get("subjects", {})
+        self._rankings: Optional[Rankings] = None
+
+    def to_dict(self) -> Dict:
+        return {"cohort": self.cohort, "classes": self.classes, "subjects": self.subjects}
+
+    @staticmethod
+    def _update(bucket: List[float], value: float, sign: int) -> None:
+        bucket[0] += sign * value
+        bucket[1] += sign
+
+    def apply(self, entry: Dict, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one student's contribution."""
+        summary = entry["summary"]
+        self._update(self.cohort, summary["average"], sign)
+        self._update(self.classes.setdefault(summary["student_class"], [0.0, 0]), summary["average"], sign)
+        for subject, score in entry["subject_scores"]:
+            self._update(self.subjects.setdefault(subject, [0.0, 0]), score, sign)
+
+    @staticmethod
+    def _mean(bucket: Optional[List[float]]) -> Optional[float]:
+        if not bucket or bucket[1] <= 0:
+            return None
+        return bucket[0] / bucket[1]
+
+    # Same interface as ClassStatistics, so build_report_data_from_row accepts it
+    @property
+    def cohort_average(self) -> Optional[float]:
+        return self._mean(self.cohort)
+
+    def class_average(self, student_class: str) -> Optional[float]:
+        return self._mean(self.classes.get(student_class.strip()))
+
+    def subject_averages(self) -> Dict[str, Optional[float]]:
+        return {subject: self._mean(bucket) for subject, bucket in self.subjects.items()}
+
+    def rank_entries(self, entries: Iterable[Dict]) -> None:
+        """
+        Build the rankings from every current entry. Ranks can't be updated
+        by delta, but sorting the stored averages is cheap next to parsing.
+        """
+        students = []
+        subject_scores: Dict[str, List[float]] = {}
+        for entry in entries:
+            summary = entry["summary"]
+            if summary is None:
+                continue
+            students.append((summary["student_class"], summary["average"]))
+            for subject, score in entry["subject_scores"]:
+                subject_scores.setdefault(subject, []).append(score)
+        self._rankings = Rankings(students, subject_scores)
+
+    def rankings(self) -> Rankings:
+        if self._rankings is None:
+            raise RuntimeError("rank_entries() must be called before rankings()")
+        return self._rankings
+
+
+def load_state(state_path: str) -> Dict:
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return {}
+    return state
+
+
+def save_state(state_path: str, state: Dict) -> None:
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def _grading_key(scale: Optional[GradingScale]) -> List:
+    # How grades were given, as stored in the state
+    if scale is None:
+        scale = DEFAULT_GRADING_SCALE
+    return [scale.thresholds, scale.letters]
+
+
+def _pdf_fingerprint(
+    row_fp: str,
+    class_average: Optional[float],
+    position: Optional[Tuple[int, int, float]],
+    subject_percentiles: List[Optional[float]],
+    comment: Optional[str],
+) -> str:
+    # Compare values the way they are printed on the report
+    shown_average = None if class_average is None else f"{class_average:.2f}"
+    shown_position = None if position is None else [position[0], position[1], f"{position[2]:.0f}"]
+    shown_percentiles = [None if p is None else f"{p:.0f}" for p in subject_percentiles]
+    return hashlib.blake2b(
+        json.dumps([row_fp, shown_average, shown_position, shown_percentiles, comment]).encode("utf-8"),
+        digest_size=16,
+    ).hexdigest()
+
+
+def run_incremental(
+    filepath: str,
+    report_path: str,
+    output_dir: Optional[str] = None,
+    comment: Optional[str] = None,
+    workers: Optional[int] = None,
+    generate_pdfs: bool = True,
+    force: bool = False,
+    scale: Optional[GradingScale] = None,
+) -> bool:
+    """
+    Bring the report CSV (and optionally the per-student PDFs) up to date
+    with the roster, redoing only the work for changed students.
+    With force=True the previous state is ignored and everything is rebuilt.
+    Grades use scale (the default boundaries if None); if it differs from
+    the last run's, every student is redone.
+    Returns True on success.
+    """
+    print("\n=== INCREMENTAL REPORT RUN ===")
+    state_path = state_path_for(filepath)
+    previous = {} if force else load_state(state_path)
+    old_entries: Dict[str, Dict] = previous.get("rows", {})
+    old_pdfs: Dict[str, Dict] = previous.get("pdfs", {})
+    aggregates = Aggregates(previous.get("aggregates"))
+
+    grading = _grading_key(scale)
+    if previous and previous.get("grading", _grading_key(None)) != grading:
+        print("Grade boundaries changed; redoing every student.")
+        old_entries = {}
+        aggregates = Aggregates()
+        # Keep the paths so reports of removed students are still deleted
+        old_pdfs = {key: dict(pdf, fp=None) for key, pdf in old_pdfs.items()}
+
+    entries: Dict[str, Dict] = {}
+    rows_by_key: Dict[str, Dict[str, str]] = {}
+    records_by_key: Dict = {}
+    occurrences: Dict[str, int] = {}
+    num_new = 0
+    num_changed = 0
+
+    try:
+        rows = iter_students_scores_from_csv(filepath)
+        for row in rows:
+            if not (row.get("name") or "").strip():
+                print("Skipping a row with no name.")
+                continue
+
+            # Key by name plus occurrence, so duplicate names stay distinct
+            name_key = normalize_name(row.get("name", ""))
+            occurrences[name_key] = occurrences.get(name_key, 0) + 1
+            key = f"{name_key}#{occurrences[name_key]}"
+            rows_by_key[key] = row
+
+            fp = row_fingerprint(row)
+            old_entry = old_entries.get(key)
+            if old_entry is not None and old_entry["fp"] == fp:
+                entries[key] = old_entry
+                continue
+
+            if old_entry is None:
+                num_new += 1
+            else:
+                num_changed += 1
+                if old_entry["summary"] is not None:
+                    aggregates.apply(old_entry, -1)
+
+            record = parse_row(row)
+            records_by_key[key] = record
+            subject_scores = record.subject_scores()
+            entry = {"fp": fp, "summary": None, "subject_scores": subject_scores}
+            if subject_scores:
+                summary = calculate_student_summary(record.name, [score for _, score in subject_scores], scale)
+                summary["student_class"] = record.student_class
+                entry["summary"] = summary
+                aggregates.apply(entry, 1)
+            entries[key] = entry
+    except FileNotFoundError:
+        print(f"Could not find file: {filepath}")
+        return False
+
+    removed = [key for key in old_entries if key not in entries]
+    for key in removed:
+        if old_entries[key]["summary"] is not None:
+            aggregates.apply(old_entries[key], -1)
+
+    print(f"{len(entries)} student(s): {num_new} new, {num_changed} changed, {len(removed)} removed.")
+
+    # The report CSV is rewritten from stored summaries (no recomputation)
+    summaries = [entry["summary"] for entry in entries.values() if entry["summary"] is not None]
+    counts = write_student_summaries_bulk(report_path, summaries)
+    for path, count in counts.items():
+        print(f"Report written to {path} ({count} students)")
+
+    # Re-render only the PDFs whose inputs changed, including students
+    # whose class average or position in the class changed
+    ok = True
+    if generate_pdfs:
+        aggregates.rank_entries(entries.values())
+        rankings = aggregates.rankings()
+        pdfs: Dict[str, Dict] = {}
+        tasks = []
+        for key, entry in entries.items():
+            summary = entry["summary"]
+            if summary is None:
+                continue
+
+            class_average = aggregates.class_average(summary["student_class"])
+            position = rankings.class_position(summary["student_class"], summary["average"])
+            # Subject percentiles move when anyone's score in the subject does
+            subject_percentiles = [
+                rankings.subject_percentile(subject, score) for subject, score in entry["subject_scores"]
+            ]
+            pdf_fp = _pdf_fingerprint(entry["fp"], class_average, position, subject_percentiles, comment)
+            output_path = tracker.report_output_path(summary["name"], output_dir)
+            pdfs[key] = {"fp": pdf_fp, "path": output_path}
+
+            old_pdf = old_pdfs.get(key)
+            if old_pdf == pdfs[key] and os.path.exists(output_path):
+                continue
+
+            # Unchanged rows were not parsed above; parse them only now
+            record = records_by_key.get(key)
+            if record is None:
+                record = records_by_key[key] = parse_row(rows_by_key[key])
+            report_data = tracker.build_report_data_from_row(
+                record, filepath, comment=comment, class_stats=aggregates, scale=scale
+            )
+            tasks.append((report_data, output_path))
+
+        if tasks:
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            results = generate_pdfs_in_parallel(tasks, workers=workers)
+            failed = {path for path, error in results if error is not None}
+            ok = not failed
+            # Forget failed PDFs so they are retried next run
+            for pdf in pdfs.values():
+                if pdf["path"] in failed:
+                    pdf["fp"] = None
+        else:
+            print("All PDF reports are up to date.")
+    else:
+        # Keep what was last rendered so the next PDF run compares against it
+        pdfs = {key: pdf for key, pdf in old_pdfs.items() if key in entries}
+
+    # Delete the reports of students no longer in the roster (or left
+    # without scores), unless another student's report has the same path
+    current_paths = {pdf["path"] for pdf in pdfs.values()}
+    stale_paths = {pdf["path"] for key, pdf in old_pdfs.items() if key not in pdfs} - current_paths
+    for path in sorted(stale_paths):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            print(f"Warning: could not remove stale report {path}: {e}")
+            continue
+        print(f"Removed stale report {path}")
+
+    save_state(state_path, {
+        "version": STATE_VERSION,
+        "grading": grading,
+        "rows": entries,
+        "pdfs": pdfs,
+        "aggregates": aggregates.to_dict(),
+    })
+    return ok
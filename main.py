@@ -1,7 +1,22 @@
 #student performance tracker v1
 # main.py
-from report_io import write_student_summaries_to_csv
-from pdf_reports import generate_student_pdf
+import math
+import os
+from array import array
+
+import metrics
+from report_io import (
+    write_student_summaries_to_csv,
+    write_student_summaries_to_csv_streaming,
+    write_student_summaries_bulk,
+)
+from report_backends import get_backend
+from batch_pdf import (
+    generate_pdfs_in_parallel,
+    generate_class_pdfs_in_parallel,
+    generate_pdfs_pipelined,
+    DEFAULT_WRITER_THREADS,
+)
 
 
 from date_utils import (
@@ -12,13 +27,33 @@ from date_utils import (
     calculate_age_in_days,
 )
 from grades_utils import (
+    GradingScale,
     calculate_average,
     get_grade,
     calculate_student_summary,
+    make_student_summary,
     parse_scores_input,
 )
 
-from data_io import read_students_scores_from_csv, find_student_row_by_name
+from data_io import (
+    is_sqlite_path,
+    read_students_scores_from_csv,
+    iter_students_scores_from_csv,
+    get_roster_index,
+    iter_student_records,
+    parse_row,
+)
+from class_stats import (
+    ClassStatistics,
+    build_class_statistics,
+    build_class_statistics_from_table,
+)
+from records import ReportData
+from roster_cache import load_score_table
+
+
+DEFAULT_INPUT_CSV = "students_scores.csv"
+DEFAULT_REPORT_CSV = "students_report.csv"
 
 
 # ---------- DEMO / FEATURE FUNCTIONS ----------
@@ -94,7 +129,6 @@ def generate_single_student_pdf_interactive():
     # Enter subjects and scores
     print("Enter subjects and scores. Type 'done' as subject name when finished.")
     subjects = []
-    total_score = 0.0
 
     while True:
         subject_name = input("Subject name (or 'done' to finish): ").strip()
@@ -109,28 +143,49 @@ def generate_single_student_pdf_interactive():
             continue
 
         subjects.append({"name": subject_name, "score": score})
-        total_score += score
 
     if not subjects:
         print("No subjects entered. Cannot generate report.")
         return
 
+    # Optional teacher's comment
+    comment = input("Enter teacher's comment (optional, press Enter to skip): ").strip()
+    if not comment:
+        comment = None
+
+    report_data = build_report_data_from_scores(
+        name, student_class, subjects, days_present, days_absent, comment
+    )
+    write_student_pdf(report_data)
+
+
+def build_report_data_from_scores(
+    name: str,
+    student_class: str,
+    subjects,
+    days_present: int | None = None,
+    days_absent: int | None = None,
+    comment: str | None = None,
+    scale: GradingScale | None = None,
+):
+    """
+    Build the report_data dict expected by generate_student_pdf() from
+    a list of {"name": subject, "score": score} dicts entered by hand.
+    The grade uses scale (the default boundaries if None).
+    """
+    total_score = sum(subject["score"] for subject in subjects)
+
     # Compute averages
     num_subjects = len(subjects)
     average = total_score / num_subjects
 
     # We can reuse get_grade for the overall average
-    grade = get_grade(average)
+    grade = get_grade(average, scale)
 
     # For now, class_average is unknown; you can plug in real value later
     class_average = None
 
-    # Optional teacher's comment
-    comment = input("Enter teacher's comment (optional, press Enter to skip): ").strip()
-    if not comment:
-        comment = None
-
-    report_data = {
+    return {
         "name": name,
         "student_class": student_class,
         "days_present": days_present,
@@ -143,133 +198,346 @@ def generate_single_student_pdf_interactive():
         "comment": comment,
     }
 
-    # File name based on student name
+
+def report_output_path(name: str, output_dir: str | None = None) -> str:
+    """
+    Return the PDF path for a student: '<Name_With_Underscores>_report.pdf',
+    inside output_dir if one is given.
+    """
     safe_name = name.replace(" ", "_")
-    output_path = f"{safe_name}_report.pdf"
+    filename = f"{safe_name}_report.pdf"
+    return os.path.join(output_dir, filename) if output_dir else filename
+
+
+def class_report_output_path(student_class: str, output_dir: str | None = None) -> str:
+    """
+    Return the multi-page PDF path for a class: '<Class>_reports.pdf',
+    inside output_dir if one is given.
+    """
+    safe_class = (student_class or "N/A").replace(" ", "_").replace("/", "_")
+    filename = f"{safe_class}_reports.pdf"
+    return os.path.join(output_dir, filename) if output_dir else filename
 
+
+def write_student_pdf(report_data, output_dir: str | None = None) -> str:
+    """
+    Render one student's PDF report and return its path.
+    """
+    # The PDF backend (and fpdf) is only imported when a report is rendered
+    generate_student_pdf = get_backend("pdf")
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    output_path = report_output_path(report_data["name"], output_dir)
     generate_student_pdf(report_data, output_path)
+    return output_path
+
+
+def _open_store(filepath: str):
+    # Imported here so that CSV-only runs never load sqlite3
+    from sqlite_store import open_store
+
+    return open_store(filepath)
+
+
+def read_roster_rows(filepath: str):
+    """
+    Return all roster rows as dicts, from a CSV or a SQLite database
+    (see sqlite_store.py). Raises FileNotFoundError if the file is missing.
+    """
+    if is_sqlite_path(filepath):
+        with _open_store(filepath) as store:
+            return list(store.iter_rows())
+    return read_students_scores_from_csv(filepath)
+
+
+def read_roster_records(filepath: str):
+    """
+    Return every roster row as a StudentRecord, from a CSV (via the
+    mapped scanner, without building row dicts) or a SQLite database.
+    Raises FileNotFoundError if the file is missing.
+    """
+    if is_sqlite_path(filepath):
+        return [parse_row(row) for row in read_roster_rows(filepath)]
+    return list(iter_student_records(filepath))
 
 
-def get_summaries_from_csv(filepath: str):
+def iter_roster_rows(filepath: str):
+    """Streaming variant of read_roster_rows(): yield rows one at a time."""
+    if is_sqlite_path(filepath):
+        with _open_store(filepath) as store:
+            yield from store.iter_rows()
+    else:
+        yield from iter_students_scores_from_csv(filepath)
+
+
+@metrics.timed("load_class_statistics")
+def load_class_statistics(filepath: str, scale: GradingScale | None = None):
     """
-    Read students from a CSV and return a list of summary dicts.
+    Read students from a CSV once and return a ClassStatistics object
+    (grades from scale), or None if the file is missing or empty.
+    Uses the binary roster cache when the CSV has not changed.
     """
+    if is_sqlite_path(filepath):
+        try:
+            rows = read_roster_rows(filepath)
+        except FileNotFoundError:
+            print(f"Could not find file: {filepath}")
+            return None
+        if not rows:
+            print("No student data found in database.")
+            return None
+        return build_class_statistics(rows, scale)
+
     try:
-        students_rows = read_students_scores_from_csv(filepath)
+        table = load_score_table(filepath)
     except FileNotFoundError:
         print(f"Could not find file: {filepath}")
-        return []
+        return None
 
-    if not students_rows:
+    if table.num_students == 0:
         print("No student data found in CSV.")
-        return []
-
-    summaries = []
+        return None
 
-    for row in students_rows:
-        name = row.get("name", "Unknown").strip()
+    return build_class_statistics_from_table(table, scale)
 
-        # Collect all numeric scores from the row except 'name'
-        score_values = []
-        
-        non_subject_fields = {"name", "class", "days_present", "days_absent"}
 
-    for key, value in row.items():
-        if key.lower() in non_subject_fields:
-            continue
+def get_summaries_from_csv(filepath: str, scale: GradingScale | None = None):
+    """
+    Read students from a CSV and return a list of summary dicts,
+    graded with scale (the default boundaries if None).
+    """
+    return [summary.as_dict() for summary in _load_summaries(filepath, scale)]
 
-        try:
-            score_values.append(float(value))
-        except (ValueError, TypeError):
-            continue
 
-        if not score_values:
-            print(f"No scores found for {name}. Skipping.")
-            continue
+def _load_summaries(filepath: str, scale: GradingScale | None = None):
+    # StudentSummary records, for callers that only read them
+    class_stats = load_class_statistics(filepath, scale)
+    if class_stats is None:
+        return []
 
-        summary = calculate_student_summary(name, score_values)
-        summaries.append(summary)
+    return class_stats.summaries
 
-    return summaries
 
+def show_subject_averages(
+    filepath: str = DEFAULT_INPUT_CSV,
+    workers: int | None = None,
+    scale: GradingScale | None = None,
+) -> bool:
+    """
+    filepath may also be a directory or glob of roster CSVs, read in
+    parallel by `workers` processes (default: CPU count); their grade
+    histograms use scale.
+    """
+    from multi_roster import is_multi_roster_path
 
-def show_subject_averages():
     print("\n=== SUBJECT AVERAGES FROM CSV ===")
-    filepath = "students_scores.csv"
+
+    if is_sqlite_path(filepath):
+        return _show_subject_averages_sqlite(filepath)
+    if is_multi_roster_path(filepath):
+        return _show_subject_averages_multi(filepath, workers, scale)
 
     try:
-        students_rows = read_students_scores_from_csv(filepath)
+        table = load_score_table(filepath)
     except FileNotFoundError:
         print(f"Could not find file: {filepath}")
-        return
+        return False
 
-    if not students_rows:
+    if table.num_students == 0:
         print("No student data found in CSV.")
-        return
-
-    # We will collect totals and counts per subject (i.e. per column except 'name')
-    subject_totals = {}   # e.g. {"math": 210.0, "english": 195.0}
-    subject_counts = {}   # e.g. {"math": 3, "english": 3}
+        return False
 
-    for row in students_rows:
-        for key, value in row.items():
-            if key.lower() == "name":
-                # Skip the name column
-                continue
+    invalid_cells = table.invalid_cell_count()
+    if invalid_cells:
+        print(f"Warning: skipped {invalid_cells} blank or non-numeric score(s).")
 
-            if value is None or value == "":
-                # Skip empty cells
-                continue
+    subject_averages = {
+        subject: average
+        for subject, average in table.subject_means().items()
+        if average is not None
+    }
+    if not subject_averages:
+        print("No numeric scores found for any subject.")
+        return False
 
-            try:
-                score = float(value)
-            except ValueError:
-                # Skip any non-numeric value
-                print(f"Warning: could not convert value '{value}' in column '{key}' to a number. Skipping.")
-                continue
+    print("\n--- Subject Averages ---")
+    for subject, average in subject_averages.items():
+        print(f"{subject}: {average:.2f}")
+    print()
+    return True
 
-            # Initialize if seeing this subject for the first time
-            if key not in subject_totals:
-                subject_totals[key] = 0.0
-                subject_counts[key] = 0
 
-            subject_totals[key] += score
-            subject_counts[key] += 1
+def _show_subject_averages_sqlite(filepath: str) -> bool:
+    # Averages are computed by the database
+    try:
+        with _open_store(filepath) as store:
+            subject_averages = store.subject_averages()
+    except FileNotFoundError:
+        print(f"Could not find file: {filepath}")
+        return False
 
-    if not subject_totals:
+    if not subject_averages:
         print("No numeric scores found for any subject.")
-        return
+        return False
 
     print("\n--- Subject Averages ---")
-    for subject, total in subject_totals.items():
-        count = subject_counts[subject]
-        average = total / count if count > 0 else 0.0
+    for subject, average in subject_averages.items():
         print(f"{subject}: {average:.2f}")
     print()
+    return True
 
 
-def show_class_summary():
-    print("\n=== CLASS SUMMARY FROM CSV ===")
-    filepath = "students_scores.csv"
+def _show_class_summary_sqlite(filepath: str, scale: GradingScale | None) -> bool:
+    # Counts, averages and best/worst students are computed by the database
+    try:
+        with _open_store(filepath) as store:
+            summary = store.cohort_summary()
+    except FileNotFoundError:
+        print(f"Could not find file: {filepath}")
+        return False
+    return _print_cohort_summary(summary, scale)
 
-    # Reuse our existing helper to get summaries
-    summaries = get_summaries_from_csv(filepath)
-    if not summaries:
+
+def _show_class_summary_table(filepath: str, scale: GradingScale | None) -> bool:
+    # Student averages and best/worst students come from the columnar table
+    try:
+        table = load_score_table(filepath)
+    except FileNotFoundError:
+        print(f"Could not find file: {filepath}")
+        return False
+    return _print_cohort_summary(table.cohort_summary(), scale)
+
+
+def _print_cohort_summary(summary, scale: GradingScale | None) -> bool:
+    """Print a cohort_summary() dict (see score_table.py and sqlite_store.py)."""
+    if summary is None:
         print("No student summaries available.")
-        return
+        return False
+
+    best_student = summary["best"]
+    worst_student = summary["worst"]
+
+    print("\n--- Class Summary ---")
+    print(f"Number of students : {summary['num_students']}")
+    print(f"Class average      : {summary['average']:.2f}")
+    print(f"Top student        : {best_student['name']} "
+          f"({best_student['average']:.2f}, grade {get_grade(best_student['average'], scale)})")
+    print(f"Lowest student     : {worst_student['name']} "
+          f"({worst_student['average']:.2f}, grade {get_grade(worst_student['average'], scale)})")
+    print()
+    return True
+
+
+def _load_roster_aggregates(filepath: str, workers: int | None, scale: GradingScale | None):
+    """
+    Aggregate every roster CSV in a directory or glob (see multi_roster.py),
+    or return None if there are none.
+    """
+    from multi_roster import aggregate_rosters, resolve_roster_paths
+
+    paths = resolve_roster_paths(filepath)
+    if not paths:
+        print(f"No roster CSV files found for: {filepath}")
+        return None
+
+    try:
+        aggregates = aggregate_rosters(paths, workers, scale)
+    except FileNotFoundError as e:
+        print(f"Could not find file: {e.filename}")
+        return None
+
+    print(f"Read {aggregates.rows} student(s) from {aggregates.files} roster file(s).")
+    if aggregates.invalid_cells:
+        print(f"Warning: skipped {aggregates.invalid_cells} blank or non-numeric score(s).")
+    return aggregates
+
+
+def _format_grades(histogram) -> str:
+    return " ".join(f"{grade}:{count}" for grade, count in histogram.items())
+
+
+def _show_subject_averages_multi(filepath: str, workers: int | None, scale: GradingScale | None) -> bool:
+    aggregates = _load_roster_aggregates(filepath, workers, scale)
+    if aggregates is None:
+        return False
+    if not aggregates.subjects:
+        print("No numeric scores found for any subject.")
+        return False
 
-    # Number of students
-    num_students = len(summaries)
+    print("\n--- Subject Averages ---")
+    for subject, group in aggregates.subjects.items():
+        print(f"{subject}: {group.stats.mean:.2f}")
+
+    print("\n--- Subject Grades ---")
+    for subject, group in aggregates.subjects.items():
+        print(f"{subject}: {_format_grades(group.grade_histogram())}")
+    print()
+    return True
+
+
+def _show_class_summary_multi(filepath: str, workers: int | None, scale: GradingScale | None) -> bool:
+    aggregates = _load_roster_aggregates(filepath, workers, scale)
+    if aggregates is None:
+        return False
+    if aggregates.num_students == 0:
+        print("No student summaries available.")
+        return False
+
+    best_name, _, best_average = aggregates.best
+    worst_name, _, worst_average = aggregates.worst
+
+    print("\n--- Class Summary ---")
+    print(f"Number of students : {aggregates.num_students}")
+    print(f"Class average      : {aggregates.cohort.stats.mean:.2f}")
+    print(f"Top student        : {best_name} "
+          f"({best_average:.2f}, grade {get_grade(best_average, scale)})")
+    print(f"Lowest student     : {worst_name} "
+          f"({worst_average:.2f}, grade {get_grade(worst_average, scale)})")
+
+    print("\n--- Classes ---")
+    print(f"{'class':<12} {'n':>6} {'mean':>7} {'stdev':>7} {'min':>7} {'max':>7}  grades")
+    for student_class in sorted(aggregates.classes):
+        group = aggregates.classes[student_class]
+        stats = group.stats
+        print(f"{student_class:<12} {stats.count:>6} {stats.mean:>7.2f} {stats.stdev:>7.2f} "
+              f"{stats.minimum:>7.2f} {stats.maximum:>7.2f}  {_format_grades(group.grade_histogram())}")
+    print(f"{'all':<12} {aggregates.num_students:>6} {aggregates.cohort.stats.mean:>7.2f} "
+          f"{aggregates.cohort.stats.stdev:>7.2f} {aggregates.cohort.stats.minimum:>7.2f} "
+          f"{aggregates.cohort.stats.maximum:>7.2f}  {_format_grades(aggregates.cohort.grade_histogram())}")
+    print()
+    return True
+
+
+def show_class_summary(
+    class_stats: ClassStatistics | None = None,
+    filepath: str = DEFAULT_INPUT_CSV,
+    workers: int | None = None,
+    scale: GradingScale | None = None,
+) -> bool:
+    from multi_roster import is_multi_roster_path
+
+    print("\n=== CLASS SUMMARY FROM CSV ===")
+
+    if class_stats is None and is_sqlite_path(filepath):
+        return _show_class_summary_sqlite(filepath, scale)
+    if class_stats is None and is_multi_roster_path(filepath):
+        return _show_class_summary_multi(filepath, workers, scale)
 
-    # Extract averages
-    averages = [s["average"] for s in summaries]
+    if class_stats is None:
+        return _show_class_summary_table(filepath, scale)
+
+    # Reuse precomputed statistics when the caller already has them
+    if not class_stats.summaries:
+        print("No student summaries available.")
+        return False
 
-    # Class average
-    class_average = sum(averages) / num_students if num_students > 0 else 0.0
+    num_students = class_stats.num_students
+    class_average = class_stats.cohort_average
 
     # Best and worst students by average
-    best_student = max(summaries, key=lambda s: s["average"])
-    worst_student = min(summaries, key=lambda s: s["average"])
+    best_student = class_stats.best_student()
+    worst_student = class_stats.worst_student()
 
     print("\n--- Class Summary ---")
     print(f"Number of students : {num_students}")
@@ -279,188 +547,446 @@ def show_class_summary():
     print(f"Lowest student     : {worst_student['name']} "
           f"({worst_student['average']:.2f}, grade {worst_student['grade']})")
     print()
+    return True
 
 
-def process_students_from_csv():
+def show_rankings(
+    filepath: str = DEFAULT_INPUT_CSV,
+    top_n: int = 3,
+    class_stats: ClassStatistics | None = None,
+) -> bool:
+    """
+    Print per-class and per-subject distributions (mean, standard
+    deviation, quartiles) and each class's top students.
+    """
+    print("\n=== CLASS RANKINGS FROM CSV ===")
+
+    if class_stats is None:
+        class_stats = load_class_statistics(filepath)
+    if class_stats is None or not class_stats.summaries:
+        print("No student summaries available.")
+        return False
+
+    rankings = class_stats.rankings()
+
+    print("\n--- Classes ---")
+    print(f"{'class':<12} {'n':>6} {'mean':>7} {'stdev':>7} {'min':>7} {'q1':>7} {'median':>7} {'q3':>7} {'max':>7}")
+    for student_class in sorted(class_stats.classes):
+        stats = class_stats.classes[student_class]
+        q1, median, q3 = rankings.classes[student_class].quartiles()
+        print(f"{student_class:<12} {stats.count:>6} {stats.mean:>7.2f} {stats.stdev:>7.2f} "
+              f"{stats.minimum:>7.2f} {q1:>7.2f} {median:>7.2f} {q3:>7.2f} {stats.maximum:>7.2f}")
+
+    print("\n--- Subjects ---")
+    print(f"{'subject':<12} {'n':>6} {'mean':>7} {'stdev':>7} {'q1':>7} {'median':>7} {'q3':>7}")
+    for subject, stats in class_stats.subjects.items():
+        q1, median, q3 = rankings.subjects[subject].quartiles()
+        print(f"{subject:<12} {stats.count:>6} {stats.mean:>7.2f} {stats.stdev:>7.2f} "
+              f"{q1:>7.2f} {median:>7.2f} {q3:>7.2f}")
+
+    if top_n > 0:
+        print(f"\n--- Top {top_n} per class ---")
+        for student_class in sorted(class_stats.classes):
+            top = class_stats.top_students(top_n, student_class)
+            names = ", ".join(f"{s.name} ({s.average:.2f})" for s in top)
+            print(f"{student_class}: {names}")
+    print()
+    return True
+
+
+def process_students_from_csv(filepath: str = DEFAULT_INPUT_CSV, scale: GradingScale | None = None) -> bool:
     print("\n=== PROCESSING STUDENTS FROM CSV ===")
-    filepath = "students_scores.csv"
 
-    summaries = get_summaries_from_csv(filepath)
+    summaries = _load_summaries(filepath, scale)
     if not summaries:
-        return
+        return False
 
     for summary in summaries:
         print("\n--- Student Summary ---")
-        print(f"Name   : {summary['name']}")
-        print(f"Scores : {summary['scores']}")
-        print(f"Average: {summary['average']:.2f}")
-        print(f"Grade  : {summary['grade']}")
+        print(f"Name   : {summary.name}")
+        print(f"Scores : {summary.scores.tolist()}")
+        print(f"Average: {summary.average:.2f}")
+        print(f"Grade  : {summary.grade}")
     print()
+    return True
 
 
-def generate_report_csv():
+def generate_report_csv(
+    input_filepath: str = DEFAULT_INPUT_CSV,
+    output_filepath: str = DEFAULT_REPORT_CSV,
+    scale: GradingScale | None = None,
+) -> bool:
     print("\n=== GENERATE STUDENT REPORT CSV ===")
-    input_filepath = "students_scores.csv"
-    output_filepath = "students_report.csv"
 
-    summaries = get_summaries_from_csv(input_filepath)
+    summaries = _load_summaries(input_filepath, scale)
     if not summaries:
         print("No summaries generated. Report not created.")
-        return
+        return False
 
     write_student_summaries_to_csv(output_filepath, summaries)
+    return True
 
 
-def build_report_data_from_row(row, filepath: str, comment: str | None = None):
+# ---------- STREAMING VARIANTS (constant memory) ----------
+
+def iter_summaries_from_csv(filepath: str, scale: GradingScale | None = None):
     """
-    Given a CSV row for a single student, build the report_data dict
-    expected by generate_student_pdf().
+    Yield student summaries (StudentSummary records) one row at a time.
+    Streaming variant of get_summaries_from_csv(); raises FileNotFoundError
+    when iteration starts if the file is missing.
     """
-    # Build subjects list from all columns except 'name'
-    subjects = []
-    total_score = 0.0
+    if is_sqlite_path(filepath):
+        with _open_store(filepath) as store:
+            records = (parse_row(row) for row in store.iter_rows())
+            yield from _summaries_of(records, scale)
+        return
 
-    non_subject_fields = {"name", "class", "days_present", "days_absent"}
+    yield from _summaries_of(iter_student_records(filepath), scale)
 
-    for key, value in row.items():
-        if key.lower() in non_subject_fields:
-            continue
 
-        if value is None or value == "":
-            continue
+def _summaries_of(records, scale: GradingScale | None):
+    for record in records:
+        scores = record.valid_scores()
+        if scores:
+            yield make_student_summary(record.name, scores, record.student_class, scale)
 
-        try:
-            score = float(value)
-        except ValueError:
-            print(f"Warning: could not convert value '{value}' for subject '{key}'. Skipping.")
-            continue
-
-        subjects.append({"name": key, "score": score})
-        total_score += score
 
-    if not subjects:
-        return None  # caller should handle
+def show_subject_averages_streaming(filepath: str = DEFAULT_INPUT_CSV, workers: int | None = None) -> bool:
+    """
+    Streaming variant of show_subject_averages(): keeps only a running
+    total and count per subject, so memory does not grow with the file.
+    """
+    from multi_roster import is_multi_roster_path
 
-    num_subjects = len(subjects)
-    average = total_score / num_subjects
-    grade = get_grade(average)
+    if is_sqlite_path(filepath) or is_multi_roster_path(filepath):
+        # The database computes the averages without loading the roster,
+        # and a set of rosters is already streamed file by file
+        return show_subject_averages(filepath, workers)
 
-    # Extract class and attendance from CSV
-    student_class = row.get("class", "N/A")
+    print("\n=== SUBJECT AVERAGES FROM CSV (STREAMING) ===")
 
-    days_present = row.get("days_present")
-    days_absent = row.get("days_absent")
+    subject_totals = {}
+    subject_counts = {}
+    invalid_cells = 0
 
     try:
-        days_present = int(days_present) if days_present is not None else None
-    except ValueError:
-        days_present = None
+        # Only the scores are needed: names and classes are never decoded
+        for record in iter_student_records(filepath, columns=()):
+            for subject, score in zip(record.subjects, record.scores):
+                if score != score:  # NaN: blank or non-numeric
+                    invalid_cells += 1
+                    continue
+                subject_totals[subject] = subject_totals.get(subject, 0.0) + score
+                subject_counts[subject] = subject_counts.get(subject, 0) + 1
+    except FileNotFoundError:
+        print(f"Could not find file: {filepath}")
+        return False
+
+    if not subject_totals:
+        print("No numeric scores found for any subject.")
+        return False
+
+    if invalid_cells:
+        print(f"Warning: skipped {invalid_cells} blank or non-numeric score(s).")
+
+    print("\n--- Subject Averages ---")
+    for subject, total in subject_totals.items():
+        print(f"{subject}: {total / subject_counts[subject]:.2f}")
+    print()
+    return True
+
+
+def generate_report_csv_streaming(
+    input_filepath: str = DEFAULT_INPUT_CSV,
+    output_filepath: str = DEFAULT_REPORT_CSV,
+    compression: str | None = None,
+    shard_by_class: bool = False,
+    scale: GradingScale | None = None,
+) -> bool:
+    """
+    Streaming variant of generate_report_csv(): each summary is written
+    as soon as its row is read.
+    With compression ('gzip', 'bz2', 'xz', 'zstd') or shard_by_class the
+    bulk writer is used; see report_io.write_student_summaries_bulk().
+    """
+    print("\n=== GENERATE STUDENT REPORT CSV (STREAMING) ===")
+
+    if not os.path.exists(input_filepath):
+        print(f"Could not find file: {input_filepath}")
+        return False
+
+    summaries = iter_summaries_from_csv(input_filepath, scale)
+
+    if compression is None and not shard_by_class:
+        count = write_student_summaries_to_csv_streaming(output_filepath, summaries)
+        return count > 0
 
     try:
-        days_absent = int(days_absent) if days_absent is not None else None
-    except ValueError:
-        days_absent = None
+        counts = write_student_summaries_bulk(
+            output_filepath, summaries, compression=compression, shard_by_class=shard_by_class
+        )
+    except ValueError as e:
+        print(e)
+        return False
+
+    for path, count in counts.items():
+        print(f"Report written to {path} ({count} students)")
+    return sum(counts.values()) > 0
+
+
+@metrics.timed("build_report_data")
+def build_report_data_from_row(
+    row,
+    filepath: str,
+    comment: str | None = None,
+    class_stats: ClassStatistics | None = None,
+    scale: GradingScale | None = None,
+):
+    """
+    Given a CSV row (a dict, or a StudentRecord already parsed by the
+    caller) for a single student, build the report data expected by
+    generate_student_pdf(), as a ReportData record. Blank or non-numeric scores are skipped and
+    counted in the 'build_report_data' metrics rather than printed.
+
+    Pass class_stats when building many reports so the CSV is not
+    re-read for every student to get the class average. The grade uses
+    scale (the default boundaries if None).
+    """
+    record = parse_row(row)
+    metrics.record("build_report_data", rows=1, invalid_cells=record.invalid_cells)
 
+    valid_scores = record.valid_scores()
+    if not valid_scores:
+        return None  # caller should handle
 
-    # Compute overall class average using existing summaries
-    summaries = get_summaries_from_csv(filepath)
-    if summaries:
-        class_averages = [s["average"] for s in summaries]
-        class_average = sum(class_averages) / len(class_averages)
-    else:
-        class_average = None
+    total_score = sum(valid_scores)
+    average = total_score / len(valid_scores)
+    grade = get_grade(average, scale)
 
-    report_data = {
-        "name": row.get("name", "Unknown"),
-        "student_class": student_class,
-        "days_present": days_present,
-        "days_absent": days_absent,
-        "subjects": subjects,
-        "total_score": total_score,
-        "average": average,
-        "class_average": class_average,
-        "grade": grade,
-        "comment": comment,
-    }
+    student_class = record.student_class
+
+    # Average of the student's own class (whole roster if the class is unknown),
+    # from precomputed statistics when available
+    if class_stats is None:
+        class_stats = load_class_statistics(filepath)
+    class_average = None
+    position = None
+    subject_percentiles = None
+    if class_stats:
+        class_average = class_stats.class_average(student_class)
+        if class_average is None:
+            class_average = class_stats.cohort_average
+
+        # Rank and percentiles, when the statistics provide rankings
+        if hasattr(class_stats, "rankings"):
+            rankings = class_stats.rankings()
+            position = rankings.class_position(student_class, average)
+            subject_percentiles = array("d")
+            for subject, score in zip(record.subjects, record.scores):
+                percentile = rankings.subject_percentile(subject, score) if score == score else None
+                subject_percentiles.append(math.nan if percentile is None else percentile)
+
+    # Compact record with dict-style access (see records.py)
+    report_data = ReportData(
+        name=record.name,
+        student_class=student_class,
+        days_present=record.days_present,
+        days_absent=record.days_absent,
+        subject_names=record.subjects,
+        scores=record.scores,
+        total_score=total_score,
+        average=average,
+        class_average=class_average,
+        grade=grade,
+        comment=comment,
+        class_rank=position[0] if position else None,
+        class_size=position[1] if position else None,
+        class_percentile=position[2] if position else None,
+        subject_percentiles=subject_percentiles,
+    )
 
     return report_data
 
 
-def generate_student_pdf_from_csv():
+def generate_student_pdf_from_csv(
+    filepath: str = DEFAULT_INPUT_CSV,
+    student_name: str | None = None,
+    comment: str | None = None,
+    output_dir: str | None = None,
+    interactive: bool = True,
+    scale: GradingScale | None = None,
+) -> bool:
+    """
+    Generate a PDF report for one student in the CSV.
+    With interactive=False nothing is prompted for: student_name and
+    comment are taken from the arguments.
+    """
     print("\n=== GENERATE STUDENT PDF REPORT FROM CSV ===")
-    filepath = "students_scores.csv"
 
-    student_name = input("Enter student's full name (as in CSV): ").strip()
+    if interactive:
+        student_name = input("Enter student's full name (as in CSV): ").strip()
     if not student_name:
         print("No name entered.")
-        return
+        return False
 
     try:
-        row = find_student_row_by_name(filepath, student_name)
+        if is_sqlite_path(filepath):
+            roster_rows = read_roster_rows(filepath)
+            with _open_store(filepath) as store:
+                matches = store.find_student_rows(student_name)
+            if len(matches) > 1:
+                print(f"Warning: {len(matches)} students named '{student_name}'. Using the first one.")
+            row = matches[0] if matches else None
+        else:
+            roster_index = get_roster_index(filepath)
+            roster_rows = roster_index.rows
+            row = roster_index.find(student_name)
     except FileNotFoundError:
         print(f"Could not find file: {filepath}")
-        return
+        return False
 
     if row is None:
         print(f"Student '{student_name}' not found in {filepath}.")
-        return
+        return False
 
-    comment = input("Enter teacher's comment for this student (optional, Enter to skip): ").strip()
+    if interactive:
+        comment = input("Enter teacher's comment for this student (optional, Enter to skip): ").strip()
     if not comment:
         comment = None
 
-    report_data = build_report_data_from_row(row, filepath, comment=comment)
+    class_stats = build_class_statistics(roster_rows)
+
+    record = parse_row(row)
+    if record.invalid_cells:
+        print(f"Warning: skipped {record.invalid_cells} blank or non-numeric score(s) for {record.name}.")
+
+    report_data = build_report_data_from_row(
+        record, filepath, comment=comment, class_stats=class_stats, scale=scale
+    )
     if report_data is None:
         print("No valid subjects/scores found for this student. Cannot generate report.")
-        return
+        return False
 
-    safe_name = report_data["name"].replace(" ", "_")
-    output_path = f"{safe_name}_report.pdf"
+    write_student_pdf(report_data, output_dir)
+    return True
 
-    generate_student_pdf(report_data, output_path)
+
+def _print_invalid_cells(invalid_cells: int) -> None:
+    if invalid_cells:
+        print(f"Warning: skipped {invalid_cells} blank or non-numeric score(s).")
 
 
-def generate_pdfs_for_all_students_from_csv():
+def generate_pdfs_for_all_students_from_csv(
+    workers: int | None = None,
+    filepath: str = DEFAULT_INPUT_CSV,
+    common_comment: str | None = None,
+    output_dir: str | None = None,
+    chunksize: int | None = None,
+    interactive: bool = True,
+    per_class: bool = False,
+    pipelined: bool = False,
+    writer_threads: int = DEFAULT_WRITER_THREADS,
+    scale: GradingScale | None = None,
+) -> bool:
+    """
+    Generate a PDF report for every student in the CSV.
+    Rendering runs in a pool of worker processes; workers defaults to the CPU count.
+    With per_class=True, each class gets one multi-page PDF (plus a page
+    index CSV) instead of one PDF per student.
+    With pipelined=True, the roster is streamed and parsing, report
+    building, rendering and file writes (on writer_threads threads)
+    overlap; useful when the output directory is slow. Ignored with per_class.
+    With interactive=False the common comment is taken from the argument
+    instead of being prompted for. Grades use scale (the default
+    boundaries if None).
+    Returns True only if every report was generated.
+    """
     print("\n=== GENERATE PDF REPORTS FOR ALL STUDENTS FROM CSV ===")
-    filepath = "students_scores.csv"
 
-    try:
-        students_rows = read_students_scores_from_csv(filepath)
-    except FileNotFoundError:
-        print(f"Could not find file: {filepath}")
-        return
+    if pipelined and not per_class:
+        # Only the statistics are loaded up front; rows are streamed later
+        class_stats = load_class_statistics(filepath)
+        if class_stats is None:
+            return False
+        students_rows = None
+    else:
+        try:
+            students_rows = read_roster_rows(filepath)
+        except FileNotFoundError:
+            print(f"Could not find file: {filepath}")
+            return False
 
-    if not students_rows:
-        print("No student data found in CSV.")
-        return
+        if not students_rows:
+            print("No student data found in CSV.")
+            return False
 
     # Ask once for a common teacher comment (optional)
-    common_comment = input(
-        "Enter a common teacher's comment for all students (optional, Enter to skip): "
-    ).strip()
+    if interactive:
+        common_comment = input(
+            "Enter a common teacher's comment for all students (optional, Enter to skip): "
+        ).strip()
     if not common_comment:
         common_comment = None
 
-    count_generated = 0
+    invalid_cells = 0
 
-    for row in students_rows:
-        name = row.get("name", "Unknown").strip()
-        if not name:
+    def build_task(row, record=None):
+        nonlocal invalid_cells
+        if not (row.get("name") or "").strip():
             print("Skipping a row with no name.")
-            continue
-
-        report_data = build_report_data_from_row(row, filepath, comment=common_comment)
+            return None
+
+        if record is None:
+            record = parse_row(row)
+        invalid_cells += record.invalid_cells
+        name = record.name
+        report_data = build_report_data_from_row(
+            record, filepath, comment=common_comment, class_stats=class_stats, scale=scale
+        )
         if report_data is None:
             print(f"Skipping {name}: no valid subjects/scores.")
-            continue
-
-        safe_name = name.replace(" ", "_")
-        output_path = f"{safe_name}_report.pdf"
-
-        generate_student_pdf(report_data, output_path)
-        count_generated += 1
+            return None
+
+        return report_data, report_output_path(name, output_dir)
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    if students_rows is None:
+        results = generate_pdfs_pipelined(
+            iter_roster_rows(filepath),
+            build_task,
+            workers=workers,
+            writer_threads=writer_threads,
+        )
+        _print_invalid_cells(invalid_cells)
+        return bool(results) and all(error is None for _, error in results)
+
+    # Parse each row once; compute class statistics once for the whole batch
+    records = [parse_row(row) for row in students_rows]
+    class_stats = build_class_statistics(records)
+
+    tasks = []
+    for row, record in zip(students_rows, records):
+        task = build_task(row, record)
+        if task is not None:
+            tasks.append(task)
+    _print_invalid_cells(invalid_cells)
+
+    if per_class:
+        # One multi-page PDF per class instead of one file per student
+        reports_by_class = {}
+        for report_data, _ in tasks:
+            reports_by_class.setdefault(report_data["student_class"], []).append(report_data)
+        class_tasks = [
+            (reports, class_report_output_path(student_class, output_dir))
+            for student_class, reports in reports_by_class.items()
+        ]
+        results = generate_class_pdfs_in_parallel(class_tasks, workers=workers)
+    else:
+        results = generate_pdfs_in_parallel(tasks, workers=workers, chunksize=chunksize)
 
-    print(f"\nFinished generating {count_generated} PDF report(s).")
+    return bool(results) and all(error is None for _, error in results)
 
 
 
@@ -482,7 +1008,8 @@ def print_menu():
 
 
 
-def main():
+def main(filepath: str = DEFAULT_INPUT_CSV):
+    """Run the interactive menu on a roster CSV or SQLite database."""
     while True:
         print_menu()
         choice = input("Choose an option (1–11): ").strip()
@@ -494,20 +1021,22 @@ def main():
         elif choice == "3":
             interactive_single_student()
         elif choice == "4":
-            process_students_from_csv()
+            process_students_from_csv(filepath)
         elif choice == "5":
-            generate_report_csv()
+            generate_report_csv(filepath)
         elif choice == "6":
-            show_subject_averages()
+            show_subject_averages(filepath)
         elif choice == "7":
-            show_class_summary()
+            show_class_summary(filepath=filepath)
         elif choice == "8":
             generate_single_student_pdf_interactive()
         elif choice == "9":
-            generate_student_pdf_from_csv()
+            generate_student_pdf_from_csv(filepath)
         elif choice == "10":
-            generate_pdfs_for_all_students_from_csv()
+            generate_pdfs_for_all_students_from_csv(filepath=filepath)
         elif choice == "11":
+            if metrics.is_enabled():
+                metrics.print_summary()
             print("Exiting... Goodbye!")
             break
         else:
@@ -515,4 +1044,7 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    import sys
+
+    # Optional argument: the roster to use (a CSV or a .db file)
+    main(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_INPUT_CSV)
@@ -0,0 +1,133 @@
+# metrics.py
+#
+# Lightweight per-stage instrumentation: wall time, call counts, rows
+# processed, invalid cells and bytes written.
+#
+# Off by default. Turn it on with enable() or by setting the environment
+# variable TRACKER_METRICS=1. When off, @timed functions pay one boolean
+# check per call and record() returns immediately.
+
+import json
+import os
+import time
+from functools import wraps
+from typing import Dict, Optional
+
+
+_enabled = os.environ.get("TRACKER_METRICS", "") not in ("", "0")
+
+
+class StageMetrics:
+    """Totals for one pipeline stage."""
+
+    __slots__ = ("calls", "seconds", "rows", "invalid_cells", "bytes_written")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.invalid_cells = 0
+        self.bytes_written = 0
+
+    def as_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+_stages: Dict[str, StageMetrics] = {}
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def disable() -> None:
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    _stages.clear()
+
+
+def _stage(name: str) -> StageMetrics:
+    stage = _stages.get(name)
+    if stage is None:
+        stage = _stages[name] = StageMetrics()
+    return stage
+
+
+def record(
+    name: str,
+    rows: int = 0,
+    invalid_cells: int = 0,
+    bytes_written: int = 0,
+    calls: int = 0,
+    seconds: float = 0.0,
+) -> None:
+    """
+    Add counts to a stage (no-op when metrics are off).
+    Pass calls=1 for code that can't use @timed, such as generators, and
+    calls and seconds for work timed elsewhere (e.g. in worker processes).
+    """
+    if not _enabled:
+        return
+    stage = _stage(name)
+    stage.calls += calls
+    stage.seconds += seconds
+    stage.rows += rows
+    stage.invalid_cells += invalid_cells
+    stage.bytes_written += bytes_written
+
+
+def timed(name: str):
+    """
+    Decorator: count calls to the function and add its wall time to stage 'name'.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stage = _stage(name)
+                stage.calls += 1
+                stage.seconds += time.perf_counter() - start
+        return wrapper
+    return decorator
+
+
+def snapshot() -> Dict[str, Dict]:
+    """Return the current metrics as {stage: {calls, seconds, rows, ...}}."""
+    return {name: stage.as_dict() for name, stage in _stages.items()}
+
+
+def print_summary() -> None:
+    """Print a table of the metrics collected so far."""
+    if not _stages:
+        print("No metrics recorded.")
+        return
+
+    print("\n--- Run Metrics ---")
+    print(f"{'stage':<22} {'calls':>7} {'seconds':>9} {'rows':>10} {'invalid':>8} {'bytes':>11}")
+    for name, stage in _stages.items():
+        print(f"{name:<22} {stage.calls:>7} {stage.seconds:>9.3f} {stage.rows:>10} "
+              f"{stage.invalid_cells:>8} {stage.bytes_written:>11}")
+    print()
+
+
+def write_metrics(filepath: str, extra: Optional[Dict] = None) -> None:
+    """Write the metrics collected so far as JSON."""
+    data = {"stages": snapshot()}
+    if extra:
+        data.update(extra)
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    print(f"Metrics written to {filepath}")
@@ -0,0 +1,168 @@
+# mmap_csv.py
+#
+# Memory-mapped scanner for large roster CSVs.
+#
+# csv.reader decodes every byte of the file to str and allocates a string
+# per cell. This scanner maps the file instead and splits it in large
+# blocks with bytes.split, so cells stay as bytes slices of the mapping
+# and the caller decodes only the columns it uses (float() and int()
+# accept bytes directly, so scores are never decoded at all).
+#
+# Quoting follows what csv.writer produces (and what our exports use):
+# fields containing commas, quotes or newlines are wrapped in double
+# quotes, with "" for a literal quote. Only records that contain a quote
+# character are handed to the csv module. Files the fast path does not
+# handle (empty, not mappable, a byte-order mark, a quoted header or
+# old-Mac CR line endings) are left to the caller's csv.reader fallback.
+
+import csv
+import mmap
+from typing import Iterator, List, Optional
+
+# Bytes split per step; large enough that per-block overhead is negligible
+BLOCK_SIZE = 1 << 22
+
+_BOM = b"\xef\xbb\xbf"
+
+
+class MappedCSV:
+    """
+    A roster CSV mapped into memory. header is the decoded header row;
+    rows() yields each later row as a list of bytes fields.
+    Use as a context manager, or call close().
+    """
+
+    def __init__(self, f, buf: mmap.mmap, header: List[str], body_start: int, crlf: bool):
+        self._file = f
+        self._buf = buf
+        self.header = header
+        self._body_start = body_start
+        self._crlf = crlf
+
+    def close(self) -> None:
+        self._buf.close()
+        self._file.close()
+
+    def __enter__(self) -> "MappedCSV":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _blocks(self) -> Iterator[bytes]:
+        """Yield the body in blocks of whole lines, each without its final "\n"."""
+        buf = self._buf
+        size = len(buf)
+        start = self._body_start
+        while start < size:
+            # Cut each block at a line end so no line is split across blocks
+            end = buf.find(b"\n", min(start + BLOCK_SIZE, size) - 1)
+            if end == -1:
+                end = size
+            yield buf[start:end]
+            start = end + 1
+
+    def rows(self) -> Iterator[List[bytes]]:
+        """Yield each data row as a list of bytes fields, skipping blank lines."""
+        crlf = self._crlf
+        blocks = self._blocks()
+        for block in blocks:
+            if b'"' not in block:
+                if crlf:
+                    # The block stops short of its last line's "\n", so that
+                    # line's "\r" is not part of a "\r\n" pair here
+                    block = block.replace(b"\r\n", b"\n")
+                    if block.endswith(b"\r"):
+                        block = block[:-1]
+                for line in block.split(b"\n"):
+                    if line:
+                        yield line.split(b",")
+                continue
+
+            # A block with quotes is read line by line and kept raw, so
+            # the csv module sees line breaks inside quoted fields exactly
+            # as they are in the file (Excel writes bare LFs in CRLF files)
+            source = _LineSource(block, blocks)
+            while True:
+                line = source.next_in_block()
+                if line is None:
+                    break
+                if b'"' not in line:
+                    if crlf and line.endswith(b"\r"):
+                        line = line[:-1]
+                    if line:
+                        yield line.split(b",")
+                    continue
+                # csv.reader pulls further lines only while inside a quoted
+                # field, so a record with embedded newlines is read whole and
+                # a stray quote in an unquoted field is taken literally
+                row = next(csv.reader(_continued(line, source)), [])
+                if row:
+                    yield [field.encode("utf-8") for field in row]
+
+
+class _LineSource:
+    """
+    The raw lines of a block, continuing into the blocks after it when a
+    quoted field spans them.
+    """
+
+    def __init__(self, block: bytes, blocks: Iterator[bytes]):
+        self._lines = iter(block.split(b"\n"))
+        self._blocks = blocks
+
+    def next_in_block(self) -> Optional[bytes]:
+        """The next line of the current block, or None at its end."""
+        return next(self._lines, None)
+
+    def __iter__(self) -> "_LineSource":
+        return self
+
+    def __next__(self) -> bytes:
+        while True:
+            line = next(self._lines, None)
+            if line is not None:
+                return line
+            # Raises StopIteration at the end of the file
+            self._lines = iter(next(self._blocks).split(b"\n"))
+
+
+def _continued(first: bytes, lines: Iterator[bytes]) -> Iterator[str]:
+    yield first.decode("utf-8") + "\n"
+    for line in lines:
+        yield line.decode("utf-8") + "\n"
+
+
+def open_mapped_csv(filepath: str) -> Optional[MappedCSV]:
+    """
+    Map a CSV file for scanning, or return None if it should be read with
+    the csv module instead (see the module comment).
+    Raises FileNotFoundError if the file is missing.
+    """
+    f = open(filepath, "rb")
+    try:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        # Empty files can't be mapped; nor can pipes and some special files
+        f.close()
+        return None
+
+    header_end = buf.find(b"\n")
+    first_line = buf[:header_end if header_end != -1 else len(buf)]
+    crlf = first_line.endswith(b"\r")
+    if crlf:
+        first_line = first_line[:-1]
+
+    usable = not first_line.startswith(_BOM) and b'"' not in first_line and b"\r" not in first_line
+    if usable:
+        try:
+            header = first_line.decode("utf-8").split(",")
+        except UnicodeDecodeError:
+            usable = False
+    if not usable:
+        buf.close()
+        f.close()
+        return None
+
+    body_start = header_end + 1 if header_end != -1 else len(buf)
+    return MappedCSV(f, buf, header, body_start, crlf)
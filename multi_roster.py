@@ -0,0 +1,198 @@
+# multi_roster.py
+#
+# Statistics over many roster files at once: a directory (searched
+# recursively) or glob of CSVs, e.g. one file per class for a school, or
+# one folder per school for a district.
+#
+# Each file is read in a worker process and reduced to a RosterAggregates:
+# running counts, sums, min/max and variance plus grade histograms per
+# class and per subject, and the best and worst student. Only those small
+# objects are sent back to the parent, which merges them in file order;
+# rows never cross process boundaries.
+
+import glob
+import os
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import metrics
+from class_stats import RunningStats
+from data_io import StudentRecord, iter_student_records
+from grades_utils import DEFAULT_GRADING_SCALE, GradingScale, calculate_average
+
+_GLOB_CHARS = frozenset("*?[")
+
+# (name, class, average)
+StudentRef = Tuple[str, str, float]
+
+
+def is_multi_roster_path(path: str) -> bool:
+    """
+    True if path names several roster files: a directory or a glob pattern.
+    An existing file is always a single roster, even if its name contains
+    glob characters (e.g. "roster[2024].csv").
+    """
+    if os.path.isfile(path):
+        return False
+    return os.path.isdir(path) or any(c in _GLOB_CHARS for c in path)
+
+
+def resolve_roster_paths(path: str) -> List[str]:
+    """
+    The roster CSVs a directory or glob pattern refers to, sorted by path.
+    A directory means every *.csv below it; '**' in a pattern matches
+    any number of subdirectories.
+    """
+    pattern = os.path.join(path, "**", "*.csv") if os.path.isdir(path) else path
+    return sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+
+
+class GroupAggregate:
+    """RunningStats plus a grade histogram for one group (a class, subject or the cohort)."""
+
+    __slots__ = ("stats", "scale", "grade_counts")
+
+    def __init__(self, scale: GradingScale = DEFAULT_GRADING_SCALE):
+        self.stats = RunningStats()
+        self.scale = scale
+        # Indexed like scale.letters (fail grade first)
+        self.grade_counts = [0] * len(scale.letters)
+
+    def add(self, value: float) -> None:
+        self.stats.add(value)
+        self.grade_counts[self.scale.index(value)] += 1
+
+    def merge(self, other: "GroupAggregate") -> None:
+        self.stats.merge(other.stats)
+        counts = self.grade_counts
+        for i, count in enumerate(other.grade_counts):
+            counts[i] += count
+
+    def grade_histogram(self) -> Dict[str, int]:
+        """{grade: count}, best grade first."""
+        letters = self.scale.letters
+        return {letters[i]: self.grade_counts[i] for i in reversed(range(len(letters)))}
+
+
+class RosterAggregates:
+    """
+    Mergeable statistics for one or more roster files.
+
+    Holds:
+    - files / rows / invalid_cells: files read, rows read and blank or
+      non-numeric score cells skipped
+    - cohort: averages of every student with at least one valid score
+    - classes: student averages per class
+    - subjects: scores per subject column (in first-seen order)
+    - best / worst: (name, class, average) of the highest and lowest
+      average (the first one on ties, in file order)
+
+    Grade histograms use scale (the default boundaries if None); only
+    aggregates with the same scale can be merged.
+    """
+
+    __slots__ = ("files", "rows", "invalid_cells", "scale", "cohort", "classes", "subjects", "best", "worst")
+
+    def __init__(self, scale: Optional[GradingScale] = None):
+        if scale is None:
+            scale = DEFAULT_GRADING_SCALE
+        self.scale = scale
+        self.files = 0
+        self.rows = 0
+        self.invalid_cells = 0
+        self.cohort = GroupAggregate(scale)
+        self.classes: Dict[str, GroupAggregate] = {}
+        self.subjects: Dict[str, GroupAggregate] = {}
+        self.best: Optional[StudentRef] = None
+        self.worst: Optional[StudentRef] = None
+
+    @property
+    def num_students(self) -> int:
+        return self.cohort.stats.count
+
+    def add_record(self, record: StudentRecord) -> None:
+        self.rows += 1
+        self.invalid_cells += record.invalid_cells
+        subjects = self.subjects
+        for subject, score in record.subject_scores():
+            group = subjects.get(subject)
+            if group is None:
+                group = subjects[subject] = GroupAggregate(self.scale)
+            group.add(score)
+
+        scores = record.valid_scores()
+        if not scores:
+            return
+        average = calculate_average(scores)
+        student = (record.name, record.student_class, average)
+        if self.best is None or average > self.best[2]:
+            self.best = student
+        if self.worst is None or average < self.worst[2]:
+            self.worst = student
+
+        self.cohort.add(average)
+        group = self.classes.get(record.student_class)
+        if group is None:
+            group = self.classes[record.student_class] = GroupAggregate(self.scale)
+        group.add(average)
+
+    def merge(self, other: "RosterAggregates") -> "RosterAggregates":
+        """Fold the statistics of files read after this one into it; returns self."""
+        self.files += other.files
+        self.rows += other.rows
+        self.invalid_cells += other.invalid_cells
+        self.cohort.merge(other.cohort)
+        for mine, theirs in ((self.classes, other.classes), (self.subjects, other.subjects)):
+            for key, group in theirs.items():
+                mine_group = mine.get(key)
+                if mine_group is None:
+                    mine_group = mine[key] = GroupAggregate(self.scale)
+                mine_group.merge(group)
+        if other.best is not None and (self.best is None or other.best[2] > self.best[2]):
+            self.best = other.best
+        if other.worst is not None and (self.worst is None or other.worst[2] < self.worst[2]):
+            self.worst = other.worst
+        return self
+
+
+def aggregate_roster_file(filepath: str, scale: Optional[GradingScale] = None) -> RosterAggregates:
+    """Read one roster CSV into a RosterAggregates (runs in a worker process)."""
+    aggregates = RosterAggregates(scale)
+    aggregates.files = 1
+    for record in iter_student_records(filepath, columns=("name", "class")):
+        aggregates.add_record(record)
+    return aggregates
+
+
+@metrics.timed("multi_roster")
+def aggregate_rosters(
+    paths: Iterable[str],
+    workers: Optional[int] = None,
+    scale: Optional[GradingScale] = None,
+) -> RosterAggregates:
+    """
+    Read many roster CSVs, in a pool of worker processes when workers > 1
+    (default: one per CPU, at most one per file), and merge their aggregates.
+    Grade histograms use scale (the default boundaries if None).
+    """
+    paths = list(paths)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths)))
+
+    total = RosterAggregates(scale)
+    aggregate = partial(aggregate_roster_file, scale=scale)
+    if workers == 1:
+        for path in paths:
+            total.merge(aggregate(path))
+    else:
+        from batch_pdf import _make_process_pool
+
+        with _make_process_pool(workers) as executor:
+            # One file per task: files are big enough that pickling the
+            # path and a few dicts back is negligible next to parsing
+            for part in executor.map(aggregate, paths):
+                total.merge(part)
+
+    metrics.record("multi_roster", rows=total.rows, invalid_cells=total.invalid_cells)
+    return total
@@ -1,7 +1,11 @@
 # pdf_reports.py
 
+import csv
+import os
 from fpdf import FPDF
-from typing import Dict, List
+from typing import Dict, Iterable, List, Tuple
+
+import metrics
 
 
 class StudentReportPDF(FPDF):
@@ -12,7 +16,8 @@ class StudentReportPDF(FPDF):
         self.ln(5)
 
 
-def generate_student_pdf(report_data: Dict, output_path: str) -> None:
+@metrics.timed("pdf_render")
+def generate_student_pdf(report_data: Dict, output_path: str, verbose: bool = True) -> None:
     """
     Generate a simple PDF report for a single student.
 
@@ -23,68 +28,194 @@ def generate_student_pdf(report_data: Dict, output_path: str) -> None:
     - total_score: float
     - average: float
     - class_average: float or None (optional, can be dummy for now)
+    - class_rank, class_size, class_percentile: optional; shown as the
+      student's position in their class when class_rank is set
+    - subjects may also carry a "percentile" key (percentile rank of the
+      score within the subject); the table then gets a Percentile column
     - days_present: int (optional)
     - days_absent: int (optional)
     - grade: str (e.g. "A")
-    """
-
-    pdf = StudentReportPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
-
-    # Basic info
-    pdf.set_font("Helvetica", "", 12)
-
-    pdf.cell(0, 8, f"Student Name : {report_data.get('name', 'N/A')}", ln=True)
-    pdf.cell(0, 8, f"Class        : {report_data.get('student_class', 'N/A')}", ln=True)
-
-    days_present = report_data.get("days_present")
-    days_absent = report_data.get("days_absent")
-
-    if days_present is not None and days_absent is not None:
-        pdf.cell(0, 8, f"Days Present : {days_present}", ln=True)
-        pdf.cell(0, 8, f"Days Absent  : {days_absent}", ln=True)
-
-    pdf.cell(0, 8, f"Grade        : {report_data.get('grade', 'N/A')}", ln=True)
-    pdf.ln(5)
-
-    # Subjects table
-    pdf.set_font("Helvetica", "B", 12)
-    pdf.cell(100, 8, "Subject", border=1)
-    pdf.cell(0, 8, "Score", border=1, ln=True)
 
-    pdf.set_font("Helvetica", "", 12)
-    subjects: List[Dict] = report_data.get("subjects", [])
-
-    for subject in subjects:
-        sub_name = subject.get("name", "")
-        score = subject.get("score", "")
-        pdf.cell(100, 8, str(sub_name), border=1)
-        pdf.cell(0, 8, str(score), border=1, ln=True)
+    Set verbose=False to skip the "saved" message (used by batch runs).
+    """
 
-    pdf.ln(5)
+    DEFAULT_LAYOUT.render(report_data, output_path)
+    if metrics.is_enabled():
+        metrics.record("pdf_render", rows=1, bytes_written=os.path.getsize(output_path))
+    if verbose:
+        print(f"PDF report saved to {output_path}")
 
-    # Totals and averages
-    total_score = report_data.get("total_score", 0)
-    average = report_data.get("average", 0)
-    class_average = report_data.get("class_average")
 
-    pdf.cell(0, 8, f"Total Score        : {total_score:.2f}", ln=True)
-    pdf.cell(0, 8, f"Student Average    : {average:.2f}", ln=True)
+class ReportLayout:
+    """
+    The layout of the student report (labels, format strings, fonts and
+    column widths) and the code that draws it, one page per student.
+    render() and render_bytes() write one student per document;
+    render_many() writes many students into one multi-page document.
+    """
 
-    if class_average is not None:
-        pdf.cell(0, 8, f"Class Average      : {class_average:.2f}", ln=True)
+    FONT = "Helvetica"
+    FONT_SIZE = 12
+    LINE_HEIGHT = 8
+    SUBJECT_COL_WIDTH = 100
+    SCORE_COL_WIDTH = 45
+    PAGE_BREAK_MARGIN = 15
+
+    def __init__(self):
+        # Info block: (format string, report_data key)
+        self.info_lines = [
+            ("Student Name : {}", "name"),
+            ("Class        : {}", "student_class"),
+        ]
+        self.attendance_lines = [
+            ("Days Present : {}", "days_present"),
+            ("Days Absent  : {}", "days_absent"),
+        ]
+        self.grade_line = "Grade        : {}"
+        self.table_header = ("Subject", "Score")
+        self.percentile_header = "Percentile"
+        self.total_line = "Total Score        : {:.2f}"
+        self.average_line = "Student Average    : {:.2f}"
+        self.class_average_line = "Class Average      : {:.2f}"
+        self.class_rank_line = "Class Position     : {} of {} (percentile {:.0f})"
+        self.comment_label = "Teacher's Comment:"
+
+    def new_document(self) -> StudentReportPDF:
+        pdf = StudentReportPDF()
+        pdf.set_auto_page_break(auto=True, margin=self.PAGE_BREAK_MARGIN)
+        return pdf
+
+    def draw(self, pdf: StudentReportPDF, report_data: Dict) -> None:
+        """Add a new page to pdf and draw one student's report on it."""
+        h = self.LINE_HEIGHT
+        pdf.add_page()
+
+        # Basic info
+        pdf.set_font(self.FONT, "", self.FONT_SIZE)
+        for line, key in self.info_lines:
+            pdf.cell(0, h, line.format(report_data.get(key, "N/A")), ln=True)
+
+        if all(report_data.get(key) is not None for _, key in self.attendance_lines):
+            for line, key in self.attendance_lines:
+                pdf.cell(0, h, line.format(report_data[key]), ln=True)
+
+        pdf.cell(0, h, self.grade_line.format(report_data.get("grade", "N/A")), ln=True)
+        pdf.ln(5)
+
+        # Subjects table, with each score's percentile within its subject
+        # across the cohort when the report data has one
+        subjects: List[Dict] = report_data.get("subjects", [])
+        with_percentiles = any("percentile" in subject for subject in subjects)
+
+        pdf.set_font(self.FONT, "B", self.FONT_SIZE)
+        pdf.cell(self.SUBJECT_COL_WIDTH, h, self.table_header[0], border=1)
+        if with_percentiles:
+            pdf.cell(self.SCORE_COL_WIDTH, h, self.table_header[1], border=1)
+            pdf.cell(0, h, self.percentile_header, border=1, ln=True)
+        else:
+            pdf.cell(0, h, self.table_header[1], border=1, ln=True)
+
+        pdf.set_font(self.FONT, "", self.FONT_SIZE)
+        for subject in subjects:
+            pdf.cell(self.SUBJECT_COL_WIDTH, h, str(subject.get("name", "")), border=1)
+            if with_percentiles:
+                pdf.cell(self.SCORE_COL_WIDTH, h, str(subject.get("score", "")), border=1)
+                pdf.cell(0, h, _format_percentile(subject.get("percentile")), border=1, ln=True)
+            else:
+                pdf.cell(0, h, str(subject.get("score", "")), border=1, ln=True)
+
+        pdf.ln(5)
+
+        # Totals and averages
+        pdf.cell(0, h, self.total_line.format(report_data.get("total_score", 0)), ln=True)
+        pdf.cell(0, h, self.average_line.format(report_data.get("average", 0)), ln=True)
+
+        class_average = report_data.get("class_average")
+        if class_average is not None:
+            pdf.cell(0, h, self.class_average_line.format(class_average), ln=True)
+
+        class_rank = report_data.get("class_rank")
+        if class_rank is not None:
+            pdf.cell(0, h, self.class_rank_line.format(
+                class_rank, report_data.get("class_size"), report_data.get("class_percentile")
+            ), ln=True)
+
+        pdf.ln(5)
+
+        # Optional comment
+        comment = report_data.get("comment")
+        if comment:
+            pdf.set_font(self.FONT, "B", self.FONT_SIZE)
+            pdf.cell(0, h, self.comment_label, ln=True)
+            pdf.set_font(self.FONT, "", self.FONT_SIZE)
+            pdf.multi_cell(0, h, comment)
+
+    def render(self, report_data: Dict, output_path: str) -> None:
+        """Write one student's report to its own PDF file."""
+        pdf = self.new_document()
+        self.draw(pdf, report_data)
+        pdf.output(output_path)
+
+    def render_bytes(self, report_data: Dict) -> bytes:
+        """Return one student's report as PDF bytes, without touching the disk."""
+        pdf = self.new_document()
+        self.draw(pdf, report_data)
+        data = pdf.output(dest="S")
+        # fpdf 1.x returns a latin-1 str, fpdf2 a bytearray
+        return data.encode("latin-1") if isinstance(data, str) else bytes(data)
+
+    def render_many(self, reports: Iterable[Dict], output_path: str) -> List[Tuple[str, int]]:
+        """
+        Write many students' reports into one multi-page PDF.
+        Returns the page index: (student name, first page number) in document order.
+        """
+        pdf = self.new_document()
+        page_index: List[Tuple[str, int]] = []
+        for report_data in reports:
+            page_index.append((report_data.get("name", "N/A"), pdf.page_no() + 1))
+            self.draw(pdf, report_data)
+        pdf.output(output_path)
+        return page_index
+
+
+def _format_percentile(percentile) -> str:
+    # NaN when the subject had no scores to rank against
+    if percentile is None or percentile != percentile:
+        return "-"
+    return f"{percentile:.0f}"
+
+
+# Shared by the single-student and class PDF functions
+DEFAULT_LAYOUT = ReportLayout()
+
+
+def render_student_pdf_bytes(report_data: Dict) -> bytes:
+    """
+    Render a student's report in memory (same layout as generate_student_pdf).
+    Used by the pipelined batch mode, which writes files on separate threads.
+    """
+    return DEFAULT_LAYOUT.render_bytes(report_data)
 
-    pdf.ln(5)
 
-    # Optional comment
-    comment = report_data.get("comment")
-    if comment:
-        pdf.set_font("Helvetica", "B", 12)
-        pdf.cell(0, 8, "Teacher's Comment:", ln=True)
-        pdf.set_font("Helvetica", "", 12)
-        pdf.multi_cell(0, 8, comment)
+@metrics.timed("pdf_render")
+def generate_class_pdf(reports: Iterable[Dict], output_path: str, verbose: bool = True) -> List[Tuple[str, int]]:
+    """
+    Generate one multi-page PDF holding the reports of many students
+    (e.g. a whole class), one student per page.
 
-    # Save to file
-    pdf.output(output_path)
-    print(f"PDF report saved to {output_path}")
+    Also writes '<output_path>.index.csv' listing each student's first page.
+    Returns the page index as (name, page) pairs.
+    """
+    page_index = DEFAULT_LAYOUT.render_many(reports, output_path)
+    if metrics.is_enabled():
+        metrics.record("pdf_render", rows=len(page_index), bytes_written=os.path.getsize(output_path))
+
+    index_path = output_path + ".index.csv"
+    with open(index_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["name", "page"])
+        writer.writerows(page_index)
+
+    if verbose:
+        print(f"Class PDF with {len(page_index)} report(s) saved to {output_path}")
+    return page_index
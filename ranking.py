@@ -0,0 +1,134 @@
+# ranking.py
+#
+# Ranks, percentiles and top-N lists for a cohort, per class and per subject.
+#
+# Values are sorted once into array('d') columns; after that a student's
+# rank or percentile is a bisect lookup, and a percentile of the column
+# (median, quartiles, ...) is an index into it. Top/bottom-N lists use
+# heaps instead of sorting the whole cohort.
+
+import heapq
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def top_k(items: Iterable[T], k: int, key: Callable[[T], float]) -> List[T]:
+    """The k items with the highest key, highest first (heap-based, O(n log k))."""
+    return heapq.nlargest(k, items, key=key)
+
+
+def bottom_k(items: Iterable[T], k: int, key: Callable[[T], float]) -> List[T]:
+    """The k items with the lowest key, lowest first."""
+    return heapq.nsmallest(k, items, key=key)
+
+
+class SortedValues:
+    """
+    One group's values (e.g. the averages of a class) sorted ascending,
+    answering rank and percentile queries with binary search.
+    """
+
+    __slots__ = ("values",)
+
+    def __init__(self, values: Iterable[float]):
+        self.values = array("d", sorted(values))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def rank(self, value: float) -> int:
+        """
+        1-based rank of value, highest first. Equal values share a rank
+        ("1224" ranking): the rank is 1 + the number of greater values.
+        """
+        return len(self.values) - bisect_right(self.values, value) + 1
+
+    def percentile_rank(self, value: float) -> float:
+        """
+        Percentage of the group below value, counting ties as half
+        (0-100; the top of a large group is close to 100).
+        """
+        n = len(self.values)
+        if n == 0:
+            return math.nan
+        below = bisect_left(self.values, value)
+        equal = bisect_right(self.values, value) - below
+        return 100.0 * (below + 0.5 * equal) / n
+
+    def percentile(self, p: float) -> float:
+        """
+        The p-th percentile (0-100) of the group, interpolating linearly
+        between the two closest values.
+        """
+        values = self.values
+        if not values:
+            return math.nan
+        position = (len(values) - 1) * p / 100.0
+        lower = math.floor(position)
+        upper = min(lower + 1, len(values) - 1)
+        return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+    @property
+    def median(self) -> float:
+        return self.percentile(50)
+
+    def quartiles(self) -> Tuple[float, float, float]:
+        """(first quartile, median, third quartile)."""
+        return self.percentile(25), self.percentile(50), self.percentile(75)
+
+
+class Rankings:
+    """
+    Sorted student averages for the whole cohort and for each class, and
+    sorted scores for each subject.
+    """
+
+    def __init__(
+        self,
+        students: Iterable[Tuple[str, float]],
+        subject_scores: Optional[Dict[str, Iterable[float]]] = None,
+    ):
+        """
+        students: (class, average) for every student.
+        subject_scores: {subject: every valid score in that subject}.
+        """
+        by_class: Dict[str, List[float]] = {}
+        for student_class, average in students:
+            group = by_class.get(student_class)
+            if group is None:
+                group = by_class[student_class] = []
+            group.append(average)
+
+        self.classes: Dict[str, SortedValues] = {
+            student_class: SortedValues(averages) for student_class, averages in by_class.items()
+        }
+        # Merge the sorted class columns rather than re-sorting everything
+        self.cohort = SortedValues(())
+        self.cohort.values = array("d", heapq.merge(*(group.values for group in self.classes.values())))
+        self.subjects: Dict[str, SortedValues] = {
+            subject: SortedValues(scores) for subject, scores in (subject_scores or {}).items()
+        }
+
+    def class_position(self, student_class: str, average: float) -> Optional[Tuple[int, int, float]]:
+        """(rank, class size, percentile rank) of an average within its class, or None."""
+        group = self.classes.get(student_class)
+        if not group:
+            return None
+        return group.rank(average), len(group), group.percentile_rank(average)
+
+    def cohort_position(self, average: float) -> Optional[Tuple[int, int, float]]:
+        """(rank, cohort size, percentile rank) of an average within the whole cohort, or None."""
+        if not self.cohort:
+            return None
+        return self.cohort.rank(average), len(self.cohort), self.cohort.percentile_rank(average)
+
+    def subject_percentile(self, subject: str, score: float) -> Optional[float]:
+        """Percentile rank of a score within its subject, or None if the subject is unknown."""
+        group = self.subjects.get(subject)
+        if not group:
+            return None
+        return group.percentile_rank(score)
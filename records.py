@@ -0,0 +1,136 @@
+# records.py
+#
+# Compact record types for per-student data held in memory in bulk:
+# summaries (one per student in ClassStatistics) and report data (one per
+# student in a PDF batch). Both use __slots__ and keep scores in an
+# array('d') instead of lists of floats or subject dicts.
+#
+# They still support read-only dict-style access (record["average"],
+# record.get("name")), so code written against the old dicts, such as
+# generate_student_pdf and the report CSV writers, works unchanged;
+# as_dict() returns the plain dict when one is really needed.
+
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+
+class _DictAccess:
+    """Read-only mapping-style access to the fields named in KEYS."""
+
+    __slots__ = ()
+    KEYS: Tuple[str, ...] = ()
+
+    def __getitem__(self, key: str):
+        if key in self.KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key: str, default=None):
+        if key in self.KEYS:
+            return getattr(self, key)
+        return default
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.KEYS
+
+    def as_dict(self) -> Dict:
+        return {key: self[key] for key in self.KEYS}
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={self[key]!r}" for key in self.KEYS)
+        return f"{type(self).__name__}({fields})"
+
+
+class StudentSummary(_DictAccess):
+    """
+    A student's scores, average and grade (compact form of the dict
+    returned by grades_utils.calculate_student_summary, plus the class).
+    """
+
+    __slots__ = ("name", "student_class", "scores", "average", "grade")
+    KEYS = ("name", "scores", "average", "grade", "student_class")
+
+    def __init__(self, name: str, student_class: str, scores: array, average: float, grade: str):
+        self.name = name
+        self.student_class = student_class
+        self.scores = scores
+        self.average = average
+        self.grade = grade
+
+    def as_dict(self) -> Dict:
+        summary = super().as_dict()
+        summary["scores"] = self.scores.tolist()
+        return summary
+
+
+class ReportData(_DictAccess):
+    """
+    Everything generate_student_pdf() needs for one student.
+
+    Subjects are kept as a tuple of names (shared by every student from
+    the same roster) plus an array('d') of scores, NaN where the student
+    has no valid score; report["subjects"] builds the list of
+    {"name", "score"} dicts the PDF layout reads, skipping those.
+    """
+
+    __slots__ = (
+        "name", "student_class", "days_present", "days_absent",
+        "subject_names", "scores", "total_score", "average",
+        "class_average", "grade", "comment",
+        "class_rank", "class_size", "class_percentile", "subject_percentiles",
+    )
+    KEYS = (
+        "name", "student_class", "days_present", "days_absent", "subjects",
+        "total_score", "average", "class_average", "grade", "comment",
+        "class_rank", "class_size", "class_percentile",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        student_class: str,
+        days_present: Optional[int],
+        days_absent: Optional[int],
+        subject_names: Tuple[str, ...],
+        scores: array,
+        total_score: float,
+        average: float,
+        class_average: Optional[float],
+        grade: str,
+        comment: Optional[str],
+        class_rank: Optional[int] = None,
+        class_size: Optional[int] = None,
+        class_percentile: Optional[float] = None,
+        subject_percentiles: Optional[array] = None,
+    ):
+        self.name = name
+        self.student_class = student_class
+        self.days_present = days_present
+        self.days_absent = days_absent
+        self.subject_names = subject_names
+        self.scores = scores
+        self.total_score = total_score
+        self.average = average
+        self.class_average = class_average
+        self.grade = grade
+        self.comment = comment
+        # Rank within the class (1 = highest average) and percentile rank (0-100)
+        self.class_rank = class_rank
+        self.class_size = class_size
+        self.class_percentile = class_percentile
+        # Percentile rank of each score within its subject, aligned with scores
+        self.subject_percentiles = subject_percentiles
+
+    @property
+    def subjects(self) -> List[Dict]:
+        if self.subject_percentiles is None:
+            return [
+                {"name": name, "score": score}
+                for name, score in zip(self.subject_names, self.scores)
+                if score == score  # NaN marks a missing score
+            ]
+        return [
+            {"name": name, "score": score, "percentile": percentile}
+            for name, score, percentile in zip(self.subject_names, self.scores, self.subject_percentiles)
+            if score == score
+        ]
@@ -0,0 +1,51 @@
+# report_backends.py
+#
+# Registry of report backends (PDF, ...). Each backend is stored as a
+# "module:function" string and only imported the first time it is used,
+# so paths that never render a report don't pay for fpdf and friends.
+
+import importlib
+from typing import Callable, Dict, List
+
+
+_BACKENDS: Dict[str, str] = {
+    "pdf": "pdf_reports:generate_student_pdf",
+    "class_pdf": "pdf_reports:generate_class_pdf",
+    "pdf_bytes": "pdf_reports:render_student_pdf_bytes",
+}
+
+_loaded: Dict[str, Callable] = {}
+
+
+def register_backend(name: str, target: str) -> None:
+    """
+    Register a report backend as 'module:function'.
+    The function must accept (data, output_path, verbose=True), where data is
+    one report_data dict ("pdf") or a list of them ("class_pdf").
+    In-memory backends such as "pdf_bytes" take (data) and return bytes.
+    """
+    module_name, sep, func_name = target.partition(":")
+    if not sep or not module_name or not func_name:
+        raise ValueError(f"Backend target must look like 'module:function', got '{target}'")
+    _BACKENDS[name] = target
+    _loaded.pop(name, None)
+
+
+def available_backends() -> List[str]:
+    return sorted(_BACKENDS)
+
+
+def get_backend(name: str = "pdf") -> Callable:
+    """
+    Return the render function for a backend, importing its module on first use.
+    Raises KeyError for an unknown backend name.
+    """
+    func = _loaded.get(name)
+    if func is None:
+        if name not in _BACKENDS:
+            raise KeyError(f"Unknown report backend '{name}'. Available: {', '.join(available_backends())}")
+        module_name, _, func_name = _BACKENDS[name].partition(":")
+        module = importlib.import_module(module_name)
+        func = getattr(module, func_name)
+        _loaded[name] = func
+    return func
@@ -1,9 +1,33 @@
 # report_io.py
 
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional, Tuple
+import bz2
 import csv
+import gzip
+import io
+import lzma
+import os
 
+import metrics
 
+
+# Fields written to the report CSV, in order
+REPORT_FIELDNAMES = ["name", "average", "grade", "scores"]
+
+
+def _summary_to_row(summary: Dict) -> Dict[str, str]:
+    # Convert list of scores to a string for CSV
+    scores_str = ", ".join(str(s) for s in summary.get("scores", []))
+
+    return {
+        "name": summary.get("name", ""),
+        "average": f"{summary.get('average', 0):.2f}",
+        "grade": summary.get("grade", ""),
+        "scores": scores_str,
+    }
+
+
+@metrics.timed("report_csv_write")
 def write_student_summaries_to_csv(filepath: str, summaries: List[Dict]) -> None:
     """
     Write a list of student summary dicts to a CSV file.
@@ -18,23 +42,181 @@ def write_student_summaries_to_csv(filepath: str, summaries: List[Dict]) -> None
         print("No summaries to write.")
         return
 
-    # Decide which fields to write to the CSV
-    fieldnames = ["name", "average", "grade", "scores"]
-
     with open(filepath, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDNAMES)
         writer.writeheader()
 
         for summary in summaries:
-            # Convert list of scores to a string for CSV
-            scores_str = ", ".join(str(s) for s in summary.get("scores", []))
+            writer.writerow(_summary_to_row(summary))
 
-            row = {
-                "name": summary.get("name", ""),
-                "average": f"{summary.get('average', 0):.2f}",
-                "grade": summary.get("grade", ""),
-                "scores": scores_str,
-            }
-            writer.writerow(row)
+        metrics.record("report_csv_write", rows=len(summaries), bytes_written=f.tell())
 
     print(f"Report written to {filepath}")
+
+
+def format_student_summaries_csv(summaries: Iterable[Dict]) -> str:
+    """Return the report CSV for the summaries as a string (same format as the file writers)."""
+    buffer = io.StringIO(newline="")
+    writer = csv.DictWriter(buffer, fieldnames=REPORT_FIELDNAMES)
+    writer.writeheader()
+    for summary in summaries:
+        writer.writerow(_summary_to_row(summary))
+    return buffer.getvalue()
+
+
+def write_student_summaries_to_csv_streaming(filepath: str, summaries: Iterable[Dict]) -> int:
+    """
+    Write student summaries to a CSV file as they arrive from an iterable
+    (e.g. a generator), without holding them all in memory.
+    Returns the number of summaries written.
+    """
+    counts = write_student_summaries_bulk(filepath, summaries)
+    count = counts.get(filepath, 0)
+
+    if count == 0:
+        print(f"No summaries to write. {filepath} contains only the header.")
+    else:
+        print(f"Report written to {filepath} ({count} students)")
+    return count
+
+
+# ---------- BULK WRITER ----------
+
+# Compression name -> file suffix
+COMPRESSION_SUFFIXES = {
+    "gzip": ".gz",
+    "bz2": ".bz2",
+    "xz": ".xz",
+    "zstd": ".zst",
+}
+
+# Rows buffered per output file before each writerows() call
+DEFAULT_BATCH_SIZE = 10_000
+
+# Buffer size for uncompressed output files
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def compression_from_path(filepath: str) -> Optional[str]:
+    """Return the compression implied by a file's suffix (e.g. '.gz' -> 'gzip'), or None."""
+    for name, suffix in COMPRESSION_SUFFIXES.items():
+        if filepath.endswith(suffix):
+            return name
+    return None
+
+
+def _open_text_output(filepath: str, compression: Optional[str]):
+    """Open filepath for writing CSV text, compressed if requested."""
+    if compression is None:
+        return open(filepath, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER_SIZE)
+    if compression == "gzip":
+        return gzip.open(filepath, "wt", newline="", encoding="utf-8")
+    if compression == "bz2":
+        return bz2.open(filepath, "wt", newline="", encoding="utf-8")
+    if compression == "xz":
+        return lzma.open(filepath, "wt", newline="", encoding="utf-8")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+        return zstandard.open(filepath, "wt", newline="", encoding="utf-8")
+    raise ValueError(
+        f"Unknown compression '{compression}'. Choose from: {', '.join(COMPRESSION_SUFFIXES)}"
+    )
+
+
+def _summary_to_tuple(summary: Dict) -> Tuple:
+    return (
+        summary.get("name", ""),
+        f"{summary.get('average', 0):.2f}",
+        summary.get("grade", ""),
+        ", ".join(map(str, summary.get("scores", ()))),
+    )
+
+
+def shard_path(filepath: str, student_class: str) -> str:
+    """
+    Return the output path of one class's shard:
+    'report.csv.gz' + 'JS2A' -> 'report_JS2A.csv.gz'.
+    """
+    directory, filename = os.path.split(filepath)
+    stem, dot, extension = filename.partition(".")
+    safe_class = (student_class or "N/A").replace(" ", "_").replace("/", "_")
+    return os.path.join(directory, f"{stem}_{safe_class}{dot}{extension}")
+
+
+class _ShardWriter:
+    """One output file with its csv writer and a buffer of pending rows."""
+
+    def __init__(self, filepath: str, compression: Optional[str]):
+        self.filepath = filepath
+        self.file = _open_text_output(filepath, compression)
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(REPORT_FIELDNAMES)
+        self.pending: List[Tuple] = []
+        self.count = 0
+
+    def flush(self) -> None:
+        if self.pending:
+            self.writer.writerows(self.pending)
+            self.count += len(self.pending)
+            self.pending = []
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+@metrics.timed("report_csv_write")
+def write_student_summaries_bulk(
+    filepath: str,
+    summaries: Iterable[Dict],
+    compression: Optional[str] = None,
+    shard_by_class: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    High-throughput report writer.
+
+    Accepts any iterable of summary dicts (a list or a generator), turns
+    each into a tuple row and writes rows in batches of batch_size.
+
+    - compression: None, 'gzip', 'bz2', 'xz' or 'zstd' (needs the
+      zstandard package). If None, it is taken from filepath's suffix.
+      The matching suffix is added to filepath if it is missing.
+    - shard_by_class: write one file per class (summary['student_class']),
+      named like 'report_JS2A.csv' next to filepath.
+
+    Returns {output path: number of rows written}.
+    """
+    if compression is None:
+        compression = compression_from_path(filepath)
+    elif not filepath.endswith(COMPRESSION_SUFFIXES.get(compression, "")):
+        filepath += COMPRESSION_SUFFIXES.get(compression, "")
+
+    shards: Dict[str, _ShardWriter] = {}
+    try:
+        if not shard_by_class:
+            shards[filepath] = _ShardWriter(filepath, compression)
+
+        for summary in summaries:
+            key = shard_path(filepath, summary.get("student_class", "N/A")) if shard_by_class else filepath
+            shard = shards.get(key)
+            if shard is None:
+                shard = shards[key] = _ShardWriter(key, compression)
+            shard.pending.append(_summary_to_tuple(summary))
+            if len(shard.pending) >= batch_size:
+                shard.flush()
+    finally:
+        for shard in shards.values():
+            shard.close()
+
+    counts = {path: shard.count for path, shard in shards.items()}
+    if metrics.is_enabled():
+        metrics.record(
+            "report_csv_write",
+            rows=sum(counts.values()),
+            bytes_written=sum(os.path.getsize(path) for path in counts),
+        )
+    return counts
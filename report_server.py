@@ -0,0 +1,362 @@
+# report_server.py
+#
+# Long-running local HTTP server for report cards.
+#
+# The roster is parsed once and kept in memory with its class statistics
+# and rankings, and reloaded only when the roster file's modification
+# time (or size) changes. Rendered PDFs and the report CSV are kept in a
+# size-bounded LRU cache, which is cleared on every reload.
+#
+# Endpoints (all GET):
+#   /summary                        cohort, class and subject averages (JSON)
+#   /students[?class=JS1A]          student summaries (JSON)
+#   /students/<name>/report.pdf     one student's PDF report (?comment=...)
+#   /report.csv                     the report CSV (same as `cli.py report-csv`)
+#   /stats                          cache hit rate and per-route latency (JSON)
+#
+# Usage:
+#   python cli.py serve --input students_scores.csv --port 8000
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import metrics
+from class_stats import ClassStatistics, RunningStats, build_class_statistics
+from data_io import RosterIndex, normalize_name
+from grades_utils import GradingScale
+from report_backends import get_backend
+from report_io import format_student_summaries_csv
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+
+# Bytes of rendered reports kept in memory (a student PDF is a few KB)
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class LRUBytesCache:
+    """
+    Least-recently-used cache of bytes values, bounded by their total size.
+    Counts hits, misses and evictions. Safe to use from several threads.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: Tuple, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return  # would evict everything else and still not fit
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+            }
+
+
+class RosterSnapshot:
+    """One loaded version of the roster: its index and statistics."""
+
+    __slots__ = ("signature", "index", "class_stats", "loaded_at")
+
+    def __init__(self, signature: Tuple[int, int], index: RosterIndex, class_stats: ClassStatistics):
+        self.signature = signature
+        self.index = index
+        self.class_stats = class_stats
+        self.loaded_at = time.time()
+
+
+def _roster_signature(filepath: str) -> Tuple[int, int]:
+    st = os.stat(filepath)
+    return st.st_mtime_ns, st.st_size
+
+
+class ReportService:
+    """
+    The data behind the HTTP endpoints, independent of HTTP: a warm roster
+    plus the rendered-report cache and request counters. Grades use scale
+    (the default boundaries if None).
+    """
+
+    def __init__(
+        self,
+        filepath: str,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        scale: Optional[GradingScale] = None,
+    ):
+        self.filepath = filepath
+        self.scale = scale
+        self.cache = LRUBytesCache(cache_bytes)
+        self.reloads = 0
+        self._snapshot: Optional[RosterSnapshot] = None
+        self._reload_lock = threading.Lock()
+        self._latency_lock = threading.Lock()
+        self._latency: Dict[str, RunningStats] = {}
+
+    # ---------- roster ----------
+
+    def roster(self) -> RosterSnapshot:
+        """
+        The current roster, reloaded first if the file changed since it
+        was read. Raises FileNotFoundError if the roster is missing.
+        """
+        signature = _roster_signature(self.filepath)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.signature == signature:
+            return snapshot
+        with self._reload_lock:
+            # Another request may have reloaded it while we waited
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.signature != signature:
+                snapshot = self._load(signature)
+            return snapshot
+
+    @metrics.timed("report_server_load")
+    def _load(self, signature: Tuple[int, int]) -> RosterSnapshot:
+        # Imported here so that importing this module stays cheap
+        from main import read_roster_records
+
+        records = read_roster_records(self.filepath)
+        snapshot = RosterSnapshot(signature, RosterIndex(records, signature), build_class_statistics(records, self.scale))
+        snapshot.class_stats.rankings()
+        self._snapshot = snapshot
+        self.cache.clear()
+        self.reloads += 1
+        metrics.record("report_server_load", rows=len(records))
+        return snapshot
+
+    # ---------- endpoints ----------
+
+    def summary(self) -> Dict:
+        stats = self.roster().class_stats
+        best = stats.best_student()
+        worst = stats.worst_student()
+        return {
+            "num_students": stats.num_students,
+            "average": stats.cohort_average,
+            "best": best.as_dict() if best else None,
+            "worst": worst.as_dict() if worst else None,
+            "classes": {
+                student_class: {"num_students": group.count, "average": group.mean}
+                for student_class, group in sorted(stats.classes.items())
+            },
+            "subjects": stats.subject_averages(),
+        }
+
+    def students(self, student_class: Optional[str] = None) -> List[Dict]:
+        summaries = self.roster().class_stats.summaries
+        if student_class is not None:
+            summaries = [s for s in summaries if s.student_class == student_class]
+        return [summary.as_dict() for summary in summaries]
+
+    def report_csv(self) -> bytes:
+        snapshot = self.roster()
+        key = ("report.csv", snapshot.signature)
+        data = self.cache.get(key)
+        if data is None:
+            data = format_student_summaries_csv(snapshot.class_stats.summaries).encode("utf-8")
+            self.cache.put(key, data)
+        return data
+
+    def student_pdf(self, name: str, comment: Optional[str] = None) -> Optional[bytes]:
+        """One student's PDF report, or None if the name is not in the roster or has no scores."""
+        snapshot = self.roster()
+        key = ("pdf", snapshot.signature, normalize_name(name), comment)
+        data = self.cache.get(key)
+        if data is not None:
+            return data
+
+        # Imported here: only PDF requests need them
+        from main import build_report_data_from_row
+
+        matches = snapshot.index.find_all(name)
+        if not matches:
+            return None
+        report_data = build_report_data_from_row(
+            matches[0], self.filepath, comment=comment, class_stats=snapshot.class_stats, scale=self.scale
+        )
+        if report_data is None:
+            return None
+        data = get_backend("pdf_bytes")(report_data)
+        self.cache.put(key, data)
+        return data
+
+    # ---------- counters ----------
+
+    def record_latency(self, route: str, seconds: float) -> None:
+        with self._latency_lock:
+            stats = self._latency.get(route)
+            if stats is None:
+                stats = self._latency[route] = RunningStats()
+            stats.add(seconds * 1000.0)
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshot
+        with self._latency_lock:
+            latency = {
+                route: {
+                    "requests": stats.count,
+                    "mean_ms": stats.mean,
+                    "min_ms": stats.minimum,
+                    "max_ms": stats.maximum,
+                    "stdev_ms": stats.stdev,
+                }
+                for route, stats in self._latency.items()
+            }
+        return {
+            "roster": {
+                "path": self.filepath,
+                "students": snapshot.class_stats.num_students if snapshot else None,
+                "loaded_at": snapshot.loaded_at if snapshot else None,
+                "reloads": self.reloads,
+            },
+            "cache": self.cache.stats(),
+            "latency": latency,
+        }
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """Routes GET requests to the server's ReportService."""
+
+    server_version = "StudentReports/1.0"
+
+    def do_GET(self) -> None:
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        parts = [unquote(part) for part in url.path.split("/") if part]
+        service: ReportService = self.server.service
+
+        route = "/" + "/".join(parts[:1])
+        try:
+            if parts == ["summary"]:
+                self._send_json(service.summary())
+            elif parts == ["students"]:
+                self._send_json(service.students(_first(query, "class")))
+            elif len(parts) == 3 and parts[0] == "students" and parts[2] == "report.pdf":
+                route = "/students/<name>/report.pdf"
+                data = service.student_pdf(parts[1], _first(query, "comment"))
+                if data is None:
+                    self._send_json({"error": f"no report for student '{parts[1]}'"}, status=404)
+                else:
+                    self._send(200, "application/pdf", data)
+            elif parts == ["report.csv"]:
+                self._send(200, "text/csv; charset=utf-8", service.report_csv())
+            elif parts == ["stats"]:
+                self._send_json(service.stats())
+            else:
+                route = "other"
+                self._send_json({"error": f"unknown path '{url.path}'"}, status=404)
+        except FileNotFoundError:
+            self._send_json({"error": f"roster not found: {service.filepath}"}, status=503)
+        except Exception as e:  # keep serving other requests
+            self._send_json({"error": f"{type(e).__name__}: {e}"}, status=500)
+        service.record_latency(route, time.perf_counter() - start)
+
+    def _send(self, status: int, content_type: str, body: bytes) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload, status: int = 200) -> None:
+        self._send(status, "application/json", json.dumps(payload).encode("utf-8"))
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def _first(query: Dict[str, List[str]], key: str) -> Optional[str]:
+    values = query.get(key)
+    return values[0] if values else None
+
+
+def make_server(
+    filepath: str,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    cache_bytes: int = DEFAULT_CACHE_BYTES,
+    verbose: bool = False,
+    scale: Optional[GradingScale] = None,
+) -> ThreadingHTTPServer:
+    """Create (but don't start) a report server; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), ReportRequestHandler)
+    server.daemon_threads = True
+    server.service = ReportService(filepath, cache_bytes, scale)
+    server.verbose = verbose
+    return server
+
+
+def serve(
+    filepath: str,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    cache_bytes: int = DEFAULT_CACHE_BYTES,
+    verbose: bool = False,
+    scale: Optional[GradingScale] = None,
+) -> bool:
+    """Load the roster and serve reports until interrupted (Ctrl+C)."""
+    server = make_server(filepath, host, port, cache_bytes, verbose, scale)
+    try:
+        snapshot = server.service.roster()
+    except FileNotFoundError:
+        print(f"Could not find file: {filepath}")
+        server.server_close()
+        return False
+
+    host, port = server.server_address[:2]
+    print(f"Loaded {snapshot.class_stats.num_students} student(s) from {filepath}.")
+    print(f"Serving reports on http://{host}:{port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping server.")
+    finally:
+        server.server_close()
+    return True
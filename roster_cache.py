@@ -0,0 +1,183 @@
+# roster_cache.py
+
+import hashlib
+import json
+import os
+import struct
+from typing import Dict, Optional
+
+import metrics
+from score_table import ScoreTable
+
+
+# File layout:
+#   MAGIC, 4-byte little-endian header length, JSON header,
+#   then the raw bytes of days_present, days_absent, scores and valid
+CACHE_MAGIC = b"SPTCACHE1\n"
+CACHE_SUFFIX = ".cache"
+
+
+def cache_path_for(filepath: str) -> str:
+    """Return the cache file path stored next to the roster CSV."""
+    return filepath + CACHE_SUFFIX
+
+
+def file_sha256(filepath: str) -> str:
+    """Return the SHA-256 hex digest of a file, read in 1 MB chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_info(filepath: str) -> Dict:
+    stat = os.stat(filepath)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+@metrics.timed("roster_cache_write")
+def save_score_table(
+    table: ScoreTable,
+    filepath: str,
+    source_hash: Optional[str] = None,
+    source: Optional[Dict] = None,
+) -> str:
+    """
+    Write a ScoreTable built from 'filepath' to its cache file.
+    source (size and mtime) and source_hash describe the CSV as it was
+    when the table was parsed; take them before parsing, or a CSV edited
+    in between would be cached under its new signature with the old data.
+    Either is read from the file now if not given.
+    The cache is written to a temporary file first, then renamed into place.
+    Returns the cache file path.
+    """
+    cache_path = cache_path_for(filepath)
+    header = {
+        "source": source or _source_info(filepath),
+        "sha256": source_hash or file_sha256(filepath),
+        "subjects": list(table.subjects),
+        "names": table.names,
+        "classes": table.classes,
+        "int_itemsize": table.days_present.itemsize,
+        "num_students": table.num_students,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(CACHE_MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        table.days_present.tofile(f)
+        table.days_absent.tofile(f)
+        table.scores.tofile(f)
+        f.write(table.valid)
+        metrics.record("roster_cache_write", rows=table.num_students, bytes_written=f.tell())
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def _read_cache(cache_path: str):
+    with open(cache_path, "rb") as f:
+        if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+            return None, None
+        (header_len,) = struct.unpack("<I", f.read(4))
+        header = json.loads(f.read(header_len).decode("utf-8"))
+        body = f.read()
+    return header, body
+
+
+def _table_from_cache(header: Dict, body: bytes) -> Optional[ScoreTable]:
+    table = ScoreTable(header["subjects"])
+    if table.days_present.itemsize != header["int_itemsize"]:
+        return None  # written on a platform with a different C long size
+
+    n = header["num_students"]
+    if len(header["names"]) != n or len(header["classes"]) != n:
+        return None
+    cells = n * table.num_subjects
+    int_bytes = n * table.days_present.itemsize
+    score_bytes = cells * table.scores.itemsize
+    if len(body) != 2 * int_bytes + score_bytes + cells:
+        return None
+
+    view = memoryview(body)
+    offset = 0
+    table.days_present.frombytes(view[offset:offset + int_bytes])
+    offset += int_bytes
+    table.days_absent.frombytes(view[offset:offset + int_bytes])
+    offset += int_bytes
+    table.scores.frombytes(view[offset:offset + score_bytes])
+    offset += score_bytes
+    table.valid = bytearray(view[offset:offset + cells])
+    table.names = header["names"]
+    table.classes = header["classes"]
+    return table
+
+
+def load_cached_score_table(filepath: str) -> Optional[ScoreTable]:
+    """
+    Return the cached ScoreTable for a roster CSV, or None if there is no
+    usable cache. Size and mtime are checked first; if they differ, the
+    cache is still used when the content hash matches (e.g. after a touch).
+    """
+    cache_path = cache_path_for(filepath)
+    try:
+        header, body = _read_cache(cache_path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if header is None:
+        return None
+
+    source = _source_info(filepath)
+    try:
+        stat_changed = header["source"] != source
+        if stat_changed:
+            if header["source"]["size"] != source["size"] or header["sha256"] != file_sha256(filepath):
+                return None
+        table = _table_from_cache(header, body)
+    except (KeyError, TypeError, AttributeError, ValueError):
+        # Valid magic but a malformed header: treat it as no cache
+        return None
+
+    if table is not None and stat_changed:
+        # Same content with a new mtime: record it so the next run skips hashing
+        try:
+            save_score_table(table, filepath, header["sha256"], source)
+        except OSError:
+            pass
+    return table
+
+
+@metrics.timed("roster_load")
+def load_score_table(filepath: str, use_cache: bool = True) -> ScoreTable:
+    """
+    Load a roster CSV as a ScoreTable, using the binary cache next to it
+    when the CSV has not changed and rebuilding the cache when it has.
+    Raises FileNotFoundError if the CSV does not exist.
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(filepath)
+
+    if use_cache:
+        table = load_cached_score_table(filepath)
+        if table is not None:
+            metrics.record("roster_load", rows=table.num_students)
+            return table
+
+    if use_cache:
+        # Signature of the bytes about to be parsed (see save_score_table)
+        source = _source_info(filepath)
+        source_hash = file_sha256(filepath)
+
+    table = ScoreTable.from_csv(filepath)
+
+    if use_cache:
+        try:
+            save_score_table(table, filepath, source_hash, source)
+        except OSError as e:
+            print(f"Warning: could not write roster cache for {filepath}: {e}")
+
+    metrics.record("roster_load", rows=table.num_students, invalid_cells=table.invalid_cell_count())
+    return table
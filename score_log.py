@@ -0,0 +1,495 @@
+# score_log.py
+#
+# Append-only log of score events (timestamp, student, class, subject,
+# score) with running aggregates, for scores that arrive one at a time
+# during exam week instead of as an edited roster CSV.
+#
+# Every event is appended to the log and applied to in-memory aggregates
+# in O(1): each student's current scores, plus the mean and variance of
+# student averages per class and for the cohort, and of scores per subject.
+# A later event for the same student and subject replaces the earlier
+# score (a correction); events older than the score they would replace
+# are ignored, so out-of-order delivery is harmless.
+#
+# Files:
+#   scores.log                 header line, then one CSV line per event
+#   scores.log.snapshot.json   the student state plus the log offset it
+#                              covers, written every snapshot_every events
+#
+# On open, the snapshot is loaded and only the log after its offset is
+# replayed. compact() rewrites the log as one event per current score and
+# bumps the log's generation number; a snapshot from another generation
+# is ignored, so a crash between the two steps just replays the (short)
+# compacted log.
+
+import csv
+import io
+import json
+import math
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import metrics
+from data_io import normalize_name
+
+# Events applied between automatic snapshots
+DEFAULT_SNAPSHOT_EVERY = 10_000
+
+SNAPSHOT_SUFFIX = ".snapshot.json"
+SNAPSHOT_VERSION = 1
+
+_HEADER_PREFIX = "#score-log v1 generation="
+
+
+class ScoreEvent(NamedTuple):
+    timestamp: float  # seconds since the epoch
+    student: str
+    student_class: str  # "" means: keep the student's known class
+    subject: str
+    score: float
+
+
+def parse_timestamp(value: Optional[str]) -> float:
+    """
+    Parse an event time: seconds since the epoch, or an ISO 8601 date/time.
+    Blank means now. Raises ValueError for anything else.
+    """
+    if value is None or not value.strip():
+        return time.time()
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def make_event(
+    name: Optional[str],
+    subject: Optional[str],
+    score,
+    student_class: Optional[str] = None,
+    timestamp: Optional[str] = None,
+) -> ScoreEvent:
+    """Build a ScoreEvent from user input. Raises ValueError if a field is missing or invalid."""
+    name = (name or "").strip()
+    subject = (subject or "").strip()
+    if not name or not subject:
+        raise ValueError("a score event needs a student name and a subject")
+    try:
+        score = float(score)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid score {score!r}")
+    if score != score:
+        raise ValueError("score is NaN")
+    return ScoreEvent(parse_timestamp(timestamp), name, (student_class or "").strip(), subject, score)
+
+
+class OnlineMoments:
+    """
+    Count, mean and variance of a multiset of values that can grow and
+    shrink (Welford's update, run backwards to remove a value), so a
+    replaced score costs O(1) instead of a rescan.
+    """
+
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def remove(self, value: float) -> None:
+        """Remove a value previously added."""
+        if self.count <= 1:
+            self.count = 0
+            self.mean = 0.0
+            self._m2 = 0.0
+            return
+        old_mean = self.mean
+        self.count -= 1
+        self.mean = (old_mean * (self.count + 1) - value) / self.count
+        self._m2 -= (value - old_mean) * (value - self.mean)
+
+    def replace(self, old: float, new: float) -> None:
+        self.remove(old)
+        self.add(new)
+
+    @property
+    def variance(self) -> Optional[float]:
+        """Population variance (None if empty)."""
+        if self.count == 0:
+            return None
+        # Rounding in remove() can leave a tiny negative remainder
+        return max(self._m2, 0.0) / self.count
+
+    @property
+    def stdev(self) -> Optional[float]:
+        variance = self.variance
+        return None if variance is None else math.sqrt(variance)
+
+
+class StudentState:
+    """A student's current score per subject, with when each was recorded."""
+
+    __slots__ = ("name", "student_class", "scores", "total")
+
+    def __init__(self, name: str, student_class: str):
+        self.name = name
+        self.student_class = student_class
+        self.scores: Dict[str, Tuple[float, float]] = {}  # subject -> (score, timestamp)
+        self.total = 0.0
+
+    @property
+    def average(self) -> Optional[float]:
+        return self.total / len(self.scores) if self.scores else None
+
+
+class ScoreAggregates:
+    """
+    Running aggregates over the current scores.
+
+    Holds:
+    - students: StudentState per normalized name
+    - classes: OnlineMoments over student averages, per class
+    - cohort: OnlineMoments over every student's average
+    - subjects: OnlineMoments over scores, per subject (first-seen order)
+    """
+
+    def __init__(self):
+        self.students: Dict[str, StudentState] = {}
+        self.classes: Dict[str, OnlineMoments] = {}
+        self.subjects: Dict[str, OnlineMoments] = {}
+        self.cohort = OnlineMoments()
+
+    def apply(self, event: ScoreEvent) -> bool:
+        """
+        Apply one event in O(1). Returns False (and changes nothing) if
+        the student already has a newer score for the subject.
+        """
+        key = normalize_name(event.student)
+        student = self.students.get(key)
+        if student is None:
+            student = self.students[key] = StudentState(event.student.strip(), event.student_class or "N/A")
+
+        previous = student.scores.get(event.subject)
+        if previous is not None and previous[1] > event.timestamp:
+            return False
+
+        old_average = student.average
+        old_class = student.student_class
+
+        subject_stats = self.subjects.get(event.subject)
+        if subject_stats is None:
+            subject_stats = self.subjects[event.subject] = OnlineMoments()
+        if previous is None:
+            subject_stats.add(event.score)
+            student.total += event.score
+        else:
+            subject_stats.replace(previous[0], event.score)
+            student.total += event.score - previous[0]
+        student.scores[event.subject] = (event.score, event.timestamp)
+        if event.student_class:
+            student.student_class = event.student_class
+
+        self._move_average(old_class, old_average, student.student_class, student.average)
+        return True
+
+    def _move_average(self, old_class: str, old_average: Optional[float], new_class: str, new_average: float) -> None:
+        if old_average is None:
+            self.cohort.add(new_average)
+        else:
+            self.cohort.replace(old_average, new_average)
+            self.classes[old_class].remove(old_average)
+        class_stats = self.classes.get(new_class)
+        if class_stats is None:
+            class_stats = self.classes[new_class] = OnlineMoments()
+        class_stats.add(new_average)
+
+    def student(self, name: str) -> Optional[StudentState]:
+        return self.students.get(normalize_name(name))
+
+    def class_average(self, student_class: str) -> Optional[float]:
+        stats = self.classes.get(student_class)
+        return stats.mean if stats and stats.count else None
+
+    def subject_average(self, subject: str) -> Optional[float]:
+        stats = self.subjects.get(subject)
+        return stats.mean if stats and stats.count else None
+
+    def iter_current_events(self) -> Iterator[ScoreEvent]:
+        """One event per current score (what a compacted log holds)."""
+        for student in self.students.values():
+            for subject, (score, timestamp) in student.scores.items():
+                yield ScoreEvent(timestamp, student.name, student.student_class, subject, score)
+
+
+# ---------- LOG FILE ----------
+
+def _encode_event(event: ScoreEvent) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(
+        [repr(event.timestamp), event.student, event.student_class, event.subject, repr(event.score)]
+    )
+    return buffer.getvalue().encode("utf-8")
+
+
+def _decode_events(data: bytes) -> Iterator[ScoreEvent]:
+    for row in csv.reader(io.StringIO(data.decode("utf-8"), newline="")):
+        if len(row) == 5:
+            timestamp, student, student_class, subject, score = row
+            yield ScoreEvent(float(timestamp), student, student_class, subject, float(score))
+
+
+def _header_line(generation: int) -> bytes:
+    return f"{_HEADER_PREFIX}{generation}\n".encode("utf-8")
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ScoreLog:
+    """
+    An append-only score event log and the aggregates it implies.
+    Opening it recovers the aggregates from the latest snapshot plus the
+    events logged after it. Use as a context manager, or call close().
+    """
+
+    def __init__(
+        self,
+        log_path: str,
+        snapshot_every: int = DEFAULT_SNAPSHOT_EVERY,
+        fsync: bool = False,
+        create: bool = True,
+    ):
+        """
+        snapshot_every: events between automatic snapshots (0 disables them).
+        fsync: flush every append to disk before returning.
+        create: start an empty log if log_path does not exist; with
+        create=False a missing log raises FileNotFoundError.
+        Raises ValueError if log_path exists but is not a score log.
+        """
+        self.log_path = log_path
+        self.snapshot_path = log_path + SNAPSHOT_SUFFIX
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.aggregates = ScoreAggregates()
+        self.generation = 1
+        # Events recovered from the log tail on open, and logged since the last snapshot
+        self.replayed = 0
+        self.unsnapshotted = 0
+        self._file = None
+        self._recover(create)
+
+    def __enter__(self) -> "ScoreLog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ---------- recovery ----------
+
+    @metrics.timed("score_log_recover")
+    def _recover(self, create: bool) -> None:
+        if not os.path.exists(self.log_path):
+            if not create:
+                raise FileNotFoundError(self.log_path)
+            _write_atomic(self.log_path, _header_line(self.generation))
+
+        with open(self.log_path, "rb") as f:
+            header = f.readline()
+            data_start = f.tell()
+            if not header.startswith(_HEADER_PREFIX.encode("utf-8")):
+                raise ValueError(f"{self.log_path} is not a score log")
+            self.generation = int(header[len(_HEADER_PREFIX):])
+
+            start = self._load_snapshot(data_start)
+            f.seek(start)
+            tail = f.read()
+
+        # A crash mid-append can leave a partial last line: drop it
+        complete = tail.rfind(b"\n") + 1
+        if complete < len(tail):
+            with open(self.log_path, "r+b") as f:
+                f.truncate(start + complete)
+
+        for event in _decode_events(tail[:complete]):
+            self.aggregates.apply(event)
+            self.replayed += 1
+        self.unsnapshotted = self.replayed
+        metrics.record("score_log_recover", rows=self.replayed)
+
+        self._file = open(self.log_path, "ab")
+
+    def _load_snapshot(self, data_start: int) -> int:
+        """Load the snapshot if it matches the log; returns the offset to replay from."""
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return data_start
+        if (snapshot.get("version") != SNAPSHOT_VERSION
+                or snapshot.get("generation") != self.generation
+                or snapshot.get("offset", 0) > os.path.getsize(self.log_path)):
+            return data_start
+
+        aggregates = self.aggregates
+        for name, student_class, scores in snapshot["students"]:
+            for subject, (score, timestamp) in scores.items():
+                aggregates.apply(ScoreEvent(timestamp, name, student_class, subject, score))
+        return snapshot["offset"]
+
+    # ---------- writing ----------
+
+    def append(self, event: ScoreEvent) -> bool:
+        """Log one event and apply it. Returns False if it was older than the current score."""
+        self._file.write(_encode_event(event))
+        self._flush()
+        return self._applied(event)
+
+    def append_many(self, events: Iterable[ScoreEvent]) -> int:
+        """Log and apply many events with one flush. Returns the number applied."""
+        applied = 0
+        for event in events:
+            self._file.write(_encode_event(event))
+            if self._applied(event, snapshot=False):
+                applied += 1
+        self._flush()
+        if self.snapshot_every and self.unsnapshotted >= self.snapshot_every:
+            self.snapshot()
+        return applied
+
+    def _applied(self, event: ScoreEvent, snapshot: bool = True) -> bool:
+        applied = self.aggregates.apply(event)
+        self.unsnapshotted += 1
+        if snapshot and self.snapshot_every and self.unsnapshotted >= self.snapshot_every:
+            self._flush()
+            self.snapshot()
+        return applied
+
+    def _flush(self) -> None:
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    @metrics.timed("score_log_snapshot")
+    def snapshot(self) -> None:
+        """Save the current state and the log offset it covers."""
+        self._file.flush()
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "generation": self.generation,
+            "offset": self._file.tell(),
+            "students": [
+                [student.name, student.student_class,
+                 {subject: list(value) for subject, value in student.scores.items()}]
+                for student in self.aggregates.students.values()
+            ],
+        }
+        _write_atomic(self.snapshot_path, json.dumps(snapshot).encode("utf-8"))
+        self.unsnapshotted = 0
+        metrics.record("score_log_snapshot", rows=len(snapshot["students"]))
+
+    @metrics.timed("score_log_compact")
+    def compact(self) -> Tuple[int, int]:
+        """
+        Rewrite the log as one event per current score, dropping replaced
+        ones, and snapshot it. Returns (log size before, log size after) in bytes.
+        """
+        self._file.flush()
+        size_before = self._file.tell()
+        generation = self.generation + 1
+        data = bytearray(_header_line(generation))
+        for event in self.aggregates.iter_current_events():
+            data += _encode_event(event)
+
+        self._file.close()
+        _write_atomic(self.log_path, bytes(data))
+        self.generation = generation
+        self._file = open(self.log_path, "ab")
+        self.snapshot()
+        return size_before, len(data)
+
+    # ---------- output ----------
+
+    def export_roster(self, filepath: str) -> int:
+        """
+        Write the current scores as a roster CSV (name, class, one column
+        per subject) usable by every other command. Returns the number of students.
+        """
+        subjects = list(self.aggregates.subjects)
+        with open(filepath, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "class"] + subjects)
+            for student in self.aggregates.students.values():
+                scores = student.scores
+                writer.writerow(
+                    [student.name, student.student_class]
+                    + [_format_score(scores[s][0]) if s in scores else "" for s in subjects]
+                )
+        return len(self.aggregates.students)
+
+
+def _format_score(score: float) -> str:
+    return str(int(score)) if score.is_integer() else repr(score)
+
+
+def read_events_csv(filepath: str) -> List[ScoreEvent]:
+    """
+    Read score events from a CSV with columns name, subject, score and
+    optionally class and timestamp (epoch seconds or ISO 8601; blank = now).
+    Raises ValueError for a row with a missing or non-numeric score.
+    """
+    events: List[ScoreEvent] = []
+    with open(filepath, newline="", encoding="utf-8") as f:
+        for line_number, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                events.append(make_event(
+                    row.get("name"), row.get("subject"), row.get("score"),
+                    row.get("class"), row.get("timestamp"),
+                ))
+            except ValueError as e:
+                raise ValueError(f"{filepath}, line {line_number}: {e}")
+    return events
+
+
+def show_score_log_summary(aggregates: ScoreAggregates) -> bool:
+    """Print cohort, class and subject figures from the running aggregates."""
+    print("\n=== SCORE LOG SUMMARY ===")
+    if aggregates.cohort.count == 0:
+        print("No scores logged yet.")
+        return False
+
+    cohort = aggregates.cohort
+    print(f"\nStudents           : {cohort.count}")
+    print(f"Average            : {cohort.mean:.2f} (stdev {cohort.stdev:.2f})")
+
+    print("\n--- Classes ---")
+    for student_class in sorted(aggregates.classes):
+        stats = aggregates.classes[student_class]
+        if stats.count:
+            print(f"{student_class}: {stats.mean:.2f} (n={stats.count}, stdev {stats.stdev:.2f})")
+
+    print("\n--- Subjects ---")
+    for subject, stats in aggregates.subjects.items():
+        print(f"{subject}: {stats.mean:.2f} (n={stats.count}, stdev {stats.stdev:.2f})")
+    print()
+    return True
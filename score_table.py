@@ -0,0 +1,213 @@
+# score_table.py
+
+import math
+import operator
+import sys
+from array import array
+from itertools import compress, repeat
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from data_io import StudentRecord, iter_student_records
+from grades_utils import GradingScale, grade_scores
+
+
+# Stored in the attendance arrays when the CSV value is blank or invalid
+MISSING_DAYS = -1
+
+
+class ScoreTable:
+    """
+    Columnar store of a roster: one students x subjects matrix of scores.
+
+    - scores: array('d') holding the matrix row by row (student-major)
+    - valid:  bytearray of the same length, 1 where the cell held a number
+              (invalid cells hold NaN in scores)
+    - names, classes: parallel lists of strings (class names are interned)
+    - days_present, days_absent: array('l'), MISSING_DAYS when unknown
+
+    Statistics are computed with slices and itertools.compress over the
+    flat arrays, so the per-cell work stays in C instead of Python loops.
+    """
+
+    def __init__(self, subjects: Iterable[str]):
+        self.subjects: Tuple[str, ...] = tuple(subjects)
+        self.names: List[str] = []
+        self.classes: List[str] = []
+        self.days_present = array("l")
+        self.days_absent = array("l")
+        self.scores = array("d")
+        self.valid = bytearray()
+
+    @property
+    def num_students(self) -> int:
+        return len(self.names)
+
+    @property
+    def num_subjects(self) -> int:
+        return len(self.subjects)
+
+    def append(self, record: StudentRecord) -> None:
+        """Add one student record; its subjects must match the table's."""
+        self.names.append(record.name)
+        self.classes.append(sys.intern(record.student_class))
+        self.days_present.append(MISSING_DAYS if record.days_present is None else record.days_present)
+        self.days_absent.append(MISSING_DAYS if record.days_absent is None else record.days_absent)
+        self.scores.extend(record.scores)
+        # NaN (a missing score) is the only value not equal to itself
+        self.valid.extend(score == score for score in record.scores)
+
+    @classmethod
+    def from_records(cls, records: Iterable[StudentRecord]) -> "ScoreTable":
+        table = None
+        for record in records:
+            if table is None:
+                table = cls(record.subjects)
+            table.append(record)
+        return table if table is not None else cls(())
+
+    @classmethod
+    def from_csv(cls, filepath: str) -> "ScoreTable":
+        """Build a ScoreTable from a roster CSV. Raises FileNotFoundError if missing."""
+        return cls.from_records(iter_student_records(filepath))
+
+    # ---------- column / row access ----------
+
+    def column(self, j: int) -> Tuple[array, bytearray]:
+        """Return (scores, valid mask) for subject column j."""
+        step = self.num_subjects
+        return self.scores[j::step], self.valid[j::step]
+
+    def row(self, i: int) -> Tuple[array, bytearray]:
+        """Return (scores, valid mask) for student i."""
+        step = self.num_subjects
+        return self.scores[i * step:(i + 1) * step], self.valid[i * step:(i + 1) * step]
+
+    def student_scores(self) -> List[array]:
+        """Each student's valid scores as array('d'), in roster order."""
+        step = self.num_subjects
+        if step == 0:
+            return [array("d") for _ in self.names]
+        scores, valid = self.scores, self.valid
+        return [
+            array("d", compress(scores[k:k + step], valid[k:k + step]))
+            for k in range(0, len(scores), step)
+        ]
+
+    def invalid_cell_count(self) -> int:
+        """Number of blank or non-numeric score cells."""
+        return len(self.valid) - sum(self.valid)
+
+    # ---------- statistics ----------
+
+    def subject_counts(self) -> Dict[str, int]:
+        return {subject: sum(self.valid[j::self.num_subjects]) for j, subject in enumerate(self.subjects)}
+
+    def subject_means(self) -> Dict[str, Optional[float]]:
+        """Average score per subject, ignoring invalid cells (None if no valid cells)."""
+        means: Dict[str, Optional[float]] = {}
+        for j, subject in enumerate(self.subjects):
+            values, mask = self.column(j)
+            count = sum(mask)
+            means[subject] = math.fsum(compress(values, mask)) / count if count else None
+        return means
+
+    def student_averages(self) -> array:
+        """
+        Average score per student, as array('d') in roster order.
+        Students with no valid scores get NaN.
+
+        Sums and counts are accumulated one subject column at a time with
+        map(), so there is no Python-level loop over students; only the
+        invalid cells and the students without scores are visited one by one.
+        """
+        n = self.num_students
+        step = self.num_subjects
+        if n == 0:
+            return array("d")
+
+        # Scores with invalid (NaN) cells zeroed, so columns can be added up
+        filled = array("d", self.scores)
+        for k in compress(range(len(self.valid)), map(operator.not_, self.valid)):
+            filled[k] = 0.0
+
+        sums: Iterable[float] = repeat(0.0, n)
+        counts: Iterable[int] = repeat(0, n)
+        for j in range(step):
+            sums = list(map(operator.add, sums, filled[j::step]))
+            counts = list(map(operator.add, counts, self.valid[j::step]))
+
+        averages = array("d", map(operator.truediv, sums, map(max, counts, repeat(1))))
+        for i in compress(range(n), map(operator.not_, counts)):
+            averages[i] = math.nan
+        return averages
+
+    def grades(
+        self,
+        averages: Optional[array] = None,
+        scale: Optional[GradingScale] = None,
+    ) -> List[Optional[str]]:
+        """Letter grade per student (None for students with no valid scores)."""
+        return self.grade_with_distribution(averages, scale)[0]
+
+    def grade_with_distribution(
+        self,
+        averages: Optional[array] = None,
+        scale: Optional[GradingScale] = None,
+    ) -> Tuple[List[Optional[str]], Dict[str, int]]:
+        """
+        Grade every student in one pass with the given scale (default
+        boundaries if None). Returns (grades, histogram of students per grade).
+        """
+        if averages is None:
+            averages = self.student_averages()
+        return grade_scores(averages, scale)
+
+    def cohort_summary(self, averages: Optional[array] = None) -> Optional[Dict]:
+        """
+        Number of students with scores, the average of their averages, and
+        the top and lowest students as {"name", "average"} (the first one
+        in roster order on ties), or None if no student has a valid score.
+        Same shape as sqlite_store.StudentStore.cohort_summary().
+        """
+        if averages is None:
+            averages = self.student_averages()
+        # NaN (no valid scores) is the only value not equal to itself
+        scored = list(compress(range(len(averages)), map(operator.eq, averages, averages)))
+        if not scored:
+            return None
+        best = max(scored, key=averages.__getitem__)
+        worst = min(scored, key=averages.__getitem__)
+        return {
+            "num_students": len(scored),
+            "average": math.fsum(compress(averages, map(operator.eq, averages, averages))) / len(scored),
+            "best": {"name": self.names[best], "average": averages[best]},
+            "worst": {"name": self.names[worst], "average": averages[worst]},
+        }
+
+    def class_rollup(self, averages: Optional[array] = None) -> Dict[str, Dict]:
+        """
+        Per-class statistics over student averages.
+        Returns {class: {"count", "average", "min", "max", "variance"}}
+        (population variance); students with no valid scores are left out.
+        """
+        if averages is None:
+            averages = self.student_averages()
+
+        grouped: Dict[str, List[float]] = {}
+        scored = map(operator.eq, averages, averages)
+        for student_class, avg in compress(zip(self.classes, averages), scored):
+            grouped.setdefault(student_class, []).append(avg)
+
+        rollup: Dict[str, Dict] = {}
+        for student_class, values in grouped.items():
+            count = len(values)
+            average = math.fsum(values) / count
+            deviations = list(map(operator.sub, values, repeat(average)))
+            rollup[student_class] = {
+                "count": count,
+                "average": average,
+                "min": min(values),
+                "max": max(values),
+                "variance": math.fsum(map(operator.mul, deviations, deviations)) / count,
+            }
+        return rollup
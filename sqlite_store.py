@@ -0,0 +1,289 @@
+# sqlite_store.py
+#
+# Optional SQLite storage backend (stdlib sqlite3). A roster CSV can be
+# imported into a normalized database; class summaries and subject
+# averages are then computed by SQL instead of scanning the whole CSV.
+#
+# Any main.py / cli.py function that takes a roster path also accepts a
+# database path ending in .db, .sqlite or .sqlite3.
+
+import csv
+import os
+import sqlite3
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import metrics
+from data_io import RowSchema, normalize_name
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classes (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS students (
+    id       INTEGER PRIMARY KEY,
+    name     TEXT NOT NULL,
+    name_key TEXT NOT NULL,
+    class_id INTEGER NOT NULL REFERENCES classes(id),
+    UNIQUE (name_key, class_id)
+);
+CREATE TABLE IF NOT EXISTS subjects (
+    id   INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS scores (
+    student_id INTEGER NOT NULL REFERENCES students(id),
+    subject_id INTEGER NOT NULL REFERENCES subjects(id),
+    term       TEXT NOT NULL DEFAULT '',
+    score      REAL NOT NULL,
+    PRIMARY KEY (student_id, subject_id, term)
+);
+CREATE TABLE IF NOT EXISTS attendance (
+    student_id   INTEGER NOT NULL REFERENCES students(id),
+    term         TEXT NOT NULL DEFAULT '',
+    days_present INTEGER,
+    days_absent  INTEGER,
+    PRIMARY KEY (student_id, term)
+);
+CREATE INDEX IF NOT EXISTS idx_students_name_key ON students(name_key);
+CREATE INDEX IF NOT EXISTS idx_students_class ON students(class_id);
+CREATE INDEX IF NOT EXISTS idx_scores_subject ON scores(subject_id, term);
+CREATE INDEX IF NOT EXISTS idx_scores_term ON scores(term, student_id);
+"""
+
+# Per-student averages for one term; the other queries build on it
+STUDENT_AVERAGES_SQL = """
+SELECT st.id AS student_id, st.name AS name, c.name AS class_name,
+       AVG(sc.score) AS average, COUNT(sc.score) AS num_scores
+FROM students st
+JOIN classes c ON c.id = st.class_id
+JOIN scores sc ON sc.student_id = st.id AND sc.term = :term
+GROUP BY st.id
+"""
+
+
+def open_store(db_path: str, create: bool = False) -> "StudentStore":
+    """
+    Open a student database. Unless create=True, a missing database raises
+    FileNotFoundError (like a missing CSV) instead of creating an empty one.
+    """
+    if not create and not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+    return StudentStore(db_path)
+
+
+class StudentStore:
+    """
+    A SQLite database of students, classes, subjects, scores and attendance.
+    Scores and attendance are stored per term ('' when no term is given).
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ---------- import ----------
+
+    def _get_or_create(self, cache: Dict, table: str, name: str) -> int:
+        key = name
+        if key not in cache:
+            self.conn.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+            cache[key] = self.conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()[0]
+        return cache[key]
+
+    @metrics.timed("sqlite_import")
+    def import_csv(self, csv_path: str, term: str = "") -> int:
+        """
+        Bulk-import a roster CSV (same format as students_scores.csv) for a term.
+        A student is identified by name (case-insensitive) and class, so
+        importing another term adds to the same students; rows repeating a
+        name within a class are merged. Existing scores for the same
+        students, subjects and term are replaced.
+        Returns the number of student rows imported.
+        """
+        class_ids: Dict[str, int] = {}
+        subject_cache: Dict[str, int] = {}
+        student_ids: Dict = {}
+        score_rows = []
+        attendance_rows = []
+        count = 0
+
+        with open(csv_path, newline="", encoding="utf-8") as f, self.conn:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return 0
+            schema = RowSchema(header)
+            name_position = schema.positions.get("name")
+            subject_ids = [self._get_or_create(subject_cache, "subjects", subject) for subject in schema.subjects]
+
+            for row in reader:
+                # Rows without a name can't be stored as a student
+                if name_position is None or name_position >= len(row) or not row[name_position].strip():
+                    continue
+                record = schema.parse(row)
+                class_id = self._get_or_create(class_ids, "classes", record.student_class)
+
+                key = (normalize_name(record.name), class_id)
+                student_id = student_ids.get(key)
+                if student_id is None:
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO students (name, name_key, class_id) VALUES (?, ?, ?)",
+                        (record.name, key[0], class_id),
+                    )
+                    student_id = self.conn.execute(
+                        "SELECT id FROM students WHERE name_key = ? AND class_id = ?", key
+                    ).fetchone()[0]
+                    student_ids[key] = student_id
+
+                attendance_rows.append((student_id, term, record.days_present, record.days_absent))
+                score_rows.extend(
+                    (student_id, subject_id, term, score)
+                    for subject_id, score in zip(subject_ids, record.scores)
+                    if score == score  # NaN marks a missing score
+                )
+                count += 1
+
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO scores (student_id, subject_id, term, score) VALUES (?, ?, ?, ?)",
+                score_rows,
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO attendance (student_id, term, days_present, days_absent) "
+                "VALUES (?, ?, ?, ?)",
+                attendance_rows,
+            )
+
+        metrics.record("sqlite_import", rows=count)
+        return count
+
+    # ---------- aggregate queries (computed in SQL) ----------
+
+    def subject_averages(self, term: str = "") -> Dict[str, float]:
+        rows = self.conn.execute(
+            """
+            SELECT sj.name AS subject, AVG(sc.score) AS average
+            FROM scores sc JOIN subjects sj ON sj.id = sc.subject_id
+            WHERE sc.term = ?
+            GROUP BY sc.subject_id
+            ORDER BY sc.subject_id
+            """,
+            (term,),
+        ).fetchall()
+        return {row["subject"]: row["average"] for row in rows}
+
+    def cohort_summary(self, term: str = "") -> Optional[Dict]:
+        """
+        Number of students, average of student averages, and the top and
+        lowest students, or None if there are no scores for the term.
+        """
+        totals = self.conn.execute(
+            f"SELECT COUNT(*) AS n, AVG(average) AS average FROM ({STUDENT_AVERAGES_SQL})",
+            {"term": term},
+        ).fetchone()
+        if not totals["n"]:
+            return None
+
+        def extreme(order: str):
+            return self.conn.execute(
+                f"SELECT name, average FROM ({STUDENT_AVERAGES_SQL}) ORDER BY average {order}, student_id LIMIT 1",
+                {"term": term},
+            ).fetchone()
+
+        return {
+            "num_students": totals["n"],
+            "average": totals["average"],
+            "best": dict(extreme("DESC")),
+            "worst": dict(extreme("ASC")),
+        }
+
+    def class_summaries(self, term: str = "") -> Dict[str, Dict]:
+        """Per-class count, average, min and max of student averages."""
+        rows = self.conn.execute(
+            f"""
+            SELECT class_name, COUNT(*) AS count, AVG(average) AS average,
+                   MIN(average) AS min, MAX(average) AS max
+            FROM ({STUDENT_AVERAGES_SQL})
+            GROUP BY class_name
+            ORDER BY class_name
+            """,
+            {"term": term},
+        ).fetchall()
+        return {row["class_name"]: {k: row[k] for k in ("count", "average", "min", "max")} for row in rows}
+
+    # ---------- row-shaped access (for the report functions) ----------
+
+    def subjects(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT name FROM subjects ORDER BY id")]
+
+    def _rows(self, conditions: Sequence[str] = (), params=(), term: str = "") -> Iterator[Dict[str, str]]:
+        """
+        CSV-shaped rows of the students matching every condition (SQL over
+        the aliases st and c, with ? placeholders filled from params).
+        """
+        subjects = self.subjects()
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        students = self.conn.execute(
+            f"""
+            SELECT st.id, st.name, c.name AS class_name, a.days_present, a.days_absent
+            FROM students st
+            JOIN classes c ON c.id = st.class_id
+            LEFT JOIN attendance a ON a.student_id = st.id AND a.term = ?
+            {where}
+            ORDER BY st.id
+            """,
+            (term, *params),
+        )
+        # One query for all the scores, in the same student order
+        scores = self.conn.execute(
+            f"""
+            SELECT sc.student_id, sj.name AS subject, sc.score
+            FROM scores sc
+            JOIN subjects sj ON sj.id = sc.subject_id
+            JOIN students st ON st.id = sc.student_id
+            JOIN classes c ON c.id = st.class_id
+            WHERE {" AND ".join(["sc.term = ?", *conditions])}
+            ORDER BY sc.student_id
+            """,
+            (term, *params),
+        )
+        pending = scores.fetchone()
+
+        for student in students:
+            row = {
+                "name": student["name"],
+                "class": student["class_name"],
+                "days_present": "" if student["days_present"] is None else str(student["days_present"]),
+                "days_absent": "" if student["days_absent"] is None else str(student["days_absent"]),
+            }
+            student_scores = {}
+            while pending is not None and pending["student_id"] == student["id"]:
+                student_scores[pending["subject"]] = pending["score"]
+                pending = scores.fetchone()
+            for subject in subjects:
+                score = student_scores.get(subject)
+                row[subject] = "" if score is None else repr(score)
+            yield row
+
+    def iter_rows(self, term: str = "") -> Iterator[Dict[str, str]]:
+        """Yield every student as a dict shaped like a roster CSV row."""
+        return self._rows(term=term)
+
+    def rows_in_class(self, student_class: str, term: str = "") -> List[Dict[str, str]]:
+        return list(self._rows(["c.name = ?"], (student_class.strip(),), term))
+
+    def find_student_rows(self, name: str, term: str = "") -> List[Dict[str, str]]:
+        """Return every student with this name (case-insensitive) as CSV-shaped rows."""
+        return list(self._rows(["st.name_key = ?"], (normalize_name(name),), term))
@@ -0,0 +1,63 @@
+# ClassStatistics built from a ScoreTable's columns must match the one
+# built row by row.
+
+import random
+
+import pytest
+
+from class_stats import RunningStats, build_class_statistics, build_class_statistics_from_table
+from data_io import iter_student_records
+from grades_utils import GradingScale
+from score_table import ScoreTable
+
+SUBJECTS = ("math", "english", "science")
+
+
+def _roster(tmp_path, students: int = 200, seed: int = 5) -> str:
+    rng = random.Random(seed)
+    lines = ["name,class,days_present,days_absent," + ",".join(SUBJECTS)]
+    for i in range(students):
+        # Blank and non-numeric cells, students without scores and tied averages
+        cells = [rng.choice(["", "x", str(rng.randrange(30, 100)), str(rng.randrange(30, 100))]) for _ in SUBJECTS]
+        lines.append(f"Student {i % 150},{rng.choice(['JS1A', 'JS1B', 'JS2A'])},60,2," + ",".join(cells))
+    path = tmp_path / "roster.csv"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def _assert_same_stats(actual: RunningStats, expected: RunningStats):
+    assert actual.count == expected.count
+    assert actual.mean == pytest.approx(expected.mean)
+    assert actual.minimum == expected.minimum
+    assert actual.maximum == expected.maximum
+    assert actual.stdev == pytest.approx(expected.stdev)
+
+
+@pytest.mark.parametrize("scale", [None, GradingScale([(80, "A"), (55, "B")])])
+def test_table_statistics_match_row_statistics(tmp_path, scale):
+    path = _roster(tmp_path)
+    records = list(iter_student_records(path))
+    expected = build_class_statistics(records, scale)
+    actual = build_class_statistics_from_table(ScoreTable.from_records(records), scale)
+
+    assert [s.as_dict() for s in actual.summaries] == [s.as_dict() for s in expected.summaries]
+    assert actual.best is not None and actual.best.as_dict() == expected.best.as_dict()
+    assert actual.worst.as_dict() == expected.worst.as_dict()
+
+    _assert_same_stats(actual.cohort, expected.cohort)
+    assert actual.classes.keys() == expected.classes.keys()
+    for student_class, stats in expected.classes.items():
+        _assert_same_stats(actual.classes[student_class], stats)
+    assert sorted(actual.subjects) == sorted(expected.subjects)
+    for subject, stats in expected.subjects.items():
+        _assert_same_stats(actual.subjects[subject], stats)
+        assert actual.subject_scores[subject] == expected.subject_scores[subject]
+    assert actual.rankings().class_position("JS1A", 70) == expected.rankings().class_position("JS1A", 70)
+
+
+def test_table_without_scores_gives_empty_statistics(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text("name,class,days_present,days_absent,math\nAda,JS1A,60,2,\n", encoding="utf-8")
+    stats = build_class_statistics_from_table(ScoreTable.from_csv(str(path)))
+    assert stats.summaries == [] and stats.num_students == 0
+    assert stats.best_student() is None and stats.cohort_average is None
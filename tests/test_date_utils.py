@@ -0,0 +1,59 @@
+# The batch date helpers must agree with the scalar ones and mark blank or
+# invalid dates as MISSING_DATE instead of raising.
+
+from datetime import date
+
+import pytest
+
+from date_utils import (
+    MISSING_DATE,
+    calculate_age_in_days,
+    days_between_many,
+    days_in_window,
+    days_since,
+    to_ordinals,
+)
+
+DATES = ["2025-01-06", "", None, "2025-02-30", "junk", " 2025 - 01 - 07 ", "2025-1-8"]
+
+
+def test_to_ordinals_marks_missing_dates():
+    assert list(to_ordinals(DATES)) == [
+        date(2025, 1, 6).toordinal(),
+        MISSING_DATE,
+        MISSING_DATE,
+        MISSING_DATE,
+        MISSING_DATE,
+        date(2025, 1, 7).toordinal(),
+        date(2025, 1, 8).toordinal(),
+    ]
+
+
+def test_days_since_matches_scalar_age():
+    as_of = date(2025, 3, 1)
+    expected = [
+        calculate_age_in_days(value, as_of) if value in (DATES[0], DATES[5], DATES[6]) else MISSING_DATE
+        for value in DATES
+    ]
+    assert list(days_since(DATES, as_of)) == expected
+
+
+def test_days_between_many_keeps_missing_dates_missing():
+    first = to_ordinals(["2025-01-10", "", "2025-01-01"])
+    second = to_ordinals(["2025-01-01", "2025-01-01", "bad"])
+    assert list(days_between_many(first, second)) == [9, MISSING_DATE, MISSING_DATE]
+    with pytest.raises(ValueError):
+        days_between_many(first, second[:2])
+
+
+def test_days_in_window():
+    starts = ["2024-12-01", "2025-01-01", "2025-01-20", "2025-01-31", "2025-02-01", "", "2025-13-01"]
+    assert list(days_in_window(starts, "2025-01-01", "2025-01-31")) == [
+        31,  # before the window: the whole window
+        31,  # on the first day
+        12,
+        1,  # on the last day
+        0,  # after the window
+        MISSING_DATE,
+        MISSING_DATE,
+    ]
@@ -0,0 +1,39 @@
+# Custom grade boundaries must reach every grade that is printed.
+
+import math
+
+import pytest
+
+from grades_utils import (
+    DEFAULT_GRADING_SCALE,
+    GradingScale,
+    get_grade,
+    grade_scores,
+    make_student_summary,
+    parse_grade_boundaries,
+)
+
+STRICT = GradingScale(parse_grade_boundaries("A:75, B:65, C:55, D:45, E:40"))
+
+
+@pytest.mark.parametrize("score", [0, 39.99, 40, 44.5, 45, 50, 59.9, 60, 69.99, 70, 100])
+def test_default_scale_matches_get_grade(score):
+    assert DEFAULT_GRADING_SCALE.grade(score) == get_grade(score)
+
+
+def test_custom_scale_is_used_by_summaries():
+    assert get_grade(72, STRICT) == "B"
+    assert make_student_summary("Ada", [70, 74], "JS1A", STRICT).grade == "B"
+    assert make_student_summary("Ada", [70, 74], "JS1A").grade == "A"
+
+
+def test_grade_many_counts_each_grade():
+    grades, histogram = grade_scores([80, 70, math.nan, 30, 66], STRICT)
+    assert grades == ["A", "B", None, "F", "B"]
+    assert histogram == {"A": 1, "B": 2, "C": 0, "D": 0, "E": 0, "F": 1}
+
+
+@pytest.mark.parametrize("text", ["A75", "A:x", ":75", "A:"])
+def test_bad_boundaries_are_rejected(text):
+    with pytest.raises(ValueError):
+        parse_grade_boundaries(text)
@@ -0,0 +1,137 @@
+# Queries over a history store must return what was ingested, across
+# reopening, replaced terms and the on-disk postings index.
+
+import json
+import math
+import os
+
+import pytest
+
+from history_store import INDEX_FILE, POSTINGS_FILE, HistoryStore, slope_per_year, subject_slopes
+
+HEADER = "name,class,days_present,days_absent,math,english\n"
+TERMS = {
+    "2025-T1": ("2025-01-06", "2025-04-04", HEADER + "Ada,JS1A,60,2,70,80\nPeter,JS1B,58,4,50,\nGrace,JS1A,61,1,90,60\n"),
+    "2025-T2": ("2025-04-28", "2025-07-25", HEADER + "Grace,JS1A,62,0,80,70\nAda,JS1A,59,3,76,82\n"),
+    "2025-T3": ("2025-09-08", "2025-12-12", HEADER + "ada,JS2A,60,2,82,84\nPeter,JS2B,57,5,55,65\n"),
+}
+
+
+def _csv(tmp_path, name: str, text: str) -> str:
+    path = tmp_path / f"{name}.csv"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history"), create=True)
+    for term, (start, end, text) in TERMS.items():
+        store.add_term(_csv(tmp_path, term, text), term, start, end)
+    return store
+
+
+def _scores(point):
+    return {subject: (score if score == score else None) for subject, score in zip(point.subjects, point.scores)}
+
+
+def test_student_history_reads_each_term(store):
+    history = store.student_history("ADA")
+    assert [point.term.term for point in history] == ["2025-T1", "2025-T2", "2025-T3"]
+    assert [point.student_class for point in history] == ["JS1A", "JS1A", "JS2A"]
+    assert [_scores(point) for point in history] == [
+        {"math": 70, "english": 80}, {"math": 76, "english": 82}, {"math": 82, "english": 84},
+    ]
+    assert store.display_name("ada") == "Ada"
+    assert [point.term.term for point in store.student_history("Peter", start="2025-04-01")] == ["2025-T3"]
+    assert store.student_history("Nobody") == []
+
+
+def test_class_history_averages_the_class_slice(store):
+    history = store.class_history("JS1A")
+    assert [(info.term, students) for info, students, _ in history] == [("2025-T1", 2), ("2025-T2", 2)]
+    assert history[0][2] == {"math": 80, "english": 70}
+    assert store.class_history("JS1B")[0][2] == {"math": 50}
+    assert store.class_history("JS9") == []
+
+
+def test_reopened_store_reads_term_files_and_postings(store, tmp_path):
+    directory = store.directory
+    assert sorted(name for name in os.listdir(directory) if name.startswith("term-")) == [
+        "term-0001.bin", "term-0002.bin", "term-0003.bin",
+    ]
+    assert os.path.exists(os.path.join(directory, POSTINGS_FILE))
+
+    reopened = HistoryStore(directory)
+    assert [info.term for info in reopened.terms] == list(TERMS)
+    assert reopened.term_at("2025-05-01").term == "2025-T2"
+    assert reopened.term_at("2025-08-01") is None
+    for name in ("Ada", "Peter", "Grace"):
+        assert [_scores(p) for p in reopened.student_history(name)] == [_scores(p) for p in store.student_history(name)]
+
+
+def test_re_adding_a_term_replaces_it(store, tmp_path):
+    text = HEADER + "Ada,JS1A,60,2,10,20\nNew Student,JS1C,1,1,30,40\n"
+    assert store.add_term(_csv(tmp_path, "fixed", text), "2025-T2", "2025-04-28", "2025-07-25") == 2
+
+    reopened = HistoryStore(store.directory)
+    assert [info.term for info in reopened.terms] == list(TERMS)
+    assert _scores(reopened.student_history("Ada")[1]) == {"math": 10, "english": 20}
+    assert [point.term.term for point in reopened.student_history("Grace")] == ["2025-T1"]
+    assert [point.term.term for point in reopened.student_history("New Student")] == ["2025-T2"]
+    # The replaced term's file is gone
+    assert sorted(name for name in os.listdir(store.directory) if name.startswith("term-")) == [
+        "term-0001.bin", "term-0003.bin", "term-0004.bin",
+    ]
+
+
+@pytest.mark.parametrize("start, end", [("2025-04-01", "2025-04-30"), ("2024-12-01", "2025-12-31"), ("2025-07-25", "2025-08-01")])
+def test_overlapping_term_is_rejected(store, tmp_path, start, end):
+    with pytest.raises(ValueError, match="overlaps"):
+        store.add_term(_csv(tmp_path, "extra", TERMS["2025-T1"][2]), "extra", start, end)
+    assert [info.term for info in HistoryStore(store.directory).terms] == list(TERMS)
+
+
+def test_term_ending_before_it_starts_is_rejected(store, tmp_path):
+    with pytest.raises(ValueError, match="before it starts"):
+        store.add_term(_csv(tmp_path, "extra", TERMS["2025-T1"][2]), "extra", "2026-02-01", "2026-01-01")
+
+
+def test_large_attendance_is_stored(tmp_path):
+    store = HistoryStore(str(tmp_path / "history"), create=True)
+    text = HEADER + "Ada,JS1A,40000,70000,70,80\n"
+    assert store.add_term(_csv(tmp_path, "t1", text), "T1", "2025-01-06", "2025-04-04") == 1
+    assert _scores(store.student_history("Ada")[0]) == {"math": 70, "english": 80}
+
+
+def test_out_of_range_attendance_names_the_row(tmp_path):
+    store = HistoryStore(str(tmp_path / "history"), create=True)
+    text = HEADER + "Ada,JS1A,60,2,70,80\nPeter,JS1B,3000000000,1,50,60\n"
+    with pytest.raises(ValueError, match="row 2"):
+        store.add_term(_csv(tmp_path, "t1", text), "T1", "2025-01-06", "2025-04-04")
+    assert HistoryStore(store.directory).terms == []
+
+
+def test_store_from_another_version_is_rejected(store):
+    index_path = os.path.join(store.directory, INDEX_FILE)
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    index["version"] = 1
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    with pytest.raises(ValueError):
+        HistoryStore(store.directory)
+
+
+def test_slope_per_year():
+    assert slope_per_year([(0, 50.0), (365, 60.0)]) == pytest.approx(10 * 365.25 / 365)
+    assert slope_per_year([(10, 50.0), (20, 50.0), (30, 50.0)]) == 0
+    assert slope_per_year([(0, 50.0)]) is None
+    assert slope_per_year([(5, 50.0), (5, 70.0)]) is None
+
+
+def test_subject_slopes_follow_each_subject(store):
+    history = store.student_history("Ada")
+    slopes = subject_slopes([(point.term, point.score_map()) for point in history])
+    assert slopes["math"] > slopes["english"] > 0
+    assert math.isfinite(slopes["math"])
@@ -0,0 +1,130 @@
+# An incremental run must redo only the work for changed students and
+# leave the aggregates as a full recompute would.
+
+import json
+import math
+import os
+
+import pytest
+
+import incremental
+from grades_utils import GradingScale
+from incremental import Aggregates, load_state, run_incremental, state_path_for
+
+HEADER = "name,class,days_present,days_absent,math,english\n"
+ROSTER = HEADER + (
+    "Ada Lovelace,JS1A,60,2,98,90\n"
+    "Peter Obi,JS1A,58,4,60,70\n"
+    "Grace Hopper,JS1B,61,1,80,\n"
+)
+
+
+@pytest.fixture
+def roster(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text(ROSTER, encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Record which students each run renders, in process."""
+    calls = []
+    generate = incremental.generate_pdfs_in_parallel
+
+    def render(tasks, workers=None):
+        calls.append(sorted(report_data["name"] for report_data, _ in tasks))
+        return generate(tasks, workers=1)
+
+    monkeypatch.setattr(incremental, "generate_pdfs_in_parallel", render)
+    return calls
+
+
+def _run(roster, tmp_path, **kwargs):
+    return run_incremental(
+        str(roster), str(tmp_path / "report.csv"), output_dir=str(tmp_path / "pdfs"), **kwargs
+    )
+
+
+def _aggregates(roster) -> Aggregates:
+    return Aggregates(load_state(state_path_for(str(roster)))["aggregates"])
+
+
+def test_unchanged_rows_are_not_rendered_again(roster, tmp_path, rendered):
+    assert _run(roster, tmp_path)
+    assert _run(roster, tmp_path)
+    assert rendered == [["Ada Lovelace", "Grace Hopper", "Peter Obi"]]
+
+
+def test_changed_row_updates_aggregates_by_delta(roster, tmp_path, rendered):
+    assert _run(roster, tmp_path)
+    roster.write_text(ROSTER.replace("Peter Obi,JS1A,58,4,60,70", "Peter Obi,JS1A,58,4,90,100"), encoding="utf-8")
+    assert _run(roster, tmp_path)
+
+    # Peter's old scores were removed (-1) and the new ones added (+1)
+    aggregates = _aggregates(roster)
+    assert aggregates.subjects["math"] == [pytest.approx(98 + 90 + 80), 3]
+    assert aggregates.subjects["english"] == [pytest.approx(90 + 100), 2]
+    assert aggregates.classes["JS1A"] == [pytest.approx(94 + 95), 2]
+    assert aggregates.cohort == [pytest.approx(94 + 95 + 80), 3]
+    assert aggregates.class_average("JS1A") == pytest.approx(94.5)
+    assert aggregates.subject_averages()["math"] == pytest.approx(268 / 3)
+
+    # Ada's class average and Grace's math percentile moved with Peter's row
+    assert rendered[1] == ["Ada Lovelace", "Grace Hopper", "Peter Obi"]
+
+
+def test_change_that_moves_nothing_else_renders_one_pdf(roster, tmp_path, rendered):
+    assert _run(roster, tmp_path)
+    roster.write_text(ROSTER.replace("Grace Hopper,JS1B,61,1", "Grace Hopper,JS1B,62,0"), encoding="utf-8")
+    assert _run(roster, tmp_path)
+    assert rendered[1] == ["Grace Hopper"]
+
+
+def test_removed_student_pdf_is_deleted(roster, tmp_path, rendered):
+    assert _run(roster, tmp_path)
+    grace_pdf = tmp_path / "pdfs" / "Grace_Hopper_report.pdf"
+    assert grace_pdf.exists()
+
+    roster.write_text(ROSTER.replace("Grace Hopper,JS1B,61,1,80,\n", ""), encoding="utf-8")
+    assert _run(roster, tmp_path)
+    assert not grace_pdf.exists()
+    assert (tmp_path / "pdfs" / "Ada_Lovelace_report.pdf").exists()
+
+    aggregates = _aggregates(roster)
+    assert aggregates.classes["JS1B"][1] == 0
+    assert aggregates.cohort == [pytest.approx(94 + 65), 2]
+
+
+def test_nameless_rows_are_skipped(roster, tmp_path, rendered):
+    roster.write_text(ROSTER + ",JS1B,50,3,10,20\n  ,JS1B,50,3,30,40\n", encoding="utf-8")
+    assert _run(roster, tmp_path)
+    rows = load_state(state_path_for(str(roster)))["rows"]
+    assert sorted(rows) == ["ada lovelace#1", "grace hopper#1", "peter obi#1"]
+    assert sorted(os.listdir(tmp_path / "pdfs")) == [
+        "Ada_Lovelace_report.pdf", "Grace_Hopper_report.pdf", "Peter_Obi_report.pdf",
+    ]
+
+
+@pytest.mark.parametrize("content", ["[1, 2]", '"text"', "null", '{"version": 0}', "{not json"])
+def test_unusable_state_is_treated_as_empty(tmp_path, content):
+    path = tmp_path / "roster.csv.state.json"
+    path.write_text(content, encoding="utf-8")
+    assert load_state(str(path)) == {}
+
+
+def test_aggregates_round_trip_through_state(roster, tmp_path, rendered):
+    assert _run(roster, tmp_path, generate_pdfs=False)
+    with open(state_path_for(str(roster)), encoding="utf-8") as f:
+        state = json.load(f)
+    aggregates = Aggregates(state["aggregates"])
+    assert aggregates.cohort_average == pytest.approx(math.fsum([94, 65, 80]) / 3)
+    assert rendered == []
+
+
+def test_new_grade_boundaries_redo_every_student(roster, tmp_path, rendered):
+    assert _run(roster, tmp_path)
+    assert _run(roster, tmp_path, scale=GradingScale([(95, "A")]))
+    assert rendered[1] == ["Ada Lovelace", "Grace Hopper", "Peter Obi"]
+    report = (tmp_path / "report.csv").read_text(encoding="utf-8")
+    assert "Ada Lovelace,94.00,F" in report
@@ -0,0 +1,89 @@
+# The memory-mapped scanner must produce the same records as csv.reader.
+
+import pytest
+
+import mmap_csv
+from data_io import _iter_records_csv, iter_student_records
+from mmap_csv import open_mapped_csv
+
+HEADER = "name,class,days_present,days_absent,math,english\n"
+
+ROSTERS = {
+    "plain": HEADER + "Ada,JS1A,60,2,98,97\nPeter,JS1B,58,4,60,55\n",
+    "no_final_newline": HEADER + "Ada,JS1A,60,2,98,97\nPeter,JS1B,58,4,60,55",
+    "blank_lines": HEADER + "\nAda,JS1A,60,2,98,97\n\n\nPeter,JS1B,58,4,60,55\n\n",
+    "invalid_cells": HEADER + "Ada,JS1A,,x,98,\nPeter,,58,4,abc,55.5\n",
+    "ragged": HEADER + "Ada,JS1A,60\nPeter,JS1B,58,4,60,55,extra,cells\nShort\n",
+    "quoted": HEADER
+    + '"Lovelace, Ada",JS1A,60,2,98,97\n'
+    + '"Say ""hi""",JS1B,1,2,3,4\n'
+    + '"Two\nlines",JS1C,5,6,7,8\n'
+    + 'O"Brien,JS1D,9,10,11,12\n',
+}
+
+
+def _crlf(text: str) -> str:
+    return text.replace("\n", "\r\n")
+
+
+CASES = dict(ROSTERS)
+CASES.update({f"{name}_crlf": _crlf(text) for name, text in ROSTERS.items()})
+CASES["crlf_trailing_blank_line"] = _crlf(HEADER + "Ada,JS1A,60,2,98,97\n\n")
+# Excel writes CRLF rows but a bare LF for a line break inside a cell
+CASES["crlf_bare_lf_in_quotes"] = _crlf(HEADER) + '"Ada\nL",JS1A,60,2,98,97\r\nPeter,JS1B,58,4,60,55\r\n'
+
+
+def _comparable(records):
+    # NaN never equals itself, so compare missing scores as None
+    return [
+        record._replace(scores=[score if score == score else None for score in record.scores])
+        for record in records
+    ]
+
+
+def _write(tmp_path, text: str) -> str:
+    path = tmp_path / "roster.csv"
+    path.write_bytes(text.encode("utf-8"))
+    return str(path)
+
+
+@pytest.mark.parametrize("block_size", [mmap_csv.BLOCK_SIZE, 7])
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_mapped_matches_csv_reader(tmp_path, monkeypatch, case, block_size):
+    # A tiny block size puts block boundaries inside most lines
+    monkeypatch.setattr(mmap_csv, "BLOCK_SIZE", block_size)
+    path = _write(tmp_path, CASES[case])
+
+    mapped = open_mapped_csv(path)
+    assert mapped is not None, "expected the memory-mapped path"
+    mapped.close()
+
+    expected = _comparable(_iter_records_csv(path))
+    assert _comparable(iter_student_records(path)) == expected
+
+
+def test_crlf_trailing_blank_line_adds_no_record(tmp_path):
+    path = _write(tmp_path, CASES["crlf_trailing_blank_line"])
+    records = list(iter_student_records(path))
+    assert [record.name for record in records] == ["Ada"]
+    assert records[0].invalid_cells == 0
+
+
+@pytest.mark.parametrize("case", ["quoted_crlf", "crlf_bare_lf_in_quotes"])
+def test_line_breaks_in_quotes_read_as_written(tmp_path, case):
+    path = _write(tmp_path, CASES[case])
+    names = [record.name for record in iter_student_records(path)]
+    assert names == [record.name for record in _iter_records_csv(path)]
+    assert ("Two\r\nlines" in names) if case == "quoted_crlf" else (names[0] == "Ada\nL")
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "﻿" + HEADER + "Ada,JS1A,60,2,98,97\n",
+    '"name",class,days_present,days_absent,math\nAda,JS1A,60,2,98\n',
+    HEADER.replace("\n", "\r") + "Ada,JS1A,60,2,98,97\r",
+])
+def test_unusual_files_fall_back_to_csv_reader(tmp_path, text):
+    path = _write(tmp_path, text)
+    assert open_mapped_csv(path) is None
+    assert _comparable(iter_student_records(path)) == _comparable(_iter_records_csv(path))
@@ -0,0 +1,88 @@
+# Aggregates merged across roster files must equal the aggregates of one
+# file holding all of their rows.
+
+import random
+
+import pytest
+
+from multi_roster import aggregate_roster_file, aggregate_rosters, is_multi_roster_path, resolve_roster_paths
+
+HEADER = "name,class,days_present,days_absent,math,english,science\n"
+
+
+def _rows(rng: random.Random, count: int, school: str):
+    for i in range(count):
+        # Blank and non-numeric cells, and students without any score
+        cells = [rng.choice(["", "x", str(rng.randrange(20, 100)), f"{rng.uniform(20, 100):.1f}"]) for _ in range(3)]
+        yield f"{school} {i},{rng.choice(['JS1A', 'JS1B', 'JS2A'])},60,2,{','.join(cells)}\n"
+
+
+@pytest.fixture
+def rosters(tmp_path):
+    """A directory of rosters in nested folders, plus one CSV holding every row in path order."""
+    rng = random.Random(21)
+    files = {
+        "district/school_a/js1.csv": list(_rows(rng, 40, "A")),
+        "district/school_a/js2.csv": list(_rows(rng, 25, "B")),
+        "district/school_b/all.csv": list(_rows(rng, 60, "C")),
+        "district/school_b/empty.csv": [],
+    }
+    for relative, rows in files.items():
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(HEADER + "".join(rows), encoding="utf-8")
+    (tmp_path / "district" / "notes.txt").write_text("not a roster", encoding="utf-8")
+
+    combined = tmp_path / "combined.csv"
+    combined.write_text(HEADER + "".join(row for _, rows in sorted(files.items()) for row in rows), encoding="utf-8")
+    return tmp_path / "district", str(combined)
+
+
+def _assert_same_group(actual, expected):
+    assert actual.stats.count == expected.stats.count
+    assert actual.stats.mean == pytest.approx(expected.stats.mean)
+    assert actual.stats.stdev == pytest.approx(expected.stats.stdev)
+    assert (actual.stats.minimum, actual.stats.maximum) == (expected.stats.minimum, expected.stats.maximum)
+    assert actual.grade_histogram() == expected.grade_histogram()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_merged_aggregates_match_single_file(rosters, workers):
+    directory, combined = rosters
+    paths = resolve_roster_paths(str(directory))
+    merged = aggregate_rosters(paths, workers=workers)
+    single = aggregate_roster_file(combined)
+
+    assert merged.files == 4
+    assert (merged.rows, merged.invalid_cells) == (single.rows, single.invalid_cells)
+    assert (merged.best, merged.worst) == (single.best, single.worst)
+    _assert_same_group(merged.cohort, single.cohort)
+    assert merged.classes.keys() == single.classes.keys()
+    for key, group in single.classes.items():
+        _assert_same_group(merged.classes[key], group)
+    assert list(merged.subjects) == list(single.subjects)
+    for key, group in single.subjects.items():
+        _assert_same_group(merged.subjects[key], group)
+
+
+def test_resolve_directory_and_glob(rosters):
+    directory, _ = rosters
+    expected = [
+        str(directory / "school_a" / "js1.csv"),
+        str(directory / "school_a" / "js2.csv"),
+        str(directory / "school_b" / "all.csv"),
+        str(directory / "school_b" / "empty.csv"),
+    ]
+    assert resolve_roster_paths(str(directory)) == expected
+    assert resolve_roster_paths(str(directory / "**" / "*.csv")) == expected
+    assert resolve_roster_paths(str(directory / "school_a" / "*.csv")) == expected[:2]
+    assert resolve_roster_paths(str(directory / "nowhere" / "*.csv")) == []
+
+
+def test_multi_roster_path_detection(tmp_path):
+    odd_name = tmp_path / "roster[2024].csv"
+    odd_name.write_text(HEADER, encoding="utf-8")
+    assert not is_multi_roster_path(str(odd_name))
+    assert is_multi_roster_path(str(tmp_path))
+    assert is_multi_roster_path(str(tmp_path / "*.csv"))
+    assert not is_multi_roster_path(str(tmp_path / "missing.csv"))
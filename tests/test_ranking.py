@@ -0,0 +1,95 @@
+# Ranks and percentiles must match a brute-force count over the values.
+
+import math
+import random
+import statistics
+
+import pytest
+
+from ranking import Rankings, SortedValues, bottom_k, top_k
+
+
+def _percentile_rank(values, value):
+    below = sum(v < value for v in values)
+    equal = sum(v == value for v in values)
+    return 100.0 * (below + 0.5 * equal) / len(values)
+
+
+def test_ties_share_a_rank():
+    group = SortedValues([90, 80, 80, 70, 80])
+    assert [group.rank(v) for v in (90, 80, 70)] == [1, 2, 5]
+    assert group.percentile_rank(80) == pytest.approx(50.0)
+    assert group.percentile_rank(90) == pytest.approx(90.0)
+    # Values not in the group rank as if inserted
+    assert group.rank(85) == 2
+    assert group.rank(100) == 1
+
+
+def test_ranks_match_brute_force():
+    rng = random.Random(11)
+    values = [rng.randrange(40, 60) for _ in range(300)]
+    group = SortedValues(values)
+    for value in set(values) | {39, 60, 49.5}:
+        assert group.rank(value) == 1 + sum(v > value for v in values)
+        assert group.percentile_rank(value) == pytest.approx(_percentile_rank(values, value))
+
+
+def test_single_value():
+    group = SortedValues([72.5])
+    assert group.rank(72.5) == 1
+    assert group.percentile_rank(72.5) == 50.0
+    assert group.quartiles() == (72.5, 72.5, 72.5)
+    assert group.percentile(0) == group.percentile(100) == 72.5
+
+
+def test_empty_group():
+    group = SortedValues([])
+    assert len(group) == 0
+    assert group.rank(50) == 1
+    assert math.isnan(group.percentile_rank(50))
+    assert all(math.isnan(q) for q in group.quartiles())
+
+
+@pytest.mark.parametrize("values", [[1, 2, 3, 4], [1, 2, 3, 4, 5], [10, 20], [5, 1, 4, 1, 5, 9, 2, 6]])
+def test_quartiles_match_statistics_inclusive(values):
+    # Linear interpolation between the closest values is the "inclusive" method
+    expected = statistics.quantiles(values, n=4, method="inclusive")
+    assert SortedValues(values).quartiles() == pytest.approx(tuple(expected))
+
+
+def test_percentile_boundaries():
+    group = SortedValues([10, 20, 30, 40, 50])
+    assert group.percentile(0) == 10
+    assert group.percentile(100) == 50
+    assert group.quartiles() == (20, 30, 40)
+    assert group.percentile(12.5) == pytest.approx(15)
+
+
+def test_rankings_by_class_cohort_and_subject():
+    rankings = Rankings(
+        [("JS1A", 70.0), ("JS1B", 90.0), ("JS1A", 80.0), ("JS1A", 80.0)],
+        {"math": [50, 60, 70], "english": []},
+    )
+    assert rankings.class_position("JS1A", 80.0) == (1, 3, pytest.approx(100 * 2 / 3))
+    assert rankings.class_position("JS1A", 70.0) == (3, 3, pytest.approx(100 / 6))
+    assert rankings.class_position("JS1B", 90.0) == (1, 1, 50.0)
+    assert rankings.class_position("JS9", 70.0) is None
+    assert list(rankings.cohort.values) == [70.0, 80.0, 80.0, 90.0]
+    assert rankings.cohort_position(80.0) == (2, 4, 50.0)
+    assert rankings.subject_percentile("math", 70) == pytest.approx(100 * 2.5 / 3)
+    assert rankings.subject_percentile("english", 70) is None
+    assert rankings.subject_percentile("art", 70) is None
+
+
+def test_empty_class_list():
+    rankings = Rankings([])
+    assert rankings.classes == {}
+    assert rankings.cohort_position(50.0) is None
+    assert rankings.class_position("JS1A", 50.0) is None
+
+
+def test_top_and_bottom_k():
+    items = [("a", 3), ("b", 9), ("c", 1), ("d", 9)]
+    assert top_k(items, 2, key=lambda item: item[1]) == [("b", 9), ("d", 9)]
+    assert bottom_k(items, 1, key=lambda item: item[1]) == [("c", 1)]
+    assert top_k([], 3, key=lambda item: item) == []
@@ -0,0 +1,133 @@
+# The report server must cache rendered reports within its budget, reload
+# a changed roster and answer 404 for students it does not have.
+
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+
+import pytest
+
+from report_server import make_server
+
+ROSTER = (
+    "name,class,days_present,days_absent,math,english\n"
+    "Ada Lovelace,JS1A,60,2,98,90\n"
+    "Peter Obi,JS1B,58,4,60,70\n"
+)
+
+
+@pytest.fixture
+def roster(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text(ROSTER, encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def server(roster):
+    server = make_server(str(roster), port=0)
+    # A short poll interval keeps shutdown() quick
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def _get(server, path: str):
+    """(status, body) of a GET request."""
+    host, port = server.server_address[:2]
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}{path}", timeout=10) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        with e:
+            return e.code, e.read()
+
+
+def _json(server, path: str):
+    status, body = _get(server, path)
+    assert status == 200
+    return json.loads(body)
+
+
+def _pdf_path(name: str) -> str:
+    return f"/students/{quote(name)}/report.pdf"
+
+
+def test_pdf_is_served_from_cache(server):
+    status, first = _get(server, _pdf_path("Ada Lovelace"))
+    assert status == 200 and first.startswith(b"%PDF")
+    status, again = _get(server, _pdf_path("ada lovelace"))
+    assert again == first
+    cache = _json(server, "/stats")["cache"]
+    assert (cache["hits"], cache["misses"], cache["entries"]) == (1, 1, 1)
+
+
+def test_least_recently_used_report_is_evicted(server):
+    _, ada = _get(server, _pdf_path("Ada Lovelace"))
+    # Room for one report only
+    server.service.cache.max_bytes = int(len(ada) * 1.5)
+
+    _get(server, _pdf_path("Peter Obi"))
+    cache = _json(server, "/stats")["cache"]
+    assert (cache["entries"], cache["evictions"]) == (1, 1)
+    assert cache["bytes"] <= cache["max_bytes"]
+
+    # Ada's report was evicted, so it is rendered again (a miss)
+    _get(server, _pdf_path("Ada Lovelace"))
+    cache = _json(server, "/stats")["cache"]
+    assert (cache["hits"], cache["misses"], cache["evictions"]) == (0, 3, 2)
+
+
+def test_report_over_budget_is_not_cached(server):
+    server.service.cache.max_bytes = 10
+    status, _ = _get(server, _pdf_path("Ada Lovelace"))
+    assert status == 200
+    assert _json(server, "/stats")["cache"]["entries"] == 0
+
+
+def test_roster_is_reloaded_when_its_size_changes(server, roster):
+    assert _json(server, "/summary")["num_students"] == 2
+    _get(server, "/report.csv")
+    with open(roster, "a", encoding="utf-8") as f:
+        f.write("Grace Hopper,JS1A,61,1,80,70\n")
+
+    assert _json(server, "/summary")["num_students"] == 3
+    status, report = _get(server, "/report.csv")
+    assert status == 200 and b"Grace Hopper" in report
+    stats = _json(server, "/stats")
+    assert stats["roster"]["reloads"] == 2 and stats["roster"]["students"] == 3
+
+
+def test_roster_is_reloaded_when_only_its_mtime_changes(server, roster):
+    assert _json(server, "/students?class=JS1A")[0]["average"] == 94.0
+    stat = os.stat(roster)
+    roster.write_text(ROSTER.replace("98,90", "78,90"), encoding="utf-8")
+    os.utime(roster, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert os.path.getsize(roster) == stat.st_size
+
+    assert _json(server, "/students?class=JS1A")[0]["average"] == 84.0
+    assert _json(server, "/stats")["roster"]["reloads"] == 2
+
+
+def test_unchanged_roster_is_not_reloaded(server):
+    for _ in range(3):
+        _json(server, "/summary")
+    assert _json(server, "/stats")["roster"]["reloads"] == 1
+
+
+def test_unknown_student_is_404(server):
+    status, body = _get(server, _pdf_path("Nobody"))
+    assert status == 404
+    assert "Nobody" in json.loads(body)["error"]
+    assert _get(server, "/no/such/path")[0] == 404
+
+
+def test_missing_roster_is_503(server, roster):
+    os.remove(roster)
+    assert _get(server, "/summary")[0] == 503
@@ -0,0 +1,86 @@
+# The roster cache must never serve data that differs from the CSV.
+
+import json
+import os
+import struct
+
+import pytest
+
+import roster_cache
+from roster_cache import CACHE_MAGIC, cache_path_for, load_cached_score_table, load_score_table
+from score_table import ScoreTable
+
+ROSTER = (
+    "name,class,days_present,days_absent,math,english\n"
+    "Ada,JS1A,60,2,98,97\n"
+    "Peter,JS1B,58,,60,\n"
+)
+
+
+@pytest.fixture
+def roster(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text(ROSTER, encoding="utf-8")
+    return str(path)
+
+
+def _rows(table: ScoreTable):
+    scores = [score if ok else None for score, ok in zip(table.scores, table.valid)]
+    return table.names, table.classes, list(table.days_present), list(table.days_absent), scores
+
+
+def test_cache_round_trip(roster):
+    parsed = load_score_table(roster)
+    assert os.path.exists(cache_path_for(roster))
+    cached = load_cached_score_table(roster)
+    assert cached is not None
+    assert _rows(cached) == _rows(parsed)
+
+
+def test_changed_csv_is_reparsed(roster):
+    load_score_table(roster)
+    with open(roster, "a", encoding="utf-8") as f:
+        f.write("Grace,JS1A,61,1,90,91\n")
+    assert load_cached_score_table(roster) is None
+    assert load_score_table(roster).names == ["Ada", "Peter", "Grace"]
+
+
+def test_touched_csv_uses_cache_after_hash_check(roster):
+    load_score_table(roster)
+    stat = os.stat(roster)
+    os.utime(roster, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    cached = load_cached_score_table(roster)
+    assert cached is not None and cached.names == ["Ada", "Peter"]
+
+
+@pytest.mark.parametrize("header", [
+    {"unexpected": 1},
+    [1, 2, 3],
+    "text",
+    {"source": 5, "sha256": "x"},
+    {"source": {"size": 1}, "sha256": "x"},
+])
+def test_malformed_header_falls_back_to_csv(roster, header):
+    header_bytes = json.dumps(header).encode("utf-8")
+    with open(cache_path_for(roster), "wb") as f:
+        f.write(CACHE_MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+    assert load_cached_score_table(roster) is None
+    assert load_score_table(roster).names == ["Ada", "Peter"]
+
+
+def test_edit_during_parse_is_not_cached_as_current(roster, monkeypatch):
+    from_csv = ScoreTable.from_csv
+
+    def parse_then_edit(filepath):
+        table = from_csv(filepath)
+        with open(filepath, "a", encoding="utf-8") as f:
+            f.write("Grace,JS1A,61,1,90,91\n")
+        return table
+
+    monkeypatch.setattr(roster_cache.ScoreTable, "from_csv", staticmethod(parse_then_edit))
+    assert load_score_table(roster).names == ["Ada", "Peter"]
+    monkeypatch.undo()
+
+    # The cache was signed with the CSV as parsed, so the edit is noticed
+    assert load_cached_score_table(roster) is None
+    assert load_score_table(roster).names == ["Ada", "Peter", "Grace"]
@@ -0,0 +1,139 @@
+# Online aggregates must match a recompute from the latest scores, across
+# snapshots, reopening, torn writes and compaction.
+
+import math
+import random
+
+import pytest
+
+from score_log import OnlineMoments, ScoreAggregates, ScoreEvent, ScoreLog
+
+SUBJECTS = ("math", "english", "science")
+CLASSES = ("JS1A", "JS1B", "JS2A")
+
+
+def _events(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    for _ in range(count):
+        # Timestamps repeat and go backwards, so some events are stale
+        yield ScoreEvent(
+            timestamp=float(rng.randrange(count)),
+            student=f"Student {rng.randrange(40)}",
+            student_class=rng.choice(CLASSES + ("",)),
+            subject=rng.choice(SUBJECTS),
+            score=round(rng.uniform(0, 100), 1),
+        )
+
+
+def _reference(events):
+    aggregates = ScoreAggregates()
+    for event in events:
+        aggregates.apply(event)
+    return aggregates
+
+
+def _assert_same(actual: ScoreAggregates, expected: ScoreAggregates):
+    assert actual.students.keys() == expected.students.keys()
+    for key, student in expected.students.items():
+        other = actual.students[key]
+        assert other.student_class == student.student_class
+        assert other.scores == student.scores
+    for name in ("classes", "subjects"):
+        expected_groups = {k: v for k, v in getattr(expected, name).items() if v.count}
+        actual_groups = {k: v for k, v in getattr(actual, name).items() if v.count}
+        assert actual_groups.keys() == expected_groups.keys()
+        for key, stats in expected_groups.items():
+            assert actual_groups[key].count == stats.count
+            assert actual_groups[key].mean == pytest.approx(stats.mean)
+    assert actual.cohort.mean == pytest.approx(expected.cohort.mean)
+
+
+def test_online_moments_remove_matches_recompute():
+    rng = random.Random(3)
+    values = [rng.uniform(0, 100) for _ in range(200)]
+    moments = OnlineMoments()
+    for value in values:
+        moments.add(value)
+    for value in values[:150]:
+        moments.remove(value)
+    rest = values[150:]
+    mean = math.fsum(rest) / len(rest)
+    assert moments.count == len(rest)
+    assert moments.mean == pytest.approx(mean)
+    assert moments.variance == pytest.approx(math.fsum((v - mean) ** 2 for v in rest) / len(rest))
+
+
+def test_aggregates_match_recompute_from_latest_scores():
+    events = list(_events(2000))
+    aggregates = _reference(events)
+
+    students = list(aggregates.students.values())
+    for subject in SUBJECTS:
+        scores = [s.scores[subject][0] for s in students if subject in s.scores]
+        assert aggregates.subject_average(subject) == pytest.approx(math.fsum(scores) / len(scores))
+    for student_class in CLASSES:
+        averages = [s.average for s in students if s.student_class == student_class]
+        if averages:
+            assert aggregates.class_average(student_class) == pytest.approx(math.fsum(averages) / len(averages))
+    averages = [s.average for s in students]
+    assert aggregates.cohort.mean == pytest.approx(math.fsum(averages) / len(averages))
+
+
+def test_stale_event_is_ignored():
+    aggregates = ScoreAggregates()
+    assert aggregates.apply(ScoreEvent(10.0, "Ada", "JS1A", "math", 90.0))
+    assert not aggregates.apply(ScoreEvent(5.0, "Ada", "JS1A", "math", 10.0))
+    assert aggregates.subject_average("math") == 90.0
+
+
+@pytest.mark.parametrize("snapshot_every", [0, 7, 100])
+def test_reopen_recovers_same_aggregates(tmp_path, snapshot_every):
+    path = str(tmp_path / "scores.log")
+    events = list(_events(500))
+    with ScoreLog(path, snapshot_every=snapshot_every) as log:
+        for event in events[:300]:
+            log.append(event)
+        log.append_many(events[300:])
+
+    with ScoreLog(path) as log:
+        _assert_same(log.aggregates, _reference(events))
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = str(tmp_path / "scores.log")
+    events = list(_events(50))
+    with ScoreLog(path, snapshot_every=0) as log:
+        log.append_many(events)
+    with open(path, "ab") as f:
+        f.write(b"123.0,Half written")
+
+    with ScoreLog(path) as log:
+        _assert_same(log.aggregates, _reference(events))
+    with open(path, "rb") as f:
+        assert f.read().endswith(b"\n")
+
+
+def test_compact_keeps_current_scores(tmp_path):
+    path = str(tmp_path / "scores.log")
+    events = list(_events(1000))
+    with ScoreLog(path) as log:
+        log.append_many(events)
+        before, after = log.compact()
+        assert after < before
+    with ScoreLog(path) as log:
+        _assert_same(log.aggregates, _reference(events))
+
+
+def test_missing_log_is_not_created_without_create(tmp_path):
+    path = tmp_path / "missing.log"
+    with pytest.raises(FileNotFoundError):
+        ScoreLog(str(path), create=False)
+    assert not path.exists()
+
+
+def test_other_file_is_not_a_score_log(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text("name,class\nAda,JS1A\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        ScoreLog(str(path))
+    assert path.read_text(encoding="utf-8") == "name,class\nAda,JS1A\n"
@@ -0,0 +1,83 @@
+# SQL aggregates over an imported roster must match the named rows of the CSV.
+
+import pytest
+
+from sqlite_store import open_store
+
+ROSTER = (
+    "name,class,days_present,days_absent,math,english\n"
+    "Ada Lovelace,JS1A,60,2,98,90\n"
+    ",JS1A,60,2,10,10\n"
+    "Peter Obi,JS1B,58,,60,\n"
+    "   ,JS1B,1,1,20,20\n"
+    "Grace Hopper,JS1A,61,1,x,70\n"
+    "No Scores,JS1B,50,3,,\n"
+)
+
+
+@pytest.fixture
+def roster(tmp_path):
+    path = tmp_path / "roster.csv"
+    path.write_text(ROSTER, encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path, roster):
+    with open_store(str(tmp_path / "roster.db"), create=True) as store:
+        assert store.import_csv(roster) == 4
+        yield store
+
+
+def test_missing_database_is_not_created(tmp_path):
+    path = tmp_path / "missing.db"
+    with pytest.raises(FileNotFoundError):
+        open_store(str(path))
+    assert not path.exists()
+
+
+def test_import_skips_nameless_rows(store):
+    rows = list(store.iter_rows())
+    assert [row["name"] for row in rows] == ["Ada Lovelace", "Peter Obi", "Grace Hopper", "No Scores"]
+    assert rows[1] == {"name": "Peter Obi", "class": "JS1B", "days_present": "58", "days_absent": "",
+                       "math": "60.0", "english": ""}
+    assert rows[2]["math"] == ""
+
+
+def test_subject_averages(store):
+    # Blank and non-numeric cells are not stored; nameless rows are not imported
+    assert store.subject_averages() == pytest.approx({"math": (98 + 60) / 2, "english": (90 + 70) / 2})
+
+
+def test_cohort_summary(store):
+    summary = store.cohort_summary()
+    assert summary["num_students"] == 3
+    assert summary["average"] == pytest.approx((94 + 60 + 70) / 3)
+    assert summary["best"] == {"name": "Ada Lovelace", "average": 94.0}
+    assert summary["worst"] == {"name": "Peter Obi", "average": 60.0}
+    assert store.cohort_summary(term="2030") is None
+
+
+def test_class_summaries(store):
+    assert store.class_summaries() == {
+        "JS1A": {"count": 2, "average": pytest.approx(82.0), "min": 70.0, "max": 94.0},
+        "JS1B": {"count": 1, "average": 60.0, "min": 60.0, "max": 60.0},
+    }
+
+
+def test_rows_by_class_and_name(store):
+    assert [row["name"] for row in store.rows_in_class(" JS1A ")] == ["Ada Lovelace", "Grace Hopper"]
+    rows = store.find_student_rows("peter OBI")
+    assert [(row["name"], row["math"]) for row in rows] == [("Peter Obi", "60.0")]
+    assert store.find_student_rows("Nobody") == []
+
+
+def test_terms_are_kept_apart(store, tmp_path):
+    later = tmp_path / "later.csv"
+    later.write_text("name,class,days_present,days_absent,math,english\nAda Lovelace,JS1A,59,3,50,60\n",
+                     encoding="utf-8")
+    assert store.import_csv(str(later), term="T2") == 1
+    assert store.subject_averages(term="T2") == {"math": 50.0, "english": 60.0}
+    assert store.cohort_summary()["num_students"] == 3
+    assert [row["math"] for row in store.find_student_rows("Ada Lovelace", term="T2")] == ["50.0"]
+    assert store.rows_in_class("JS1A", term="T2")[0]["days_present"] == "59"